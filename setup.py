@@ -39,6 +39,8 @@ options = {
     "optimize": 2,
     "ascii": True,
     "packages": ["OpenGL.arrays", "OpenGL.platform"],
+    # Only imported when c/grammar.txt isn't found, as in this build
+    "includes": ["c.llparsertab"],
     "dll_excludes": ["w9xpopen.exe"],
     "excludes": [
       # Built-in stuff
@@ -61,6 +63,7 @@ options = {
   "py2app": {
     "app": ["src/main.py"],
     "argv_emulation": True,
+    "includes": ["c.llparsertab"],
     "dist_dir": "dist/mac"
   }
 }
@@ -0,0 +1,267 @@
+"""
+A compact representation of syntax trees
+
+An `Arena` stores the nodes of a syntax tree in parallel arrays, like a
+`tokenstream.TokenStream` stores tokens: the integer kind, first child, next
+sibling, position offset and value index of each node. The fields of a node
+that hold other nodes are its children, in the order of its `__slots__`; a
+field that holds a list has a list node as its child, with the items as its
+children, and a field that holds None has a none node. The rest of the fields
+of a node, such as names and constant values, are stored together as one tuple
+in a list of distinct values.
+
+`Arena.root` returns a view of the tree that can be walked by the visitors of
+c.syntree, such as `tacgen.TACGenerator`: each node is created when it is read
+from its parent, as an instance of a subclass of its syntax tree class that
+reads its fields from the arena.
+"""
+
+from array import array
+
+import scanner
+import syntree
+
+# The fields that are stored in the value of a node rather than as children
+VALUE_FIELDS = frozenset(["id", "val", "type", "op", "const", "volatile",
+  "binding", "depth"])
+
+# The kinds of the nodes that hold a field that isn't a syntax tree node
+NONE_KIND = 0
+LIST_KIND = 1
+VALUE_KIND = 2
+
+# The syntax tree node classes, by kind. Kinds are stored as bytes.
+NODE_TYPES = [None, None, None] + sorted((cls for cls in vars(syntree).values()
+  if isinstance(cls, type) and cls.__module__ == syntree.__name__ and
+  not issubclass(cls, (syntree.Type, syntree.NodeVisitor, Exception))),
+  key=lambda cls: cls.__name__)
+KINDS = dict((cls, kind) for kind, cls in enumerate(NODE_TYPES) if kind >= 3)
+assert len(NODE_TYPES) <= 256
+
+# The offset of nodes without a position. Positions that aren't offsets into
+# the arena's source are stored as values, at -2 - their value index.
+NO_POSITION = -1
+
+class Layout(object):
+  """How the fields of a syntax tree node class are stored in an arena"""
+
+  def __init__(self, cls):
+    names = syntree.fieldNames(cls)
+    self.cls = cls
+    self.hasPos = "pos" in names
+    self.values = tuple(name for name in names if name in VALUE_FIELDS)
+    self.children = tuple(name for name in names
+      if name != "pos" and name not in VALUE_FIELDS)
+
+LAYOUTS = [None, None, None] + [Layout(cls) for cls in NODE_TYPES[3:]]
+
+class Arena(object):
+  """The nodes of a syntax tree, stored as parallel arrays"""
+
+  def __init__(self, lines, kinds, firsts, nexts, offs, valueIds, values):
+    self.lines = lines
+    self.kinds = kinds
+    self.firsts = firsts
+    self.nexts = nexts
+    self.offs = offs
+    self.valueIds = valueIds
+    self.values = values
+
+  @classmethod
+  def fromTree(cls, root):
+    """Return an arena holding a copy of a syntax tree."""
+    arena = cls(None, array('B'), array('i'), array('i'), array('i'),
+      array('i'), [()])
+    ids = {(tuple, ()): 0}
+    # The last child added to each node
+    lasts = array('i')
+
+    stack = [(root, -1)]
+    while stack:
+      x, parent = stack.pop()
+      index = len(arena.kinds)
+      if parent >= 0:
+        if lasts[parent] < 0:
+          arena.firsts[parent] = index
+        else:
+          arena.nexts[lasts[parent]] = index
+        lasts[parent] = index
+
+      off = NO_POSITION
+      children = ()
+      if x is None:
+        kind = NONE_KIND
+        value = ()
+      elif isinstance(x, list):
+        kind = LIST_KIND
+        value = ()
+        children = x
+      elif not syntree.isNode(x):
+        kind = VALUE_KIND
+        value = x
+      else:
+        kind = KINDS[type(x)]
+        layout = LAYOUTS[kind]
+        if layout.hasPos:
+          off = arena._posOff(getattr(x, "pos", None), ids)
+        value = tuple(getattr(x, name, None) for name in layout.values)
+        children = [getattr(x, name, None) for name in layout.children]
+
+      arena.kinds.append(kind)
+      arena.firsts.append(-1)
+      arena.nexts.append(-1)
+      arena.offs.append(off)
+      arena.valueIds.append(arena._valueId(value, ids))
+      lasts.append(-1)
+      stack.extend((child, index) for child in reversed(children))
+
+    return arena
+
+  def _posOff(self, pos, ids):
+    """Return the offset to store for a position."""
+    if pos is None:
+      return NO_POSITION
+    if isinstance(pos, scanner.SourcePosition):
+      if self.lines is None:
+        self.lines = pos.lines
+      if pos.lines is self.lines:
+        return pos.off
+    return -2 - self._valueId(pos, ids)
+
+  def _valueId(self, value, ids):
+    """Return the index of a value in the list of distinct values, adding it if
+    it isn't there yet. Values are keyed by their types as well, since values
+    of different types such as 1 and 1.0 can be equal."""
+    if type(value) is tuple:
+      key = (tuple, tuple((type(item), item) for item in value))
+    else:
+      key = (type(value), value)
+    try:
+      return ids[key]
+    except KeyError:
+      valueId = ids[key] = len(self.values)
+      self.values.append(value)
+      return valueId
+
+  def __len__(self):
+    return len(self.kinds)
+
+  def pos(self, index):
+    """Return the position of the node at the given index."""
+    off = self.offs[index]
+    if off == NO_POSITION:
+      return None
+    elif off < NO_POSITION:
+      return self.values[-2 - off]
+    return scanner.SourcePosition(self.lines, off)
+
+  def children(self, index):
+    """Yield the indices of the children of the node at the given index."""
+    child = self.firsts[index]
+    nexts = self.nexts
+    while child >= 0:
+      yield child
+      child = nexts[child]
+
+  def get(self, index):
+    """Return the value of the node at the given index as it is read from its
+    parent: a view for a syntax tree node, a list of values for a list node, or
+    the value it holds."""
+    kind = self.kinds[index]
+    if kind >= 3:
+      return VIEW_TYPES[kind](self, index)
+    elif kind == LIST_KIND:
+      return [self.get(child) for child in self.children(index)]
+    elif kind == VALUE_KIND:
+      return self.values[self.valueIds[index]]
+    return None
+
+  def root(self):
+    """Return a view of the root node."""
+    return self.get(0)
+
+  def tree(self):
+    """Return a copy of the tree as syntax tree nodes."""
+    nodes = [None] * len(self.kinds)
+    # Build the children of each node before the node itself.
+    for index in reversed(xrange(len(self.kinds))):
+      kind = self.kinds[index]
+      if kind >= 3:
+        layout = LAYOUTS[kind]
+        node = object.__new__(layout.cls)
+        if layout.hasPos:
+          object.__setattr__(node, "pos", self.pos(index))
+        for name, value in zip(layout.values,
+          self.values[self.valueIds[index]]):
+          object.__setattr__(node, name, value)
+        for name, child in zip(layout.children, self.children(index)):
+          object.__setattr__(node, name, nodes[child])
+        nodes[index] = node
+      elif kind == LIST_KIND:
+        nodes[index] = [nodes[child] for child in self.children(index)]
+      elif kind == VALUE_KIND:
+        nodes[index] = self.values[self.valueIds[index]]
+    return nodes[0]
+
+  def copy(self):
+    """Return a copy of the arena, which only copies the arrays."""
+    return Arena(self.lines, self.kinds[:], self.firsts[:], self.nexts[:],
+      self.offs[:], self.valueIds[:], list(self.values))
+
+  def __eq__(self, other):
+    return (isinstance(other, Arena) and self.kinds == other.kinds and
+      self.firsts == other.firsts and self.offs == other.offs and
+      self.valueIds == other.valueIds and self.values == other.values)
+
+  def __ne__(self, other):
+    return not self == other
+
+  def __hash__(self):
+    return hash((self.kinds.tostring(), self.offs.tostring(),
+      self.valueIds.tostring()))
+
+class View(object):
+  """A syntax tree node that reads its fields from an arena"""
+
+  __slots__ = ()
+
+  def __init__(self, arena, index):
+    object.__setattr__(self, "_arena", arena)
+    object.__setattr__(self, "_index", index)
+
+  def __setattr__(self, name, value):
+    raise AttributeError("arena nodes are read-only")
+
+def _childGetter(n):
+  """Return a function that reads the nth child of a view."""
+  def get(self):
+    arena = self._arena
+    child = arena.firsts[self._index]
+    for _ in xrange(n):
+      child = arena.nexts[child]
+    return arena.get(child)
+  return get
+
+def _valueGetter(n):
+  """Return a function that reads the nth value of a view."""
+  def get(self):
+    arena = self._arena
+    return arena.values[arena.valueIds[self._index]][n]
+  return get
+
+def _pos(self):
+  return self._arena.pos(self._index)
+
+def _viewType(layout):
+  """Return the view class for the nodes of a syntax tree node class."""
+  attrs = {"__slots__": ("_arena", "_index"), "__doc__": layout.cls.__doc__}
+  if layout.hasPos:
+    attrs["pos"] = property(_pos)
+  for n, name in enumerate(layout.values):
+    attrs[name] = property(_valueGetter(n))
+  for n, name in enumerate(layout.children):
+    attrs[name] = property(_childGetter(n))
+  return type(layout.cls.__name__, (View, layout.cls), attrs)
+
+# The view classes, by kind
+VIEW_TYPES = [None, None, None] + [_viewType(layout) for layout in LAYOUTS[3:]]
@@ -0,0 +1,482 @@
+"""
+A generator of table-driven LL(1) parsers
+
+`generate` reads a grammar in the notation of doc/c.txt, with a Python action
+for each alternative, and returns the source of a standalone parser module. The
+module predicts each alternative from a table indexed by nonterminal and
+lookahead token, and keeps its own stacks of symbols and values, so it never
+backtracks or recurses. See grammar.txt for the grammar of the C subset.
+"""
+
+import re
+
+from error import CompileError
+import scanner
+
+# The version of the generated code, which is part of the hash of a generated
+# module so that it is regenerated when the generator changes
+VERSION = 1
+
+# Named terminals, by the token types they stand for
+NAMED_TERMINALS = {
+  "identifier": scanner.IdentifierToken,
+  "int-constant": scanner.IntToken,
+  "long-constant": scanner.LongToken,
+  "unsigned-int-constant": scanner.UIntToken,
+  "unsigned-long-constant": scanner.ULongToken,
+  "float-constant": scanner.FloatToken,
+  "double-constant": scanner.DoubleToken,
+  "long-double-constant": scanner.LongDoubleToken,
+  "char-constant": scanner.CharToken,
+  "wide-char-constant": scanner.WCharToken,
+  "end-of-file": scanner.EOFToken,
+}
+
+# Quoted terminals other than keywords, by the token types they stand for
+OPERATORS = {
+  ";": scanner.SemicolonToken, "{": scanner.LCurlyToken,
+  "}": scanner.RCurlyToken, ",": scanner.CommaToken,
+  "(": scanner.LParenToken, ")": scanner.RParenToken,
+  "[": scanner.LSquareToken, "]": scanner.RSquareToken,
+  "?": scanner.QuestionToken, "~": scanner.NotToken,
+  "->": scanner.ArrowToken, "++": scanner.IncrementToken,
+  "--": scanner.DecrementToken, "&&": scanner.LogicAndToken,
+  "||": scanner.LogicOrToken, "<=": scanner.LessThanEqualToken,
+  ">=": scanner.GreaterThanEqualToken, "==": scanner.EqualToken,
+  "!=": scanner.NotEqualToken, "+=": scanner.AddAssignToken,
+  "-=": scanner.SubAssignToken, "*=": scanner.MulAssignToken,
+  "/=": scanner.DivAssignToken, "%=": scanner.ModAssignToken,
+  "&=": scanner.AndAssignToken, "^=": scanner.XorAssignToken,
+  "|=": scanner.OrAssignToken, "<<=": scanner.LeftShiftAssignToken,
+  ">>=": scanner.RightShiftAssignToken, "<<": scanner.LeftShiftToken,
+  ">>": scanner.RightShiftToken, "...": scanner.EllipsisToken,
+  ".": scanner.PeriodToken, "<": scanner.LessThanToken,
+  ">": scanner.GreaterThanToken, "+": scanner.AddToken,
+  "-": scanner.SubToken, "*": scanner.StarToken, "/": scanner.DivToken,
+  "%": scanner.ModToken, "&": scanner.AmpersandToken, "^": scanner.XorToken,
+  "|": scanner.OrToken, "=": scanner.AssignToken,
+  "!": scanner.LogicNotToken, ":": scanner.ColonToken,
+}
+
+EMPTY = "%empty"
+
+# A symbol in an alternative: a quoted terminal or a name, with an optional
+# suffix
+SYMBOL = re.compile(r"\s*('[^']+'[?*+]?|[^\s{']+)")
+
+class GrammarError(CompileError):
+  """An error in a grammar, such as an alternative that can't be predicted from
+  a single token"""
+  pass
+
+class Production(object):
+  """An alternative of a nonterminal: a list of symbols and the source of the
+  action that computes its value, or None if it has the value of its only
+  symbol"""
+
+  def __init__(self, lhs, rhs, action, line):
+    self.lhs = lhs
+    self.rhs = rhs
+    self.action = action
+    self.line = line
+
+  def __repr__(self):
+    return "%s: %s" % (self.lhs, " ".join(self.rhs) or EMPTY)
+
+def readGrammar(text):
+  """Return the prologue, the productions and the start symbol of a grammar.
+
+  The optional prologue is Python code between '%{' and '%}' lines. A rule is a
+  nonterminal followed by ':' at the start of a line and its alternatives on
+  the indented lines after it. An action is a Python expression in braces at the
+  end of an alternative, which may continue onto the next lines.
+  """
+  lines = text.split("\n")
+  prologue = []
+  productions = []
+  lhs = None
+  i = 0
+  while i < len(lines):
+    line = lines[i]
+    lineNum = i + 1
+    i += 1
+    if line.strip() == "%{":
+      while i < len(lines) and lines[i].strip() != "%}":
+        prologue.append(lines[i])
+        i += 1
+      i += 1
+      continue
+
+    stripped = line.strip()
+    if not stripped or stripped.startswith("#"):
+      continue
+
+    if not line[0].isspace():
+      if not stripped.endswith(":"):
+        raise GrammarError(scanner.Position(lineNum, 1),
+          "expected a rule name followed by ':'")
+      lhs = stripped[:-1]
+      continue
+
+    if lhs is None:
+      raise GrammarError(scanner.Position(lineNum, 1),
+        "alternative outside of a rule")
+
+    rhs = []
+    pos = 0
+    while True:
+      m = SYMBOL.match(stripped, pos)
+      if m is None:
+        break
+      rhs.append(m.group(1))
+      pos = m.end()
+    rest = stripped[pos:].strip()
+
+    # The action may start on the next line, and span several lines.
+    if not rest and i < len(lines) and lines[i].strip().startswith("{"):
+      rest = lines[i].strip()
+      i += 1
+    action = None
+    if rest:
+      if not rest.startswith("{"):
+        raise GrammarError(scanner.Position(lineNum, pos + 1),
+          "expected a symbol or an action")
+      action = rest[1:]
+      while action.count("{") + 1 > action.count("}"):
+        if i >= len(lines):
+          raise GrammarError(scanner.Position(lineNum, 1), "unclosed action")
+        action += "\n" + lines[i]
+        i += 1
+      action = action[:action.rindex("}")].strip()
+
+    if rhs == [EMPTY]:
+      rhs = []
+    productions.append(Production(lhs, rhs, action, lineNum))
+
+  if not productions:
+    raise GrammarError(None, "empty grammar")
+  return "\n".join(prologue), productions, productions[0].lhs
+
+def terminalName(symbol, nonterminals):
+  """Return the name of the token type of a terminal, or None if the symbol is
+  a nonterminal."""
+  if symbol.startswith("'"):
+    text = symbol[1:-1]
+    if re.match(r"[A-Za-z_]\w*$", text):
+      return None
+    return OPERATORS[text].__name__
+  if symbol in nonterminals:
+    return None
+  return NAMED_TERMINALS[symbol].__name__
+
+def desugar(productions):
+  """Replace the `X?', `X*' and `X+' symbols in a list of productions with new
+  nonterminals. Lists are built right to left and then reversed, so that each
+  item takes constant time."""
+  result = []
+  added = set()
+
+  def add(lhs, rhs, action):
+    result.append(Production(lhs, rhs, action, None))
+
+  for p in productions:
+    rhs = []
+    for symbol in p.rhs:
+      # Quoted terminals end with a quote unless they have a suffix.
+      if symbol[-1] in "?*+":
+        base, suffix = symbol[:-1], symbol[-1]
+        items = base + "*'"
+        if suffix in "*+" and items not in added:
+          added.add(items)
+          add(items, [base, items], "_push($2, $1)")
+          add(items, [], "[]")
+        if symbol not in added:
+          added.add(symbol)
+          if suffix == "?":
+            add(symbol, [base], None)
+            add(symbol, [], "None")
+          elif suffix == "*":
+            add(symbol, [items], "_reverse($1)")
+          else:
+            add(symbol, [base, items], "_reverse(_push($2, $1))")
+      rhs.append(symbol)
+    result.append(Production(p.lhs, rhs, p.action, p.line))
+  return result
+
+def analyze(productions, terminals):
+  """Return the nullable nonterminals and the FIRST and FOLLOW sets of the
+  nonterminals of a grammar."""
+  nonterminals = set(p.lhs for p in productions)
+  nullable = set()
+  first = dict((n, set()) for n in nonterminals)
+  follow = dict((n, set()) for n in nonterminals)
+
+  def firstOf(rhs):
+    """Return the FIRST set of a list of symbols and whether it is nullable."""
+    result = set()
+    for symbol in rhs:
+      if symbol in terminals:
+        result.add(symbol)
+        return result, False
+      result |= first[symbol]
+      if symbol not in nullable:
+        return result, False
+    return result, True
+
+  changed = True
+  while changed:
+    changed = False
+    for p in productions:
+      symbols, isNullable = firstOf(p.rhs)
+      if not symbols <= first[p.lhs]:
+        first[p.lhs] |= symbols
+        changed = True
+      if isNullable and p.lhs not in nullable:
+        nullable.add(p.lhs)
+        changed = True
+
+      for i, symbol in enumerate(p.rhs):
+        if symbol in terminals:
+          continue
+        symbols, isNullable = firstOf(p.rhs[i + 1:])
+        if isNullable:
+          symbols = symbols | follow[p.lhs]
+        if not symbols <= follow[symbol]:
+          follow[symbol] |= symbols
+          changed = True
+
+  return nullable, first, follow, firstOf
+
+def buildTable(productions, terminals):
+  """Return a dictionary mapping (nonterminal, terminal) pairs to the index of
+  the production to predict.
+
+  A nullable alternative is only predicted on a token that no other alternative
+  can start with, which makes optional and repeated symbols greedy, like the
+  combinatorial parsers. Any other conflict is an error.
+  """
+  nullable, first, follow, firstOf = analyze(productions, terminals)
+  table = {}
+
+  def conflict(p, q, t):
+    raise GrammarError(scanner.Position(p.line or 0, 1),
+      "alternatives `%r' and `%r' both start with %s" % (q, p, t))
+
+  for index, p in enumerate(productions):
+    for t in firstOf(p.rhs)[0]:
+      if (p.lhs, t) in table:
+        conflict(p, productions[table[p.lhs, t]], t)
+      table[p.lhs, t] = index
+
+  for index, p in enumerate(productions):
+    if firstOf(p.rhs)[1]:
+      for t in follow[p.lhs]:
+        other = table.get((p.lhs, t))
+        if other is None:
+          table[p.lhs, t] = index
+        elif firstOf(productions[other].rhs)[1] and other != index:
+          conflict(p, productions[other], t)
+
+  return table
+
+def generate(text, digest=""):
+  """Return the source of a parser module for a grammar. `digest` is recorded
+  in the module as GRAMMAR_HASH."""
+  prologue, productions, start = readGrammar(text)
+  nonterminals = set(p.lhs for p in productions)
+  for p in productions:
+    for symbol in p.rhs:
+      base = symbol[:-1] if symbol[-1] in "?*+" else symbol
+      if base not in nonterminals and not base.startswith("'") and \
+          base not in NAMED_TERMINALS:
+        raise GrammarError(scanner.Position(p.line, 1),
+          "undefined symbol `%s'" % base)
+  productions = desugar(productions)
+  nonterminals = []
+  for p in productions:
+    if p.lhs not in nonterminals:
+      nonterminals.append(p.lhs)
+  terminals = []
+  for p in productions:
+    for symbol in p.rhs:
+      if symbol not in nonterminals and symbol not in terminals:
+        terminals.append(symbol)
+
+  table = buildTable(productions, set(terminals))
+
+  ntIds = dict((n, i) for i, n in enumerate(nonterminals))
+  tIds = dict((t, i) for i, t in enumerate(terminals))
+  numNTs = len(nonterminals)
+  numTs = len(terminals)
+  # Stack symbols are nonterminals, terminals whose tokens are kept as values,
+  # terminals that are only matched, and productions to reduce, in that order.
+  keep = numNTs
+  drop = numNTs + numTs
+
+  out = []
+  emit = out.append
+  emit('"""\nA table-driven LL(1) parser generated by c.llgen. Do not edit.'
+    '\n"""')
+  emit("")
+  emit("GRAMMAR_HASH = %r" % digest)
+  emit("")
+  emit("import scanner")
+  emit("")
+  emit(prologue)
+  emit("")
+  emit(DRIVER)
+
+  # Terminals
+  kinds = []
+  keywords = []
+  for i, t in enumerate(terminals):
+    name = terminalName(t, nonterminals)
+    if name is None:
+      keywords.append((t[1:-1], i))
+    else:
+      kinds.append("(scanner.%s.kind, %d)" % (name, i))
+  emit("KIND_IDS = dict([%s])" % ",\n  ".join(kinds))
+  emit("KEYWORD_IDS = %r" % dict(keywords))
+  emit("NUM_TERMINALS = %d" % numTs)
+  emit("NUM_NONTERMINALS = %d" % numNTs)
+  emit("START = %d" % ntIds[start])
+  emit("")
+
+  # Actions
+  actions = []
+  pushes = []
+  for index, p in enumerate(productions):
+    used = set(int(k) for k in re.findall(r"\$(\d+)", p.action or ""))
+    if p.action is None:
+      if len(p.rhs) != 1:
+        raise GrammarError(scanner.Position(p.line or 0, 1),
+          "alternative `%r' needs an action" % p)
+      used = set([1])
+
+    symbols = []
+    for k, symbol in enumerate(p.rhs, 1):
+      if symbol in ntIds:
+        symbols.append(ntIds[symbol])
+      elif k in used:
+        symbols.append(keep + tIds[symbol])
+      else:
+        symbols.append(drop + tIds[symbol])
+
+    if p.action is None:
+      actions.append("None")
+      pushes.append(tuple(reversed(symbols)))
+      continue
+
+    params = ["v%d" % k for k, symbol in enumerate(p.rhs, 1)
+      if symbol in ntIds or k in used]
+    name = "_action%d" % index
+    emit("def %s(%s):" % (name, ", ".join(params)))
+    emit("  # %r" % p)
+    emit("  return (%s)" % re.sub(r"\$(\d+)", r"v\1", p.action))
+    emit("")
+    actions.append(name)
+    reduce_ = drop + numTs + index
+    pushes.append((reduce_,) + tuple(reversed(symbols)))
+
+  emit("ACTIONS = [%s]" % ", ".join(actions))
+  emit("ARITIES = %r" % [len([s for s in push[1:] if s < drop])
+    if actions[i] != "None" else 0 for i, push in enumerate(pushes)])
+  emit("PUSHES = %r" % pushes)
+  emit("PREDICT = %r" % dict((ntIds[n] * (numTs + 1) + tIds[t], index)
+    for (n, t), index in table.iteritems()))
+  emit("")
+  emit("_init()")
+  return "\n".join(out) + "\n"
+
+# The parser driver, which is copied into every generated module
+DRIVER = r'''
+class Reject(Exception):
+  """Raised when the input isn't in the language of the grammar"""
+  pass
+
+def reject():
+  """Reject the input from an action."""
+  raise Reject()
+
+def _push(xs, x):
+  xs.append(x)
+  return xs
+
+def _reverse(xs):
+  xs.reverse()
+  return xs
+
+def _init():
+  """Build the flat prediction table."""
+  global TABLE, KEEP, DROP, REDUCE, KEYWORD
+  width = NUM_TERMINALS + 1
+  TABLE = [-1] * (NUM_NONTERMINALS * width)
+  for index, production in PREDICT.iteritems():
+    TABLE[index] = production
+  KEEP = NUM_NONTERMINALS
+  DROP = KEEP + NUM_TERMINALS
+  REDUCE = DROP + NUM_TERMINALS
+  KEYWORD = scanner.KeywordToken.kind
+
+def parse(ts):
+  """Parse a `tokenstream.TokenStream`, returning the value of the start symbol
+  or raising `Reject` at the first token that no alternative can start with."""
+  table = TABLE
+  width = NUM_TERMINALS + 1
+  pushes = PUSHES
+  actions = ACTIONS
+  arities = ARITIES
+  kindIds = KIND_IDS
+  keywordIds = KEYWORD_IDS
+  unknown = NUM_TERMINALS
+  keep = KEEP
+  drop = DROP
+  reduce_ = REDUCE
+  keyword = KEYWORD
+  has = ts.has
+  kindAt = ts.kind
+
+  def terminalAt(i):
+    if not has(i):
+      return unknown
+    kind = kindAt(i)
+    if kind == keyword:
+      return keywordIds.get(ts.value(i), unknown)
+    return kindIds.get(kind, unknown)
+
+  stack = [START]
+  values = []
+  pop = stack.pop
+  extend = stack.extend
+  append = values.append
+  i = 0
+  t = terminalAt(0)
+  while stack:
+    symbol = pop()
+    if symbol < keep:
+      production = table[symbol * width + t]
+      if production < 0:
+        raise Reject()
+      extend(pushes[production])
+    elif symbol < drop:
+      if symbol - keep != t:
+        raise Reject()
+      append(ts[i])
+      i += 1
+      t = terminalAt(i)
+    elif symbol < reduce_:
+      if symbol - drop != t:
+        raise Reject()
+      i += 1
+      t = terminalAt(i)
+    else:
+      production = symbol - reduce_
+      n = arities[production]
+      if n:
+        args = values[-n:]
+        del values[-n:]
+        append(actions[production](*args))
+      else:
+        append(actions[production]())
+  return values[0]
+'''
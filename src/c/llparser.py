@@ -0,0 +1,116 @@
+"""
+A fast parser for the C subset, generated from grammar.txt by c.llgen
+
+The generated parser is kept in llparsertab.py next to the grammar, and is only
+generated again when the grammar or the generator changes; commit it along with
+the grammar. Packaged builds don't have the grammar, so they import the module
+that was bundled with them instead.
+
+It builds the same syntax trees as the combinator parsers in c.parser, which
+stay the reference implementation: any input that the generated parser rejects
+is parsed again by c.parser, so that errors are reported exactly as before.
+"""
+
+import hashlib
+import imp
+import os
+import re
+
+from error import CompileError
+import llgen
+import parser
+import syntree
+import tokenstream
+
+GRAMMAR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+  "grammar.txt")
+TABLES_PATH = os.path.join(os.path.dirname(GRAMMAR_PATH), "llparsertab.py")
+
+def _digest(text):
+  """Return the hash of a grammar and the generator version."""
+  return hashlib.sha1("%d\n%s" % (llgen.VERSION, text)).hexdigest()
+
+def _readCached(path):
+  """Return the source of a generated module and the grammar hash recorded in
+  it, or (None, None) if there is no such module."""
+  try:
+    with open(path, "rb") as file_:
+      source = file_.read()
+  except IOError:
+    return None, None
+  match = re.search(r"^GRAMMAR_HASH = '(\w*)'$", source, re.M)
+  return source, match and match.group(1)
+
+def load(grammarPath=GRAMMAR_PATH, tablesPath=TABLES_PATH):
+  """Return the generated parser module for a grammar, generating it again if
+  it is missing or out of date. If the module can't be written, it is only
+  kept in memory."""
+  with open(grammarPath, "rb") as file_:
+    text = file_.read()
+  digest = _digest(text)
+
+  source, cachedDigest = _readCached(tablesPath)
+  if cachedDigest != digest:
+    source = llgen.generate(text, digest)
+    try:
+      # Write to a temporary file first, so that a parser that is loading at
+      # the same time never sees half of the module.
+      tempPath = "%s.%d.tmp" % (tablesPath, os.getpid())
+      with open(tempPath, "wb") as file_:
+        file_.write(source)
+      if os.name == "nt" and os.path.exists(tablesPath):
+        os.remove(tablesPath)
+      os.rename(tempPath, tablesPath)
+    except (IOError, OSError):
+      pass
+
+  # The module is imported relative to this package, like the other modules.
+  package = __name__.rpartition(".")[0]
+  module = imp.new_module(package + ".llparsertab" if package
+    else "llparsertab")
+  module.__file__ = tablesPath
+  if package:
+    module.__package__ = package
+  exec compile(source, tablesPath, "exec") in module.__dict__
+  return module
+
+def _loadDefault():
+  """Return the generated parser module for grammar.txt, or None if neither
+  the grammar nor a bundled module is available."""
+  try:
+    return load(GRAMMAR_PATH, TABLES_PATH)
+  except IOError:
+    pass
+
+  # A packaged build bundles the module, but not the grammar.
+  try:
+    import llparsertab
+  except ImportError:
+    return None
+  return llparsertab
+
+# The generated parser module, once it has been loaded, or False if it isn't
+# available
+_tables = None
+
+def parse(ts, prelude=None, memo=None):
+  """Parse a C program like `parser.parse`, returning the same syntax tree or
+  raising the same error."""
+  global _tables
+  if not isinstance(ts, tokenstream.TokenStream):
+    ts = tokenstream.TokenStream.fromTokens(ts)
+  if _tables is None:
+    _tables = _loadDefault() or False
+  if not _tables:
+    return parser.parse(ts, prelude, memo)
+
+  try:
+    decls = _tables.parse(ts)
+  except (_tables.Reject, CompileError):
+    return parser.parse(ts, prelude, memo)
+
+  if prelude is None:
+    if not decls:
+      return parser.parse(ts, prelude, memo)
+    return syntree.TranslationUnit(decls)
+  return syntree.TranslationUnit(prelude.decls + decls)
@@ -0,0 +1,746 @@
+"""
+A table-driven LL(1) parser generated by c.llgen. Do not edit.
+"""
+
+GRAMMAR_HASH = '87618b3074fe372aa495039cfab59f087a598eef'
+
+import scanner
+
+import parser
+import syntree
+from parser import mkDecl, mkFunDef, mkParamDecl, mkPointerDeclarator, \
+  normalizeTypeQuals
+
+# The precedence of each binary operator, by the function that combines its
+# operands. The comma operator binds the loosest.
+PRECEDENCE = dict((combine, prec)
+  for prec, level in enumerate(parser.BINARY_LEVELS)
+  for combine in level.itervalues())
+PRECEDENCE[syntree.CommaExpr] = -1
+
+def foldBinary(x, ops):
+  """Combine an operand and a list of (combine, operand) pairs by precedence,
+  like `parser.binaryOps`."""
+  exprs = []
+  pending = []
+  for combine, y in ops:
+    prec = PRECEDENCE[combine]
+    while pending and pending[-1][0] >= prec:
+      x = pending.pop()[1](exprs.pop(), x)
+    exprs.append(x)
+    pending.append((prec, combine))
+    x = y
+  while pending:
+    x = pending.pop()[1](exprs.pop(), x)
+  return x
+
+def mkCondExpr(expr_, rest):
+  """Return a conditional expression if the '?' part was given."""
+  if rest is None:
+    return expr_
+  return syntree.CondExpr(expr_, rest[0], rest[1])
+
+def nonEmpty(specs):
+  """Reject declarations without declaration specifiers, which are only allowed
+  in function definitions."""
+  if not specs:
+    reject()
+  return specs
+
+
+class Reject(Exception):
+  """Raised when the input isn't in the language of the grammar"""
+  pass
+
+def reject():
+  """Reject the input from an action."""
+  raise Reject()
+
+def _push(xs, x):
+  xs.append(x)
+  return xs
+
+def _reverse(xs):
+  xs.reverse()
+  return xs
+
+def _init():
+  """Build the flat prediction table."""
+  global TABLE, KEEP, DROP, REDUCE, KEYWORD
+  width = NUM_TERMINALS + 1
+  TABLE = [-1] * (NUM_NONTERMINALS * width)
+  for index, production in PREDICT.iteritems():
+    TABLE[index] = production
+  KEEP = NUM_NONTERMINALS
+  DROP = KEEP + NUM_TERMINALS
+  REDUCE = DROP + NUM_TERMINALS
+  KEYWORD = scanner.KeywordToken.kind
+
+def parse(ts):
+  """Parse a `tokenstream.TokenStream`, returning the value of the start symbol
+  or raising `Reject` at the first token that no alternative can start with."""
+  table = TABLE
+  width = NUM_TERMINALS + 1
+  pushes = PUSHES
+  actions = ACTIONS
+  arities = ARITIES
+  kindIds = KIND_IDS
+  keywordIds = KEYWORD_IDS
+  unknown = NUM_TERMINALS
+  keep = KEEP
+  drop = DROP
+  reduce_ = REDUCE
+  keyword = KEYWORD
+  has = ts.has
+  kindAt = ts.kind
+
+  def terminalAt(i):
+    if not has(i):
+      return unknown
+    kind = kindAt(i)
+    if kind == keyword:
+      return keywordIds.get(ts.value(i), unknown)
+    return kindIds.get(kind, unknown)
+
+  stack = [START]
+  values = []
+  pop = stack.pop
+  extend = stack.extend
+  append = values.append
+  i = 0
+  t = terminalAt(0)
+  while stack:
+    symbol = pop()
+    if symbol < keep:
+      production = table[symbol * width + t]
+      if production < 0:
+        raise Reject()
+      extend(pushes[production])
+    elif symbol < drop:
+      if symbol - keep != t:
+        raise Reject()
+      append(ts[i])
+      i += 1
+      t = terminalAt(i)
+    elif symbol < reduce_:
+      if symbol - drop != t:
+        raise Reject()
+      i += 1
+      t = terminalAt(i)
+    else:
+      production = symbol - reduce_
+      n = arities[production]
+      if n:
+        args = values[-n:]
+        del values[-n:]
+        append(actions[production](*args))
+      else:
+        append(actions[production]())
+  return values[0]
+
+KIND_IDS = dict([(scanner.EOFToken.kind, 0),
+  (scanner.SemicolonToken.kind, 1),
+  (scanner.CommaToken.kind, 16),
+  (scanner.IdentifierToken.kind, 19),
+  (scanner.LParenToken.kind, 20),
+  (scanner.RParenToken.kind, 21),
+  (scanner.StarToken.kind, 22),
+  (scanner.LCurlyToken.kind, 30),
+  (scanner.RCurlyToken.kind, 31),
+  (scanner.AssignToken.kind, 32),
+  (scanner.QuestionToken.kind, 33),
+  (scanner.ColonToken.kind, 34),
+  (scanner.LogicOrToken.kind, 35),
+  (scanner.LogicAndToken.kind, 36),
+  (scanner.OrToken.kind, 37),
+  (scanner.XorToken.kind, 38),
+  (scanner.AmpersandToken.kind, 39),
+  (scanner.EqualToken.kind, 40),
+  (scanner.NotEqualToken.kind, 41),
+  (scanner.LessThanToken.kind, 42),
+  (scanner.GreaterThanToken.kind, 43),
+  (scanner.LessThanEqualToken.kind, 44),
+  (scanner.GreaterThanEqualToken.kind, 45),
+  (scanner.AddToken.kind, 46),
+  (scanner.SubToken.kind, 47),
+  (scanner.DivToken.kind, 48),
+  (scanner.IncrementToken.kind, 49),
+  (scanner.DecrementToken.kind, 50),
+  (scanner.NotToken.kind, 51),
+  (scanner.LogicNotToken.kind, 52),
+  (scanner.IntToken.kind, 53),
+  (scanner.LongToken.kind, 54),
+  (scanner.UIntToken.kind, 55),
+  (scanner.ULongToken.kind, 56),
+  (scanner.FloatToken.kind, 57),
+  (scanner.DoubleToken.kind, 58),
+  (scanner.LongDoubleToken.kind, 59),
+  (scanner.CharToken.kind, 60),
+  (scanner.WCharToken.kind, 61)])
+KEYWORD_IDS = {'int': 10, 'float': 12, 'char': 8, 'static': 4, 'if': 23, 'typedef': 2, 'const': 17, 'for': 25, 'unsigned': 15, 'long': 11, 'volatile': 18, 'return': 28, 'auto': 5, 'void': 7, 'else': 29, 'break': 27, 'extern': 3, 'short': 9, 'double': 13, 'register': 6, 'signed': 14, 'while': 24, 'continue': 26}
+NUM_TERMINALS = 62
+NUM_NONTERMINALS = 67
+START = 2
+
+def _action0(v1, v2):
+  # external-declaration*': external-declaration external-declaration*'
+  return (_push(v2, v1))
+
+def _action1():
+  # external-declaration*': %empty
+  return ([])
+
+def _action2(v1):
+  # external-declaration*: external-declaration*'
+  return (_reverse(v1))
+
+def _action3(v1):
+  # translation-unit: external-declaration* end-of-file
+  return (v1)
+
+def _action4(v1, v2):
+  # declaration-specifier*': declaration-specifier declaration-specifier*'
+  return (_push(v2, v1))
+
+def _action5():
+  # declaration-specifier*': %empty
+  return ([])
+
+def _action6(v1):
+  # declaration-specifier*: declaration-specifier*'
+  return (_reverse(v1))
+
+def _action7(v1, v2):
+  # external-declaration: declaration-specifier* external-declaration-rest
+  return (v2(v1))
+
+def _action8():
+  # external-declaration-rest: ';'
+  return (lambda specs: mkDecl(nonEmpty(specs), []))
+
+def _action9(v1, v2):
+  # external-declaration-rest: declarator external-declarator-rest
+  return (lambda specs: v2(specs, v1))
+
+def _action10(v1, v2):
+  # init-declarator-list-suffix*': init-declarator-list-suffix init-declarator-list-suffix*'
+  return (_push(v2, v1))
+
+def _action11():
+  # init-declarator-list-suffix*': %empty
+  return ([])
+
+def _action12(v1):
+  # init-declarator-list-suffix*: init-declarator-list-suffix*'
+  return (_reverse(v1))
+
+def _action13(v1):
+  # external-declarator-rest: init-declarator-list-suffix* ';'
+  return (lambda specs, declarator_: mkDecl(nonEmpty(specs), [declarator_] + v1))
+
+def _action14(v1, v2):
+  # declaration*': declaration declaration*'
+  return (_push(v2, v1))
+
+def _action15():
+  # declaration*': %empty
+  return ([])
+
+def _action16(v1):
+  # declaration*: declaration*'
+  return (_reverse(v1))
+
+def _action17(v1, v2):
+  # external-declarator-rest: declaration* compound-statement
+  return (lambda specs, declarator_: mkFunDef(specs, declarator_, v1, v2))
+
+def _action18(v1, v2):
+  # declaration-specifier+: declaration-specifier declaration-specifier*'
+  return (_reverse(_push(v2, v1)))
+
+def _action20():
+  # init-declarator-list?: %empty
+  return (None)
+
+def _action21(v1, v2):
+  # declaration: declaration-specifier+ init-declarator-list? ';'
+  return (mkDecl(v1, v2 or []))
+
+def _action22(v1):
+  # declaration-specifier: 'typedef'
+  return (syntree.TypedefStorageClassSpec(v1.pos))
+
+def _action23(v1):
+  # declaration-specifier: 'extern'
+  return (syntree.ExternStorageClassSpec(v1.pos))
+
+def _action24(v1):
+  # declaration-specifier: 'static'
+  return (syntree.StaticStorageClassSpec(v1.pos))
+
+def _action25(v1):
+  # declaration-specifier: 'auto'
+  return (syntree.AutoStorageClassSpec(v1.pos))
+
+def _action26(v1):
+  # declaration-specifier: 'register'
+  return (syntree.RegisterStorageClassSpec(v1.pos))
+
+def _action27(v1):
+  # declaration-specifier: 'void'
+  return (syntree.VoidTypeSpec(v1.pos))
+
+def _action28(v1):
+  # declaration-specifier: 'char'
+  return (syntree.CharTypeSpec(v1.pos))
+
+def _action29(v1):
+  # declaration-specifier: 'short'
+  return (syntree.ShortTypeSpec(v1.pos))
+
+def _action30(v1):
+  # declaration-specifier: 'int'
+  return (syntree.IntTypeSpec(v1.pos))
+
+def _action31(v1):
+  # declaration-specifier: 'long'
+  return (syntree.LongTypeSpec(v1.pos))
+
+def _action32(v1):
+  # declaration-specifier: 'float'
+  return (syntree.FloatTypeSpec(v1.pos))
+
+def _action33(v1):
+  # declaration-specifier: 'double'
+  return (syntree.DoubleTypeSpec(v1.pos))
+
+def _action34(v1):
+  # declaration-specifier: 'signed'
+  return (syntree.SignedTypeSpec(v1.pos))
+
+def _action35(v1):
+  # declaration-specifier: 'unsigned'
+  return (syntree.UnsignedTypeSpec(v1.pos))
+
+def _action37(v1, v2):
+  # init-declarator-list: declarator init-declarator-list-suffix*
+  return ([v1] + v2)
+
+def _action38(v2):
+  # init-declarator-list-suffix: ',' declarator
+  return (v2)
+
+def _action39(v1):
+  # type-qualifier: 'const'
+  return (syntree.ConstTypeQual(v1.pos))
+
+def _action40(v1):
+  # type-qualifier: 'volatile'
+  return (syntree.VolatileTypeQual(v1.pos))
+
+def _action41(v1, v2):
+  # declarator: pointer direct-declarator
+  return (mkPointerDeclarator(v1, v2))
+
+def _action43(v1, v2):
+  # direct-declarator-suffix*': direct-declarator-suffix direct-declarator-suffix*'
+  return (_push(v2, v1))
+
+def _action44():
+  # direct-declarator-suffix*': %empty
+  return ([])
+
+def _action45(v1):
+  # direct-declarator-suffix*: direct-declarator-suffix*'
+  return (_reverse(v1))
+
+def _action46(v1, v2):
+  # direct-declarator: direct-declarator-head direct-declarator-suffix*
+  return (syntree.DirectDeclarator.fromSuffixes(v1, v2))
+
+def _action47(v1):
+  # direct-declarator-head: identifier
+  return (syntree.NameDeclarator(v1.val))
+
+def _action48(v2):
+  # direct-declarator-head: '(' declarator ')'
+  return (v2)
+
+def _action49(v2):
+  # direct-declarator-suffix: '(' direct-declarator-params ')'
+  return (v2)
+
+def _action50(v1, v2):
+  # parameter-list-suffix*': parameter-list-suffix parameter-list-suffix*'
+  return (_push(v2, v1))
+
+def _action51():
+  # parameter-list-suffix*': %empty
+  return ([])
+
+def _action52(v1):
+  # parameter-list-suffix*: parameter-list-suffix*'
+  return (_reverse(v1))
+
+def _action53(v1, v2):
+  # direct-declarator-params: parameter-declaration parameter-list-suffix*
+  return (syntree.ParamDeclaratorSuffix([v1] + v2))
+
+def _action54(v1, v2):
+  # identifier-list-suffix*': identifier-list-suffix identifier-list-suffix*'
+  return (_push(v2, v1))
+
+def _action55():
+  # identifier-list-suffix*': %empty
+  return ([])
+
+def _action56(v1):
+  # identifier-list-suffix*: identifier-list-suffix*'
+  return (_reverse(v1))
+
+def _action57(v1, v2):
+  # direct-declarator-params: identifier identifier-list-suffix*
+  return (syntree.KRDeclaratorSuffix([v1] + v2))
+
+def _action58():
+  # direct-declarator-params: %empty
+  return (syntree.KRDeclaratorSuffix([]))
+
+def _action59(v1, v2):
+  # type-qualifier*': type-qualifier type-qualifier*'
+  return (_push(v2, v1))
+
+def _action60():
+  # type-qualifier*': %empty
+  return ([])
+
+def _action61(v1):
+  # type-qualifier*: type-qualifier*'
+  return (_reverse(v1))
+
+def _action63():
+  # pointer?: %empty
+  return (None)
+
+def _action64(v2, v3):
+  # pointer: '*' type-qualifier* pointer?
+  return ([normalizeTypeQuals(v2)] + (v3 or []))
+
+def _action65(v2):
+  # parameter-list-suffix: ',' parameter-declaration
+  return (v2)
+
+def _action66(v1, v2):
+  # parameter-declaration: declaration-specifier+ declarator
+  return (mkParamDecl(v1, v2))
+
+def _action67(v2):
+  # identifier-list-suffix: ',' identifier
+  return (v2)
+
+def _action70():
+  # expression?: %empty
+  return (None)
+
+def _action71(v1):
+  # statement: expression? ';'
+  return (syntree.ExprStmt(v1))
+
+def _action73():
+  # else-clause?: %empty
+  return (None)
+
+def _action74(v3, v5, v6):
+  # statement: 'if' '(' expression ')' statement else-clause?
+  return (syntree.IfStmt(v3, v5, v6))
+
+def _action75(v3, v5):
+  # statement: 'while' '(' expression ')' statement
+  return (syntree.WhileStmt(v3, v5))
+
+def _action76(v3, v5, v7, v9):
+  # statement: 'for' '(' expression? ';' expression? ';' expression? ')' statement
+  return (syntree.ForStmt(v3, v5, v7, v9))
+
+def _action77(v1):
+  # statement: 'continue' ';'
+  return (syntree.ContinueStmt(v1.pos))
+
+def _action78(v1):
+  # statement: 'break' ';'
+  return (syntree.BreakStmt(v1.pos))
+
+def _action79(v1, v2):
+  # statement: 'return' expression? ';'
+  return (syntree.ReturnStmt(v1.pos, v2))
+
+def _action80(v2):
+  # else-clause: 'else' statement
+  return (v2)
+
+def _action81(v1, v2):
+  # statement*': statement statement*'
+  return (_push(v2, v1))
+
+def _action82():
+  # statement*': %empty
+  return ([])
+
+def _action83(v1):
+  # statement*: statement*'
+  return (_reverse(v1))
+
+def _action84(v2, v3):
+  # compound-statement: '{' declaration* statement* '}'
+  return (syntree.CompoundStmt(v2, v3))
+
+def _action85(v1, v2):
+  # comma-operation*': comma-operation comma-operation*'
+  return (_push(v2, v1))
+
+def _action86():
+  # comma-operation*': %empty
+  return ([])
+
+def _action87(v1):
+  # comma-operation*: comma-operation*'
+  return (_reverse(v1))
+
+def _action88(v1, v2):
+  # expression: assignment-expression comma-operation*
+  return (foldBinary(v1, v2))
+
+def _action89(v2):
+  # comma-operation: ',' assignment-expression
+  return ((syntree.CommaExpr, v2))
+
+def _action90(v1, v2):
+  # assignment-expression: unary-expression assignment-rest
+  return (v2(v1))
+
+def _action91(v2):
+  # assignment-rest: '=' assignment-expression
+  return (lambda lexpr: syntree.AssignExpr(lexpr, None, v2))
+
+def _action92(v1, v2):
+  # binary-operation*': binary-operation binary-operation*'
+  return (_push(v2, v1))
+
+def _action93():
+  # binary-operation*': %empty
+  return ([])
+
+def _action94(v1):
+  # binary-operation*: binary-operation*'
+  return (_reverse(v1))
+
+def _action96():
+  # conditional-rest?: %empty
+  return (None)
+
+def _action97(v1, v2):
+  # assignment-rest: binary-operation* conditional-rest?
+  return (lambda expr_: mkCondExpr(foldBinary(expr_, v1), v2))
+
+def _action98(v1, v2, v3):
+  # conditional-expression: unary-expression binary-operation* conditional-rest?
+  return (mkCondExpr(foldBinary(v1, v2), v3))
+
+def _action99(v2, v4):
+  # conditional-rest: '?' expression ':' conditional-expression
+  return ((v2, v4))
+
+def _action100(v2):
+  # binary-operation: '||' unary-expression
+  return ((syntree.LogicOrExpr, v2))
+
+def _action101(v2):
+  # binary-operation: '&&' unary-expression
+  return ((syntree.LogicAndExpr, v2))
+
+def _action102(v2):
+  # binary-operation: '|' unary-expression
+  return ((syntree.OrExpr, v2))
+
+def _action103(v2):
+  # binary-operation: '^' unary-expression
+  return ((syntree.XorExpr, v2))
+
+def _action104(v2):
+  # binary-operation: '&' unary-expression
+  return ((syntree.AndExpr, v2))
+
+def _action105(v2):
+  # binary-operation: '==' unary-expression
+  return ((syntree.EqualExpr, v2))
+
+def _action106(v2):
+  # binary-operation: '!=' unary-expression
+  return ((syntree.NotEqualExpr, v2))
+
+def _action107(v2):
+  # binary-operation: '<' unary-expression
+  return ((syntree.LessThanExpr, v2))
+
+def _action108(v2):
+  # binary-operation: '>' unary-expression
+  return ((syntree.GreaterThanExpr, v2))
+
+def _action109(v2):
+  # binary-operation: '<=' unary-expression
+  return ((syntree.LessThanEqualExpr, v2))
+
+def _action110(v2):
+  # binary-operation: '>=' unary-expression
+  return ((syntree.GreaterThanEqualExpr, v2))
+
+def _action111(v2):
+  # binary-operation: '+' unary-expression
+  return ((syntree.AddExpr, v2))
+
+def _action112(v2):
+  # binary-operation: '-' unary-expression
+  return ((syntree.SubExpr, v2))
+
+def _action113(v2):
+  # binary-operation: '*' unary-expression
+  return ((syntree.MulExpr, v2))
+
+def _action114(v2):
+  # binary-operation: '/' unary-expression
+  return ((syntree.DivExpr, v2))
+
+def _action116(v1, v2):
+  # unary-expression: '++' unary-expression
+  return (syntree.PreIncExpr(v1.pos, v2))
+
+def _action117(v1, v2):
+  # unary-expression: '--' unary-expression
+  return (syntree.PreDecExpr(v1.pos, v2))
+
+def _action118(v1, v2):
+  # unary-expression: '&' unary-expression
+  return (syntree.AddrOfExpr(v1.pos, v2))
+
+def _action119(v1, v2):
+  # unary-expression: '*' unary-expression
+  return (syntree.DerefExpr(v1.pos, v2))
+
+def _action120(v1, v2):
+  # unary-expression: '+' unary-expression
+  return (syntree.PlusExpr(v1.pos, v2))
+
+def _action121(v1, v2):
+  # unary-expression: '-' unary-expression
+  return (syntree.NegExpr(v1.pos, v2))
+
+def _action122(v1, v2):
+  # unary-expression: '~' unary-expression
+  return (syntree.NotExpr(v1.pos, v2))
+
+def _action123(v1, v2):
+  # unary-expression: '!' unary-expression
+  return (syntree.LogicNotExpr(v1.pos, v2))
+
+def _action124(v1, v2):
+  # postfix-expression-suffix*': postfix-expression-suffix postfix-expression-suffix*'
+  return (_push(v2, v1))
+
+def _action125():
+  # postfix-expression-suffix*': %empty
+  return ([])
+
+def _action126(v1):
+  # postfix-expression-suffix*: postfix-expression-suffix*'
+  return (_reverse(v1))
+
+def _action127(v1, v2):
+  # postfix-expression: primary-expression postfix-expression-suffix*
+  return (reduce(lambda expr_, type_: type_(expr_), v2, v1))
+
+def _action129():
+  # argument-expression-list?: %empty
+  return (None)
+
+def _action130(v2):
+  # postfix-expression-suffix: '(' argument-expression-list? ')'
+  return (lambda expr_: syntree.CallExpr(expr_, v2 or []))
+
+def _action131():
+  # postfix-expression-suffix: '++'
+  return (syntree.PostIncExpr)
+
+def _action132():
+  # postfix-expression-suffix: '--'
+  return (syntree.PostDecExpr)
+
+def _action133(v1, v2):
+  # argument-expression-list-suffix*': argument-expression-list-suffix argument-expression-list-suffix*'
+  return (_push(v2, v1))
+
+def _action134():
+  # argument-expression-list-suffix*': %empty
+  return ([])
+
+def _action135(v1):
+  # argument-expression-list-suffix*: argument-expression-list-suffix*'
+  return (_reverse(v1))
+
+def _action136(v1, v2):
+  # argument-expression-list: assignment-expression argument-expression-list-suffix*
+  return ([v1] + v2)
+
+def _action137(v2):
+  # argument-expression-list-suffix: ',' assignment-expression
+  return (v2)
+
+def _action138(v1):
+  # primary-expression: identifier
+  return (syntree.VarExpr(v1.pos, v1.val))
+
+def _action139(v1):
+  # primary-expression: int-constant
+  return (syntree.ConstExpr(v1.pos, syntree.IntType(), v1.val))
+
+def _action140(v1):
+  # primary-expression: long-constant
+  return (syntree.ConstExpr(v1.pos, syntree.LongType(), v1.val))
+
+def _action141(v1):
+  # primary-expression: unsigned-int-constant
+  return (syntree.ConstExpr(v1.pos, syntree.UIntType(), v1.val))
+
+def _action142(v1):
+  # primary-expression: unsigned-long-constant
+  return (syntree.ConstExpr(v1.pos, syntree.ULongType(), v1.val))
+
+def _action143(v1):
+  # primary-expression: float-constant
+  return (syntree.ConstExpr(v1.pos, syntree.FloatType(), v1.val))
+
+def _action144(v1):
+  # primary-expression: double-constant
+  return (syntree.ConstExpr(v1.pos, syntree.DoubleType(), v1.val))
+
+def _action145(v1):
+  # primary-expression: long-double-constant
+  return (syntree.ConstExpr(v1.pos, syntree.LongDoubleType(), v1.val))
+
+def _action146(v1):
+  # primary-expression: char-constant
+  return (syntree.ConstExpr(v1.pos, syntree.CharType(), v1.val))
+
+def _action147(v1):
+  # primary-expression: wide-char-constant
+  return (syntree.ConstExpr(v1.pos, syntree.WCharType(), v1.val))
+
+def _action148(v2):
+  # primary-expression: '(' expression ')'
+  return (v2)
+
+ACTIONS = [_action0, _action1, _action2, _action3, _action4, _action5, _action6, _action7, _action8, _action9, _action10, _action11, _action12, _action13, _action14, _action15, _action16, _action17, _action18, None, _action20, _action21, _action22, _action23, _action24, _action25, _action26, _action27, _action28, _action29, _action30, _action31, _action32, _action33, _action34, _action35, None, _action37, _action38, _action39, _action40, _action41, None, _action43, _action44, _action45, _action46, _action47, _action48, _action49, _action50, _action51, _action52, _action53, _action54, _action55, _action56, _action57, _action58, _action59, _action60, _action61, None, _action63, _action64, _action65, _action66, _action67, None, None, _action70, _action71, None, _action73, _action74, _action75, _action76, _action77, _action78, _action79, _action80, _action81, _action82, _action83, _action84, _action85, _action86, _action87, _action88, _action89, _action90, _action91, _action92, _action93, _action94, None, _action96, _action97, _action98, _action99, _action100, _action101, _action102, _action103, _action104, _action105, _action106, _action107, _action108, _action109, _action110, _action111, _action112, _action113, _action114, None, _action116, _action117, _action118, _action119, _action120, _action121, _action122, _action123, _action124, _action125, _action126, _action127, None, _action129, _action130, _action131, _action132, _action133, _action134, _action135, _action136, _action137, _action138, _action139, _action140, _action141, _action142, _action143, _action144, _action145, _action146, _action147, _action148]
+ARITIES = [2, 0, 1, 1, 2, 0, 1, 2, 0, 2, 2, 0, 1, 1, 2, 0, 1, 2, 2, 0, 0, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 2, 1, 1, 1, 2, 0, 2, 0, 1, 2, 1, 1, 1, 2, 0, 1, 2, 2, 0, 1, 2, 0, 2, 0, 1, 0, 0, 2, 1, 2, 1, 0, 0, 0, 1, 0, 0, 3, 2, 4, 1, 1, 2, 1, 2, 0, 1, 2, 2, 0, 1, 2, 1, 2, 1, 2, 0, 1, 0, 0, 2, 3, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 2, 2, 2, 2, 2, 2, 2, 2, 2, 0, 1, 2, 0, 0, 1, 0, 0, 2, 0, 1, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+PUSHES = [(191, 0, 5), (192,), (193, 0), (194, 129, 1), (195, 3, 15), (196,), (197, 3), (198, 6, 4), (199, 130), (200, 9, 19), (201, 7, 17), (202,), (203, 7), (204, 130, 8), (205, 10, 14), (206,), (207, 10), (208, 43, 11), (209, 3, 15), (16,), (211,), (212, 130, 13, 12), (213, 69), (214, 70), (215, 71), (216, 72), (217, 73), (218, 74), (219, 75), (220, 76), (221, 77), (222, 78), (223, 79), (224, 80), (225, 81), (226, 82), (18,), (228, 8, 19), (229, 19, 145), (230, 84), (231, 85), (232, 22, 33), (22,), (234, 20, 24), (235,), (236, 20), (237, 21, 23), (238, 86), (239, 150, 19, 149), (240, 150, 27, 149), (241, 25, 34), (242,), (243, 25), (244, 26, 35), (245, 28, 36), (246,), (247, 28), (248, 29, 86), (249,), (250, 30, 18), (251,), (252, 30), (33,), (254,), (255, 32, 31, 151), (256, 35, 145), (257, 19, 12), (258, 86, 145), (43,), (46,), (261,), (262, 130, 38), (40,), (264,), (265, 39, 37, 150, 46, 149, 152), (266, 37, 150, 46, 149, 153), (267, 37, 150, 38, 130, 38, 130, 38, 149, 154), (268, 130, 93), (269, 130, 94), (270, 130, 38, 95), (271, 37, 158), (272, 41, 37), (273,), (274, 41), (275, 160, 42, 11, 159), (276, 44, 47), (277,), (278, 44), (279, 45, 48), (280, 48, 145), (281, 49, 56), (282, 48, 161), (283, 50, 55), (284,), (285, 50), (54,), (287,), (288, 52, 51), (289, 52, 51, 56), (290, 53, 163, 46, 162), (291, 56, 164), (292, 56, 165), (293, 56, 166), (294, 56, 167), (295, 56, 168), (296, 56, 169), (297, 56, 170), (298, 56, 171), (299, 56, 172), (300, 56, 173), (301, 56, 174), (302, 56, 175), (303, 56, 176), (304, 56, 151), (305, 56, 177), (59,), (307, 56, 116), (308, 56, 117), (309, 56, 106), (310, 56, 89), (311, 56, 113), (312, 56, 114), (313, 56, 118), (314, 56, 119), (315, 57, 61), (316,), (317, 57), (318, 58, 66), (64,), (320,), (321, 150, 60, 149), (322, 178), (323, 179), (324, 62, 65), (325,), (326, 62), (327, 63, 48), (328, 48, 145), (329, 86), (330, 120), (331, 121), (332, 122), (333, 123), (334, 124), (335, 125), (336, 126), (337, 127), (338, 128), (339, 150, 46, 149)]
+PREDICT = {0: 1, 1: 0, 2: 0, 3: 0, 4: 0, 5: 0, 6: 0, 7: 0, 8: 0, 9: 0, 10: 0, 11: 0, 12: 0, 13: 0, 14: 0, 15: 0, 17: 0, 18: 0, 19: 0, 20: 0, 22: 0, 1028: 37, 3078: 90, 2739: 84, 2101: 64, 63: 2, 64: 2, 65: 2, 66: 2, 67: 2, 68: 2, 69: 2, 70: 2, 71: 2, 72: 2, 73: 2, 74: 2, 75: 2, 76: 2, 77: 2, 78: 2, 80: 2, 4177: 138, 4178: 148, 83: 2, 85: 2, 4111: 137, 3770: 127, 2158: 65, 4211: 139, 4212: 140, 4213: 141, 4214: 142, 4215: 143, 4216: 144, 4217: 145, 4218: 146, 4219: 147, 126: 3, 127: 3, 1027: 37, 129: 3, 130: 3, 131: 3, 132: 3, 133: 3, 134: 3, 135: 3, 136: 3, 137: 3, 138: 3, 139: 3, 140: 3, 141: 3, 143: 3, 144: 3, 145: 3, 146: 3, 148: 3, 2207: 66, 2208: 66, 2209: 66, 2210: 66, 2211: 66, 2212: 66, 2213: 66, 2214: 66, 2215: 66, 2216: 66, 2217: 66, 2218: 66, 2219: 66, 2220: 66, 2222: 66, 2223: 66, 190: 5, 191: 4, 192: 4, 193: 4, 194: 4, 195: 4, 196: 4, 197: 4, 198: 4, 199: 4, 200: 4, 201: 4, 202: 4, 203: 4, 204: 4, 206: 4, 207: 4, 208: 5, 209: 5, 211: 5, 379: 8, 2284: 67, 253: 6, 254: 6, 255: 6, 256: 6, 257: 6, 258: 6, 259: 6, 260: 6, 261: 6, 262: 6, 263: 6, 264: 6, 265: 6, 266: 6, 267: 6, 269: 6, 270: 6, 271: 6, 272: 6, 274: 6, 2332: 71, 2350: 71, 2351: 71, 2353: 71, 2354: 74, 2355: 75, 2356: 76, 2357: 77, 2358: 78, 2359: 79, 2361: 68, 316: 7, 317: 7, 318: 7, 319: 7, 320: 7, 321: 7, 322: 7, 323: 7, 324: 7, 325: 7, 326: 7, 327: 7, 328: 7, 2377: 71, 330: 7, 2380: 71, 2381: 71, 2382: 71, 2383: 71, 2384: 71, 2385: 71, 2386: 71, 2387: 71, 2388: 71, 2389: 71, 2390: 71, 2391: 71, 2392: 71, 2788: 85, 2395: 70, 2448: 69, 2413: 69, 2414: 69, 2415: 70, 2416: 69, 745: 16, 1087: 38, 2433: 69, 2440: 69, 2441: 69, 2443: 69, 2444: 69, 2445: 69, 2446: 69, 2447: 69, 400: 9, 2449: 69, 2450: 69, 2451: 69, 2452: 69, 2453: 69, 2454: 69, 2455: 69, 2458: 73, 2476: 73, 2477: 73, 2479: 73, 2480: 73, 2481: 73, 2482: 73, 2483: 73, 2484: 73, 2485: 73, 2486: 72, 2487: 73, 2488: 73, 442: 11, 2035: 63, 2496: 73, 758: 18, 2503: 73, 2504: 73, 457: 10, 2506: 73, 2507: 73, 2508: 73, 2509: 73, 2510: 73, 2511: 73, 2512: 73, 2513: 73, 2514: 73, 2515: 73, 2516: 73, 2517: 73, 2518: 73, 1785: 55, 81: 2, 82: 2, 2549: 80, 505: 12, 520: 12, 2584: 81, 2602: 81, 2603: 81, 2605: 81, 2606: 81, 2607: 81, 2608: 81, 2609: 81, 2610: 81, 2611: 81, 2613: 81, 2614: 82, 568: 13, 569: 17, 570: 17, 571: 17, 572: 17, 573: 17, 2622: 81, 575: 17, 576: 17, 577: 17, 578: 17, 579: 17, 580: 17, 2629: 81, 2630: 81, 583: 13, 2632: 81, 2633: 81, 2634: 81, 3511: 111, 2636: 81, 2637: 81, 2638: 81, 2639: 81, 2640: 81, 2641: 81, 2642: 81, 2643: 81, 2644: 81, 597: 17, 2647: 83, 2665: 83, 2666: 83, 2668: 83, 2669: 83, 2670: 83, 2671: 83, 2672: 83, 2673: 83, 2674: 83, 2676: 83, 2677: 83, 631: 15, 632: 14, 633: 14, 634: 14, 635: 14, 636: 14, 637: 14, 638: 14, 639: 14, 640: 14, 641: 14, 642: 14, 643: 14, 644: 14, 2693: 83, 2695: 83, 2696: 83, 649: 15, 2698: 83, 2699: 83, 2700: 83, 653: 15, 2702: 83, 2703: 83, 656: 15, 657: 15, 2706: 83, 2707: 83, 660: 15, 661: 15, 669: 15, 676: 15, 677: 15, 679: 15, 680: 15, 681: 15, 682: 15, 683: 15, 684: 15, 685: 15, 686: 15, 687: 15, 688: 15, 689: 15, 690: 15, 691: 15, 694: 16, 695: 16, 696: 16, 697: 16, 698: 16, 699: 16, 700: 16, 701: 16, 702: 16, 703: 16, 704: 16, 705: 16, 706: 16, 707: 16, 708: 16, 710: 16, 711: 16, 712: 16, 713: 16, 715: 16, 716: 16, 717: 16, 718: 16, 719: 16, 720: 16, 721: 16, 723: 16, 724: 16, 2773: 86, 732: 16, 739: 16, 740: 16, 742: 16, 743: 16, 744: 16, 2793: 86, 746: 16, 747: 16, 748: 16, 749: 16, 750: 16, 751: 16, 752: 16, 753: 16, 754: 16, 2806: 86, 759: 18, 760: 18, 761: 18, 762: 18, 763: 18, 764: 18, 765: 18, 766: 18, 767: 18, 768: 18, 769: 18, 770: 18, 771: 18, 773: 18, 774: 18, 2836: 87, 2851: 87, 2856: 87, 820: 20, 2869: 87, 838: 19, 839: 19, 841: 19, 2917: 88, 2918: 88, 2920: 88, 884: 21, 885: 21, 886: 21, 887: 21, 888: 21, 889: 21, 890: 21, 891: 21, 892: 21, 893: 21, 894: 21, 895: 21, 896: 21, 2945: 88, 2947: 88, 2948: 88, 2949: 88, 2950: 88, 2951: 88, 2952: 88, 2953: 88, 2954: 88, 2955: 88, 2956: 88, 2957: 88, 2958: 88, 2959: 88, 2977: 89, 947: 22, 948: 23, 949: 24, 950: 25, 951: 26, 952: 27, 953: 28, 954: 29, 955: 30, 956: 31, 957: 32, 958: 33, 959: 34, 960: 35, 962: 36, 963: 36, 3043: 90, 3044: 90, 3046: 90, 3580: 123, 3063: 90, 3070: 90, 3071: 90, 3073: 90, 3074: 90, 3075: 90, 3076: 90, 3077: 90, 1030: 37, 3079: 90, 3080: 90, 3081: 90, 3082: 90, 3083: 90, 3084: 90, 3085: 90, 3088: 97, 3103: 97, 3108: 97, 3109: 97, 581: 17, 3119: 91, 3120: 97, 3121: 97, 3122: 97, 3123: 97, 3124: 97, 3125: 97, 3126: 97, 3127: 97, 3128: 97, 3129: 97, 3130: 97, 3131: 97, 3132: 97, 3133: 97, 3134: 97, 3135: 97, 3151: 93, 3166: 93, 3171: 93, 3172: 92, 3183: 93, 3184: 93, 3185: 92, 3186: 92, 3187: 92, 3188: 92, 3189: 92, 3190: 92, 3191: 92, 3192: 92, 3193: 92, 3194: 92, 3195: 92, 3196: 92, 3197: 92, 3198: 92, 1151: 39, 1152: 40, 584: 17, 3214: 94, 3229: 94, 3234: 94, 3235: 94, 3246: 94, 3247: 94, 3248: 94, 3249: 94, 3250: 94, 3251: 94, 3252: 94, 3253: 94, 3254: 94, 3255: 94, 3256: 94, 3257: 94, 3258: 94, 3259: 94, 3260: 94, 3261: 94, 1216: 42, 1217: 42, 1219: 41, 3277: 96, 2937: 88, 3292: 96, 3297: 96, 3309: 95, 1262: 44, 1263: 44, 1264: 44, 1265: 44, 1266: 44, 1267: 44, 1268: 44, 1269: 44, 1270: 44, 1271: 44, 1272: 44, 1273: 44, 1274: 44, 1275: 44, 1276: 44, 1277: 44, 1278: 44, 1280: 43, 2944: 88, 897: 21, 1290: 44, 899: 21, 900: 21, 3385: 98, 3358: 98, 3359: 98, 3361: 98, 1324: 45, 1325: 45, 1326: 45, 1327: 45, 1328: 45, 1329: 45, 1330: 45, 1331: 45, 1332: 45, 1333: 45, 1334: 45, 1335: 45, 1336: 45, 1337: 45, 3386: 98, 1339: 45, 1340: 45, 3389: 98, 3390: 98, 1343: 45, 3392: 98, 3393: 98, 3394: 98, 3395: 98, 3396: 98, 3397: 98, 3398: 98, 3399: 98, 3400: 98, 1353: 45, 1591: 50, 3435: 99, 574: 17, 1405: 46, 1406: 46, 1261: 44, 3310: 96, 3487: 113, 582: 17, 3500: 100, 3501: 101, 3502: 102, 3503: 103, 3504: 104, 3505: 105, 3506: 106, 3507: 107, 3508: 108, 3509: 109, 3510: 110, 585: 17, 3512: 112, 3513: 114, 1468: 47, 1469: 48, 2635: 81, 3547: 115, 3548: 115, 3550: 119, 3567: 118, 3574: 120, 3575: 121, 3577: 116, 3578: 117, 3579: 122, 1532: 49, 3581: 115, 3582: 115, 3583: 115, 3584: 115, 3585: 115, 3586: 115, 3587: 115, 3588: 115, 3589: 115, 1281: 44, 3592: 125, 3607: 125, 3611: 124, 3612: 125, 3613: 125, 3623: 125, 3624: 125, 3625: 125, 3626: 125, 3627: 125, 3628: 125, 3629: 125, 3630: 125, 3631: 125, 3632: 125, 3633: 125, 3634: 125, 3635: 125, 3636: 125, 3637: 125, 3638: 125, 3639: 125, 3640: 124, 3641: 124, 1596: 51, 3655: 126, 3736: 127, 1975: 61, 3670: 126, 3674: 126, 3675: 126, 3676: 126, 3686: 126, 3687: 126, 3688: 126, 3689: 126, 3690: 126, 3691: 126, 3692: 126, 3693: 126, 3694: 126, 3695: 126, 3696: 126, 3697: 126, 3698: 126, 3699: 126, 3700: 126, 3701: 126, 1654: 52, 3703: 126, 3704: 126, 1659: 52, 397: 9, 3737: 127, 1703: 53, 1704: 53, 1705: 53, 1706: 53, 1707: 53, 1708: 53, 1709: 53, 1710: 53, 1711: 53, 1712: 53, 1713: 53, 1714: 53, 1715: 53, 1716: 53, 1718: 53, 1719: 53, 1720: 57, 1722: 58, 3771: 127, 3772: 127, 3773: 127, 3774: 127, 3775: 127, 3776: 127, 3777: 127, 3778: 127, 3702: 126, 3799: 128, 3800: 128, 3801: 129, 3802: 128, 3819: 128, 2685: 83, 3826: 128, 3827: 128, 1780: 54, 3829: 128, 3830: 128, 3831: 128, 3832: 128, 3833: 128, 3834: 128, 3835: 128, 3836: 128, 3837: 128, 3838: 128, 3839: 128, 3840: 128, 3841: 128, 128: 3, 3863: 130, 2692: 83, 645: 14, 647: 14, 3378: 98, 648: 14, 1843: 56, 3892: 131, 3893: 132, 2697: 83, 1848: 56, 650: 15, 652: 15, 2701: 83, 3922: 133, 654: 15, 3927: 134, 655: 15, 1338: 45, 2704: 83, 2705: 83, 3388: 98, 4071: 136, 658: 15, 1341: 45, 1907: 59, 1908: 59, 1909: 60, 1910: 60, 1912: 60, 3391: 98, 1344: 45, 2370: 71, 3985: 135, 3990: 135, 1970: 61, 1971: 61, 1972: 61, 1973: 61, 329: 7, 2036: 63, 2378: 71, 4086: 136, 332: 7, 398: 9, 333: 7, 4051: 136, 4052: 136, 334: 7, 4054: 136, 335: 7, 337: 7, 4078: 136, 4079: 136, 4081: 136, 4082: 136, 4083: 136, 4084: 136, 4085: 136, 2038: 62, 4087: 136, 4088: 136, 4089: 136, 4090: 136, 4091: 136, 4092: 136, 4093: 136}
+
+_init()
@@ -0,0 +1,269 @@
+"""
+An optimization pass that simplifies the expressions in a C syntax tree
+
+`optimize` folds constant expressions and applies algebraic identities such as
+`x * 1 == x` before code generation, so that `tacgen.TACGenerator` doesn't
+allocate a temporary and an instruction for every operation on a constant.
+Constants are processor words: arithmetic wraps around at
+`Processor.WORD_BITS` bits, like it does when the code runs.
+
+The tree isn't modified. The nodes that change are copied along with their
+ancestors, so that the subtrees kept in a `parser.Memo` stay as they were
+parsed. Code generation reports the same errors for the optimized tree as for
+the original one: operands that must be lvalues are never replaced, and an
+operand is only discarded if it has no side effects and can't hold an error.
+"""
+
+import syntree
+from vm.bytecode import Processor
+
+WORD_MASK = Processor.WORD_MASK
+SIGN_BIT = 2**(Processor.WORD_BITS - 1)
+
+# The types of the constants that are folded
+INT_TYPES = (syntree.IntType, syntree.UIntType, syntree.LongType,
+  syntree.ULongType)
+UNSIGNED_TYPES = (syntree.UIntType, syntree.ULongType)
+
+# The fields of expressions whose operands are generated as lvalues
+LVALUE_FIELDS = {
+  syntree.AssignExpr: "lexpr",
+  syntree.AddrOfExpr: "expr",
+  syntree.PreIncExpr: "expr",
+  syntree.PreDecExpr: "expr",
+  syntree.PostIncExpr: "expr",
+  syntree.PostDecExpr: "expr",
+  syntree.CallExpr: "expr",
+}
+
+# The operations on two words that are folded
+BINARY_FOLDS = {
+  syntree.AddExpr: lambda a, b: a + b,
+  syntree.SubExpr: lambda a, b: a - b,
+  syntree.MulExpr: lambda a, b: a * b,
+  syntree.AndExpr: lambda a, b: a & b,
+  syntree.OrExpr: lambda a, b: a | b,
+  syntree.XorExpr: lambda a, b: a ^ b,
+  syntree.EqualExpr: lambda a, b: int(a == b),
+  syntree.NotEqualExpr: lambda a, b: int(a != b),
+  syntree.LogicAndExpr: lambda a, b: int(bool(a and b)),
+  syntree.LogicOrExpr: lambda a, b: int(bool(a or b)),
+}
+
+# The operations that are only folded when both words are non-negative as
+# signed words, where the processor's unsigned division and flag-based
+# comparisons agree with C's signed ones
+SIGNED_FOLDS = {
+  syntree.DivExpr: lambda a, b: a // b if b else None,
+  syntree.LessThanExpr: lambda a, b: int(a < b),
+  syntree.GreaterThanExpr: lambda a, b: int(a > b),
+  syntree.LessThanEqualExpr: lambda a, b: int(a <= b),
+  syntree.GreaterThanEqualExpr: lambda a, b: int(a >= b),
+}
+
+# The operations whose results are truth values rather than words of the type
+# of their operands
+TRUTH_EXPRS = (syntree.EqualExpr, syntree.NotEqualExpr, syntree.LogicAndExpr,
+  syntree.LogicOrExpr, syntree.LessThanExpr, syntree.GreaterThanExpr,
+  syntree.LessThanEqualExpr, syntree.GreaterThanEqualExpr,
+  syntree.LogicNotExpr)
+
+# The operations on one word that are folded
+UNARY_FOLDS = {
+  syntree.NegExpr: lambda a: -a,
+  syntree.NotExpr: lambda a: ~a,
+  syntree.LogicNotExpr: lambda a: int(not a),
+}
+
+# The expressions that have no side effects and can't fail to generate, if
+# their operands can't either. Division is left out, since it can fail when
+# the code runs.
+PURE_EXPRS = (syntree.ConstExpr, syntree.VarExpr, syntree.CommaExpr,
+  syntree.CondExpr, syntree.PlusExpr, syntree.NegExpr, syntree.NotExpr,
+  syntree.LogicNotExpr) + tuple(BINARY_FOLDS) + tuple(cls for cls in
+  SIGNED_FOLDS if cls is not syntree.DivExpr)
+
+# The expressions whose code stores a value in a variable
+WRITE_EXPRS = (syntree.AssignExpr, syntree.PreIncExpr, syntree.PreDecExpr,
+  syntree.PostIncExpr, syntree.PostDecExpr, syntree.CallExpr)
+
+# The expressions whose code returns a new temporary rather than a variable
+# that an assignment could change before the value is used
+FRESH_EXPRS = (syntree.ConstExpr, syntree.BinaryExpr, syntree.CondExpr,
+  syntree.NegExpr, syntree.NotExpr, syntree.LogicNotExpr, syntree.DerefExpr,
+  syntree.PreIncExpr, syntree.PreDecExpr, syntree.CallExpr)
+
+def _copy(node, **fields):
+  """Return a copy of a syntax tree node with some of its fields replaced."""
+  copy = object.__new__(type(node))
+  for name in syntree.fieldNames(type(node)):
+    if name in fields:
+      setattr(copy, name, fields[name])
+    elif hasattr(node, name):
+      setattr(copy, name, getattr(node, name))
+  return copy
+
+def _word(expr):
+  """Return the value of an integer constant expression as a word, or None if
+  the expression isn't one."""
+  if (isinstance(expr, syntree.ConstExpr) and
+    isinstance(expr.type, INT_TYPES) and isinstance(expr.val, (int, long))):
+    return expr.val & WORD_MASK
+  return None
+
+def _isPure(expr):
+  """Return whether an expression can be discarded without changing the code
+  or the errors that are generated for a program. Variables must have been
+  bound by c.resolver, so that undeclared names are reported."""
+  for node in syntree.walk(expr):
+    if not isinstance(node, PURE_EXPRS):
+      return False
+    if isinstance(node, syntree.VarExpr) and node.binding is None:
+      return False
+  return True
+
+def _hasWrites(expr):
+  """Return whether a full expression stores to any variable before its value
+  is complete. An assignment at the top only stores once its value is known."""
+  nodes = syntree.walk(expr)
+  if isinstance(expr, syntree.AssignExpr):
+    next(nodes)
+  return any(isinstance(node, WRITE_EXPRS) for node in nodes)
+
+class Optimizer(syntree.NodeVisitor):
+  """A visitor that simplifies the expressions in a syntax tree
+
+  visitXXX functions accept a syntax tree node and return the node that
+  replaces it, which is the node itself if nothing in it changed. They are
+  generators that are run by `syntree.runVisit`.
+  """
+
+  def __init__(self):
+    # Whether the current full expression stores to a variable, so that a
+    # subexpression that was computed into a temporary can't be replaced by a
+    # variable
+    self.writes = False
+
+  def _replace(self, node, expr):
+    """Return the expression that replaces a node, or the node itself if the
+    replacement could read a different value."""
+    if self.writes and not isinstance(expr, FRESH_EXPRS):
+      return node
+    return expr
+
+  def genericVisit(self, node):
+    """Simplify the children of a node."""
+    lvalueField = LVALUE_FIELDS.get(type(node))
+    fields = {}
+    for name in syntree.fieldNames(type(node)):
+      value = getattr(node, name, None)
+      if isinstance(value, list):
+        items = []
+        for item in value:
+          if syntree.isNode(item):
+            item = yield self.visitChild(item)
+          items.append(item)
+        if any(new is not old for new, old in zip(items, value)):
+          fields[name] = items
+      elif syntree.isNode(value):
+        if (isinstance(value, syntree.Expr) and
+          not isinstance(node, syntree.Expr)):
+          self.writes = _hasWrites(value)
+        # Only the operands of an lvalue are simplified, since replacing it
+        # could turn an invalid lvalue into a valid one.
+        if name == lvalueField:
+          new = yield self.genericVisit(value)
+        else:
+          new = yield self.visitChild(value)
+        if new is not value:
+          fields[name] = new
+    raise syntree.Return(_copy(node, **fields) if fields else node)
+
+  def _const(self, node, val, *operands):
+    """Return a constant expression for the folded value of an expression on
+    some constant operands."""
+    if isinstance(node, TRUTH_EXPRS):
+      type_ = syntree.IntType()
+    elif any(isinstance(operand.type, UNSIGNED_TYPES) for operand in operands):
+      type_ = syntree.UIntType()
+    else:
+      type_ = syntree.IntType()
+    return syntree.ConstExpr(node.pos, type_, val & WORD_MASK)
+
+  def visitUnaryExpr(self, node):
+    """Fold a unary expression on a constant"""
+    node = yield self.genericVisit(node)
+
+    # Unary plus doesn't generate any code of its own
+    if isinstance(node, syntree.PlusExpr):
+      raise syntree.Return(node.expr)
+
+    fold = UNARY_FOLDS.get(type(node))
+    a = _word(node.expr)
+    if fold is None or a is None:
+      raise syntree.Return(node)
+    raise syntree.Return(self._const(node, fold(a), node.expr))
+
+  def visitBinaryExpr(self, node):
+    """Fold a binary expression on constants, or simplify it if one of its
+    operands is an identity"""
+    node = yield self.genericVisit(node)
+    lexpr, rexpr = node.lexpr, node.rexpr
+    a, b = _word(lexpr), _word(rexpr)
+    cls = type(node)
+
+    if a is not None and b is not None:
+      val = None
+      if cls in BINARY_FOLDS:
+        val = BINARY_FOLDS[cls](a, b)
+      elif cls in SIGNED_FOLDS and a < SIGN_BIT and b < SIGN_BIT:
+        val = SIGNED_FOLDS[cls](a, b)
+      if val is not None:
+        raise syntree.Return(self._const(node, val, lexpr, rexpr))
+
+    # Short-circuiting operations whose result is known from the left operand
+    if (cls is syntree.LogicAndExpr and a == 0 or
+      cls is syntree.LogicOrExpr and a) and _isPure(rexpr):
+      raise syntree.Return(self._const(node, int(bool(a))))
+
+    # Identities
+    if cls is syntree.AddExpr:
+      if b == 0:
+        raise syntree.Return(self._replace(node, lexpr))
+      elif a == 0:
+        raise syntree.Return(self._replace(node, rexpr))
+    elif cls is syntree.SubExpr and b == 0:
+      raise syntree.Return(self._replace(node, lexpr))
+    elif cls is syntree.MulExpr:
+      if b == 0 and _isPure(lexpr) or a == 0 and _isPure(rexpr):
+        raise syntree.Return(self._const(node, 0, rexpr if b == 0 else lexpr))
+      elif b == 1:
+        raise syntree.Return(self._replace(node, lexpr))
+      elif a == 1:
+        raise syntree.Return(self._replace(node, rexpr))
+      # An addition is cheaper than a multiplication
+      elif b == 2 and isinstance(lexpr, syntree.VarExpr):
+        raise syntree.Return(syntree.AddExpr(lexpr, _copy(lexpr)))
+      elif a == 2 and isinstance(rexpr, syntree.VarExpr):
+        raise syntree.Return(syntree.AddExpr(rexpr, _copy(rexpr)))
+    elif cls is syntree.DivExpr and b == 1:
+      raise syntree.Return(self._replace(node, lexpr))
+
+    raise syntree.Return(node)
+
+  def visitCondExpr(self, node):
+    """Replace a conditional expression whose condition is constant with the
+    part that it selects"""
+    node = yield self.genericVisit(node)
+    a = _word(node.expr)
+    if a is None:
+      raise syntree.Return(node)
+
+    expr, other = (node.texpr, node.fexpr) if a else (node.fexpr, node.texpr)
+    if not _isPure(other):
+      raise syntree.Return(node)
+    raise syntree.Return(self._replace(node, expr))
+
+def optimize(tu):
+  """Return a translation unit with its expressions simplified."""
+  return Optimizer().visit(tu)
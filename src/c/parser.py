@@ -2,24 +2,20 @@
 A parser for a subset of ANSI C
 
 The current combinatorial implementation is inefficient, but is easy to
-maintain.
+maintain. c.llparser generates a faster table-driven parser for the same
+grammar, which falls back to this one for programs that it rejects.
 """
 
+import heapq
 import itertools
+import os
 import sys
+import time
 
 from error import CompileError
 import scanner
 import syntree
-
-def setMinimumRecursionLimit(minLimit):
-  """Set the interpreter's recursion limit to be at least the given value."""
-  if sys.getrecursionlimit() < minLimit:
-    sys.setrecursionlimit(minLimit)
-
-# This module relies heavily on recursion, so ensure that the stack is larger
-# than the default.
-setMinimumRecursionLimit(50000)
+import tokenstream
 
 def partition(pred, iterable):
   """Return a pair of lists of elements that do and do not satisfy the
@@ -35,17 +31,26 @@ def partition(pred, iterable):
 # appear in comments to clarify the relationship between this code and a
 # pure functional implementation.
 
-# type Parser a = forall b. [Token]
-#   -> (a -> [Token] -> ParseError -> b) -- consumed ok
-#   -> (ParseError -> b)                 -- consumed err
-#   -> (a -> [Token] -> ParseError -> b) -- empty ok
-#   -> (ParseError -> b)                 -- empty err
-#   -> b
-
-# A Parser inspects the current state (list of tokens) and calls the
-# continuation corresponding to the outcome of the parse. Parsers are
-# additive monads, allowing them to be composed to produce more complicated
-# parsers.
+# type Parser a = forall b. [Token] -> Int
+#   -> (a -> Int -> ParseError -> Bounce b) -- consumed ok
+#   -> (ParseError -> Bounce b)             -- consumed err
+#   -> (a -> Int -> ParseError -> Bounce b) -- empty ok
+#   -> (ParseError -> Bounce b)             -- empty err
+#   -> Bounce b
+
+# A Parser inspects the current state (the index of the next token in the
+# input tokens) and calls the continuation corresponding to the outcome of the
+# parse. The tokens themselves are shared by the whole parse and never copied.
+# Parsers are additive monads, allowing them to be composed to produce more
+# complicated parsers.
+
+# Parsers and continuations never call continuations themselves. Instead, they
+# return a bounce, which is a (continuation, arguments) pair, and `runParser`
+# calls the continuation in a loop. This keeps the Python stack from growing
+# with the length of the input, since each continuation would otherwise be
+# called inside the one before it. Parsers still call other parsers directly,
+# but a parser can only be reached again through a continuation after it
+# has consumed a token.
 
 class ParseErrorMessage(tuple):
   """The base class of all parse error messages"""
@@ -94,130 +99,293 @@ class ParseError(CompileError):
   msg = property(__getMsg)
   """A single, combined error message for this error"""
 
+# While parsing, errors are (token index, messages) pairs, and are only turned
+# into `ParseError`s if the parse fails. The index is None for errors past the
+# end of the input. The messages are None if there are none, or a tree of
+# UNEXPECTED_TOKEN, which is unexpected the token at the error's index, sets of
+# `ParseErrorMessage`s, (UNION, messages, messages) and
+# (EXPECT, messages, what), which are the unexpected messages in the given
+# messages and expecting `what`. This avoids creating tokens, message strings
+# and sets on the path of a successful parse.
+UNEXPECTED_TOKEN = "unexpected token"
+UNION = "union"
+EXPECT = "expect"
+
+# An unknown error that is overridden by any other error
+NO_ERROR = (None, None)
+
 def setExpect(e, what):
   """Set the expecting message of an error, removing existing expecting
   messages."""
-  msgs = set(filter(lambda x: isinstance(x, Unexpected), e.msgs))
-  msgs.add(Expecting(what))
-  return ParseError(e.pos, msgs)
+  return (e[0], (EXPECT, e[1], what))
 
-def unknownError(ts):
+def unknownError(ts, i):
   """Return an unknown error at the current position."""
-  if ts:
-    return ParseError(ts[0].pos, [])
+  if ts.has(i):
+    return (i, None)
   else:
     # This only seems to occur on parses that get to the end of input and
     # never reaches the user. If an error occurrs then it is always overridden
     # by the new error message. If the parse succeeds then the error isn't
     # returned.
-    return ParseError(None, [])
+    return NO_ERROR
 
-def unexpectError(ts, what):
-  """Return an unexpected error at the current position."""
-  return ParseError(ts[0].pos, [Unexpected(what)])
+def unexpectError(ts, i):
+  """Return an error at the current position that is unexpected the current
+  token."""
+  return (i, UNEXPECTED_TOKEN)
 
 def mergeError(e1, e2):
   """Combine two errors, preserving errors from the longest parse."""
-  if e1.pos is None:
+  i1, msgs1 = e1
+  i2, msgs2 = e2
+  if i1 is None:
     return e2
-  elif e2.pos is None:
+  elif i2 is None:
     return e1
-  elif e1.pos.line > e2.pos.line:
+  elif i1 > i2:
     return e1
-  elif e2.pos.line > e1.pos.line:
+  elif i2 > i1:
+    return e2
+  elif msgs1 is None:
     return e2
+  elif msgs2 is None:
+    return e1
   else:
-    if e1.pos.col > e2.pos.col:
-      return e1
-    elif e2.pos.col > e1.pos.col:
-      return e2
+    return (i1, (UNION, msgs1, msgs2))
+
+def parseError(ts, e):
+  """Return the `ParseError` for an error from a parse of the given tokens."""
+  i, msgs = e
+  result = set()
+  # Evaluate the tree of messages with a stack of (messages, whether only
+  # unexpected messages are kept).
+  stack = [(msgs, False)]
+  while stack:
+    msgs, unexpectedOnly = stack.pop()
+    if msgs is None:
+      pass
+    elif msgs is UNEXPECTED_TOKEN:
+      result.add(Unexpected(str(ts[i])))
+    elif isinstance(msgs, tuple) and msgs[0] is UNION:
+      stack.append((msgs[1], unexpectedOnly))
+      stack.append((msgs[2], unexpectedOnly))
+    elif isinstance(msgs, tuple) and msgs[0] is EXPECT:
+      stack.append((msgs[1], True))
+      if not unexpectedOnly:
+        result.add(Expecting(msgs[2]))
     else:
-      return ParseError(e1.pos, e1.msgs.union(e2.msgs))
+      result.update(msg for msg in msgs
+        if not unexpectedOnly or isinstance(msg, Unexpected))
+
+  return ParseError(None if i is None else ts[i].pos, result)
 
-def runParser(p, ts):
+def runParser(p, ts, memo=None):
   """Run a parser on a sequence of input tokens, returning the parsed value or
-  raising a `ParseError` if the parse fails."""
-  def ok(x, ts, e):
-    return x
+  raising a `ParseError` if the parse fails. If a `Memo` is given, the outcomes
+  of `memo` parsers are stored in it during the parse."""
+  global _memo
+
+  def ok(x, i, e):
+    return None, x
 
   def err(e):
-    raise e
+    raise parseError(ts, e)
+
+  oldMemo = _memo
+  _memo = memo
+  if memo is not None:
+    memo.reset(ts.available())
+  try:
+    k, args = p(ts, 0, ok, err, ok, err)
+    while k is not None:
+      k, args = k(*args)
+    return args
+  finally:
+    _memo = oldMemo
+    if memo is not None:
+      memo.reset(0)
+
+# The FIRST set of a parser is the set of keys of the tokens it can start with,
+# which are token kinds or, for keywords, (kind, keyword) pairs. A parser with
+# a FIRST set fails without consuming any input on any other token, with an
+# error that is unexpected that token and expecting the parser's `expects`
+# messages. Parsers whose FIRST set is unknown don't have one.
+
+def firstSet(p):
+  """Return the FIRST set of a parser, or None if it is unknown."""
+  return getattr(p, "first", None)
+
+def withFirst(f, first, expects=frozenset()):
+  """Set the FIRST set and expecting messages of a parser, if the FIRST set is
+  known, and return the parser."""
+  if first is not None:
+    f.first = frozenset(first)
+    f.expects = frozenset(expects)
+  return f
 
-  return p(ts, ok, err, ok, err)
+def sameFirst(f, p):
+  """Give a parser the FIRST set and expecting messages of the parser `p`, and
+  return it."""
+  return withFirst(f, firstSet(p), getattr(p, "expects", ()))
+
+def tokenKey(ts, i):
+  """Return the key of the token at the given index in FIRST sets."""
+  kind = ts.kind(i)
+  if kind == scanner.KeywordToken.kind:
+    return (kind, ts.value(i))
+  return kind
 
 def mreturn(x):
   """Return a value in the parser monad."""
   # return :: a -> Parser a
-  return lambda ts, _0, _1, eok, _2: eok(x, ts, unknownError(ts))
+  return lambda ts, i, _0, _1, eok, _2: (eok, (x, i, unknownError(ts, i)))
 
 def mbind(p, f):
   """Sequentially compose two parsers."""
   # bind :: Parser a -> (a -> Parser b) -> Parser b
-  def g(ts, cok, cerr, eok, eerr):
-    def mcok(x, ts, e):
-      neok = lambda x, ts, e_: cok(x, ts, mergeError(e, e_))
-      neerr = lambda e_: cerr(mergeError(e, e_))
-      return f(x)(ts, cok, cerr, neok, neerr)
+  def g(ts, i, cok, cerr, eok, eerr):
+    def mcok(x, i, e):
+      neok = lambda x, i, e_: (cok, (x, i, mergeError(e, e_)))
+      neerr = lambda e_: (cerr, (mergeError(e, e_),))
+      return f(x)(ts, i, cok, cerr, neok, neerr)
 
-    def meok(x, ts, e):
-      neok = lambda x, ts, e_: eok(x, ts, mergeError(e, e_))
-      neerr = lambda e_: cerr(mergeError(e, e_))
-      return f(x)(ts, cok, cerr, neok, neerr)
+    def meok(x, i, e):
+      neok = lambda x, i, e_: (eok, (x, i, mergeError(e, e_)))
+      neerr = lambda e_: (cerr, (mergeError(e, e_),))
+      return f(x)(ts, i, cok, cerr, neok, neerr)
 
-    return p(ts, mcok, cerr, meok, eerr)
+    return p(ts, i, mcok, cerr, meok, eerr)
 
-  return g
+  return sameFirst(g, p)
 
 def mzero():
   """A parser that always fails without consuming any input (monadic zero)"""
-  return lambda ts, _0, _1, _2, eerr: eerr(unknownError(ts))
+  return lambda ts, i, _0, _1, _2, eerr: (eerr, (unknownError(ts, i),))
 
-def mplus(p, q):
-  """A parser that combines two parsers, succeeding if either parser succeeds
-  (monadic plus)"""
-  def f(ts, cok, cerr, eok, eerr):
+def orElse(p, q):
+  """Try `p`, and then `q` if `p` fails without consuming any input."""
+  def f(ts, i, cok, cerr, eok, eerr):
     def meerr(e):
-      neok = lambda x, ts, e_: eok(x, ts, mergeError(e, e_))
-      neerr = lambda e_: eerr(mergeError(e, e_))
-      return q(ts, cok, cerr, neok, neerr)
+      neok = lambda x, i, e_: (eok, (x, i, mergeError(e, e_)))
+      neerr = lambda e_: (eerr, (mergeError(e, e_),))
+      return q(ts, i, cok, cerr, neok, neerr)
 
-    return p(ts, cok, cerr, eok, meerr)
+    return p(ts, i, cok, cerr, eok, meerr)
 
   return f
 
+def mplus(p, q):
+  """A parser that combines two parsers, succeeding if either parser succeeds
+  (monadic plus)
+
+  Chains of `mplus` are flattened into a list of alternatives, and only the
+  alternatives whose FIRST sets can contain the next token are tried. The
+  errors of the skipped alternatives are known from their FIRST sets, so they
+  are merged in as if they had been tried."""
+  alts = getattr(p, "alts", [p]) + getattr(q, "alts", [q])
+  firsts = map(firstSet, alts)
+  if all(first is None for first in firsts):
+    f = orElse(p, q)
+    f.alts = alts
+    return f
+
+  # The alternatives to try and the error messages of the skipped alternatives
+  # for each token key, computed when the key is first seen
+  dispatch = {}
+
+  def compileKey(key):
+    tried = []
+    expects = set()
+    skipped = False
+    for alt, first in zip(alts, firsts):
+      if (first is None or key in first
+          or (isinstance(key, tuple) and key[0] in first)):
+        tried.append(alt)
+      else:
+        expects.update(alt.expects)
+        skipped = True
+    p = reduce(orElse, tried) if tried else None
+    if skipped:
+      msgs = (UNION, UNEXPECTED_TOKEN,
+        frozenset(Expecting(what) for what in expects))
+    else:
+      msgs = None
+    dispatch[key] = p, msgs
+    return dispatch[key]
+
+  def f(ts, i, cok, cerr, eok, eerr):
+    key = tokenKey(ts, i)
+    try:
+      p, msgs = dispatch[key]
+    except KeyError:
+      p, msgs = compileKey(key)
+
+    if msgs is None:
+      return p(ts, i, cok, cerr, eok, eerr)
+
+    e = (i, msgs)
+    if p is None:
+      return eerr, (e,)
+    neok = lambda x, i, e_: (eok, (x, i, mergeError(e, e_)))
+    neerr = lambda e_: (eerr, (mergeError(e, e_),))
+    return p(ts, i, cok, cerr, neok, neerr)
+
+  f.alts = alts
+  if all(first is not None for first in firsts):
+    withFirst(f, set().union(*firsts),
+      set().union(*(alt.expects for alt in alts)))
+  return f
+
 def token(pred):
   """Parse a token that satisfies the predicate."""
-  def f(ts, cok, cerr, eok, eerr):
-    t, ts_ = ts[0], ts[1:]
+  def f(ts, i, cok, cerr, eok, eerr):
+    t = ts[i]
     if pred(t):
-      return cok(t, ts_, unknownError(ts_))
+      return cok, (t, i + 1, unknownError(ts, i + 1))
     else:
-      return eerr(unexpectError(ts, str(t)))
+      return eerr, (unexpectError(ts, i),)
 
   return f
 
+def kindToken(cls, pred=None):
+  """Parse a token of the given type that satisfies the predicate, if any. The
+  input must be a `tokenstream.TokenStream`, so that the token type can be
+  checked by comparing integer kinds without creating the token."""
+  kind = cls.kind
+  def f(ts, i, cok, cerr, eok, eerr):
+    if ts.kind(i) == kind:
+      t = ts[i]
+      if pred is None or pred(t):
+        return cok, (t, i + 1, unknownError(ts, i + 1))
+    return eerr, (unexpectError(ts, i),)
+
+  return withFirst(f, [kind])
+
 def label(p, what):
   """Change the expecting message for a parser."""
-  def f(ts, cok, cerr, eok, eerr):
-    meok = lambda x, ts, e: eok(x, ts,
-      e if e.isUnknown() else setExpect(e, what))
-    meerr = lambda e: eerr(setExpect(e, what))
-    return p(ts, cok, cerr, meok, meerr)
+  def f(ts, i, cok, cerr, eok, eerr):
+    # XXX This keeps errors with messages, rather than unknown errors.
+    meok = lambda x, i, e: (eok, (x, i,
+      e if e[1] is not None else setExpect(e, what)))
+    meerr = lambda e: (eerr, (setExpect(e, what),))
+    return p(ts, i, cok, cerr, meok, meerr)
 
-  return f
+  return withFirst(f, firstSet(p), [what])
 
 def try_(p):
   """Parse with `p`, but without consuming any input if an error occurs."""
-  return lambda ts, cok, _, eok, eerr: p(ts, cok, eerr, eok, eerr)
+  f = lambda ts, i, cok, _, eok, eerr: p(ts, i, cok, eerr, eok, eerr)
+  return sameFirst(f, p)
 
 def lookAhead(p):
   """Parse `p` without consuming any input. This function consumes input if `p`
   fails and consumes input."""
-  def f(ts, cok, cerr, eok, eerr):
-    mcok = lambda x, _, e: eok(x, ts, e)
-    return p(ts, mcok, cerr, eok, eerr)
+  def f(ts, i, cok, cerr, eok, eerr):
+    mcok = lambda x, _, e: (eok, (x, i, e))
+    return p(ts, i, mcok, cerr, eok, eerr)
 
-  return f
+  return sameFirst(f, p)
 
 def manyErr(*_):
   """A parser that accepts an empty sequence was passed to many."""
@@ -225,26 +393,19 @@ def manyErr(*_):
 
 def many(p):
   """Accept zero or more occurrences of sequences accepted by `p`."""
-  def stop():
-    raise StopIteration()
-
-  def f(ts, cok, cerr, eok, eerr):
+  def f(ts, i, cok, cerr, eok, eerr):
     xs = []
-    e = ParseError(None, [])
 
     # Run p until it fails, accumulating the results
-    while True:
-      try:
-        x, ts_, e_ = p(ts, lambda *a: a, cerr, manyErr, lambda _: stop())
-      except StopIteration:
-        break
+    def loop(i, e):
+      def mcok(x, i, e_):
+        xs.append(x)
+        return loop(i, mergeError(e, e_))
 
-      # Combine the results
-      xs.append(x)
-      ts = ts_
-      e = mergeError(e, e_)
+      meerr = lambda _: (cok, (xs, i, e))
+      return p(ts, i, mcok, cerr, manyErr, meerr)
 
-    return cok(xs, ts, e)
+    return loop(i, NO_ERROR)
 
   return f
 
@@ -256,6 +417,226 @@ def option(x, p):
   """Apply `p`, returning `x` if `p` fails without consuming input."""
   return mplus(p, mreturn(x))
 
+class Memo(object):
+  """A packrat memo table, mapping a rule name and token index to the outcome of
+  parsing that rule at that index.
+
+  A parse only stores up to `entriesPerToken` outcomes for each input token.
+  When the table is full, the outcomes at the earliest indices are evicted
+  first, since the parser has usually moved past them. The numbers of hits and
+  misses for each rule are kept across parses.
+  """
+
+  def __init__(self, entriesPerToken=4):
+    self.entriesPerToken = entriesPerToken
+    self.hits = {}
+    self.misses = {}
+    self.reset(0)
+
+  def reset(self, n):
+    """Empty the table for a parse of `n` tokens, or of at least `n` tokens if
+    more outcomes are stored at later indices."""
+    self.limit = self.entriesPerToken * (n + 1)
+    self.table = {}
+    self.indices = []
+    self.size = 0
+
+  def get(self, rule, i):
+    """Return the outcome of the rule at the given index, or None if it is not
+    in the table."""
+    try:
+      outcome = self.table[i][rule]
+    except KeyError:
+      self.misses[rule] = self.misses.get(rule, 0) + 1
+      return None
+    self.hits[rule] = self.hits.get(rule, 0) + 1
+    return outcome
+
+  def put(self, rule, i, outcome):
+    """Store the outcome of the rule at the given index."""
+    outcomes = self.table.get(i)
+    if outcomes is None:
+      outcomes = self.table[i] = {}
+      heapq.heappush(self.indices, i)
+      # A lazy token stream doesn't know its length in advance.
+      self.limit = max(self.limit, self.entriesPerToken * (i + 1))
+    outcomes[rule] = outcome
+    self.size += 1
+
+    while self.size > self.limit:
+      self.size -= len(self.table.pop(heapq.heappop(self.indices)))
+
+  def stats(self):
+    """Return a dictionary mapping each rule name to its (hits, misses,
+    hit rate)."""
+    return dict((rule, (self.hits.get(rule, 0), misses,
+        float(self.hits.get(rule, 0)) / (self.hits.get(rule, 0) + misses)))
+      for rule, misses in self.misses.iteritems())
+
+# The memo table of the current parse, if any
+_memo = None
+
+class RuleProfile(object):
+  """The counters of one profiled grammar rule"""
+
+  def __init__(self, name):
+    self.name = name
+    self.calls = 0
+    self.tokens = 0
+    self.backtracks = 0
+    self.errors = 0
+    self.time = 0.0
+
+  def __repr__(self):
+    return "RuleProfile(%r, calls=%d, tokens=%d, backtracks=%d, errors=%d, " \
+      "time=%f)" % (self.name, self.calls, self.tokens, self.backtracks,
+        self.errors, self.time)
+
+class Profile(object):
+  """Per-rule counters for the parsers wrapped by `profiled`.
+
+  For each rule, a profile counts the invocations, the tokens consumed by the
+  successful ones, the backtracks (failures without consuming input, which let
+  an enclosing `mplus` try another alternative) and the errors (failures after
+  consuming input). The time of an invocation runs until its outcome, so it
+  includes the time of the rules it invokes, and recursive rules are counted
+  once for each level.
+  """
+
+  def __init__(self):
+    self.rules = {}
+
+  def get(self, name):
+    """Return the counters of the named rule, creating them if needed."""
+    stats = self.rules.get(name)
+    if stats is None:
+      stats = self.rules[name] = RuleProfile(name)
+    return stats
+
+  def clear(self):
+    """Reset all counters."""
+    self.rules = {}
+
+  def report(self, limit=20, out=sys.stdout):
+    """Print the counters of the `limit` rules with the most cumulative time."""
+    rules = sorted(self.rules.itervalues(), key=lambda r: r.time,
+      reverse=True)
+    out.write("%-24s %9s %9s %9s %9s %9s\n" % ("rule", "calls", "tokens",
+      "backtrack", "errors", "time (s)"))
+    for r in rules[:limit]:
+      out.write("%-24s %9d %9d %9d %9d %9.4f\n" % (r.name, r.calls, r.tokens,
+        r.backtracks, r.errors, r.time))
+
+def profiled(p, name, profile):
+  """Parse with `p`, counting the invocation and its outcome in the named rule
+  of `profile`."""
+  stats = profile.get(name)
+
+  def f(ts, i, cok, cerr, eok, eerr):
+    stats.calls += 1
+    start = time.time()
+
+    def ok(k):
+      def g(x, j, e):
+        stats.time += time.time() - start
+        stats.tokens += j - i
+        return k, (x, j, e)
+
+      return g
+
+    def mcerr(e):
+      stats.time += time.time() - start
+      stats.errors += 1
+      return cerr, (e,)
+
+    def meerr(e):
+      stats.time += time.time() - start
+      stats.backtracks += 1
+      return eerr, (e,)
+
+    return p(ts, i, ok(cok), mcerr, ok(eok), meerr)
+
+  return sameFirst(f, p)
+
+# Set MUMEI_PROFILE_PARSER in the environment to profile the grammar rules
+# below, then call `profile.report()` after parsing. The rules are only wrapped
+# when profiling is enabled, so it costs nothing otherwise.
+profile = Profile() if os.environ.get("MUMEI_PROFILE_PARSER") else None
+
+def rule(p, name):
+  """Name a grammar rule for profiling, returning `p` itself unless profiling
+  is enabled."""
+  if profile is None:
+    return p
+  return profiled(p, name, profile)
+
+def memo(p, name):
+  """Parse with `p`, storing its outcome at each index under the given rule
+  name if the current parse has a `Memo` table. `p` must not have side effects
+  beyond its outcome, since they will not be repeated."""
+  def store(table, i, index, k):
+    """Return a continuation that stores its arguments as the outcome of the
+    rule at index `i` before passing them on to `k`."""
+    def f(*args):
+      table.put(name, i, (index, args))
+      return k, args
+
+    return f
+
+  def f(ts, i, cok, cerr, eok, eerr):
+    table = _memo
+    if table is None:
+      return p(ts, i, cok, cerr, eok, eerr)
+
+    outcome = table.get(name, i)
+    if outcome is None:
+      return p(ts, i, *[store(table, i, index, k)
+        for index, k in enumerate((cok, cerr, eok, eerr))])
+    index, args = outcome
+    return (cok, cerr, eok, eerr)[index], args
+
+  return rule(sameFirst(f, p), name)
+
+def binaryOps(p, levels):
+  """Parse one or more occurrences of `p` separated by left-associative binary
+  operators. `levels` is a list of dictionaries mapping operator token types
+  to the functions that combine their operands, from the loosest binding level
+  to the tightest.
+
+  The operands are combined by precedence climbing as they are parsed, so
+  long chains of operators are parsed in linear time without recursing."""
+  ops = {}
+  for prec, level in enumerate(levels):
+    for cls, combine in level.iteritems():
+      ops[cls.kind] = (prec, combine)
+
+  def f(ts, i, cok, cerr, eok, eerr):
+    start = i
+    exprs = []
+    pending = []
+
+    def operand(i):
+      meerr = lambda e: (eerr if i == start else cerr, (e,))
+      return p(ts, i, combine, cerr, combine, meerr)
+
+    def combine(x, i, e):
+      # Combine the operands of operators that bind at least as tightly as the
+      # next one, which leaves the pending operators in increasing order of
+      # precedence.
+      op = ops.get(ts.kind(i))
+      while pending and (op is None or pending[-1][0] >= op[0]):
+        x = pending.pop()[1](exprs.pop(), x)
+      if op is None:
+        e = mergeError(e, unexpectError(ts, i))
+        return eok if i == start else cok, (x, i, e)
+      exprs.append(x)
+      pending.append(op)
+      return operand(i + 1)
+
+    return operand(i)
+
+  return sameFirst(f, p)
+
 ### Grammar-specific combinatorial parsers
 ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ###
 
@@ -264,48 +645,48 @@ def option(x, p):
 # grammar that they correspond to.
 
 # Token parsers
-identifierToken = token(lambda t: isinstance(t, scanner.IdentifierToken))
-keywordToken = lambda kw: token(
-  lambda t: isinstance(t, scanner.KeywordToken) and t.val == kw)
-intToken = token(lambda t: isinstance(t, scanner.IntToken))
-longToken = token(lambda t: isinstance(t, scanner.LongToken))
-uintToken = token(lambda t: isinstance(t, scanner.UIntToken))
-ulongToken = token(lambda t: isinstance(t, scanner.ULongToken))
-charToken = token(lambda t: isinstance(t, scanner.CharToken))
-wcharToken = token(lambda t: isinstance(t, scanner.WCharToken))
-floatToken = token(lambda t: isinstance(t, scanner.FloatToken))
-doubleToken = token(lambda t: isinstance(t, scanner.DoubleToken))
-longDoubleToken = token(lambda t: isinstance(t, scanner.LongDoubleToken))
-incrementToken = token(lambda t: isinstance(t, scanner.IncrementToken))
-decrementToken = token(lambda t: isinstance(t, scanner.DecrementToken))
-logicAndToken = token(lambda t: isinstance(t, scanner.LogicAndToken))
-logicOrToken = token(lambda t: isinstance(t, scanner.LogicOrToken))
-lessThanEqualToken = token(lambda t: isinstance(t, scanner.LessThanEqualToken))
-greaterThanEqualToken = token(lambda t: isinstance(t,
-  scanner.GreaterThanEqualToken))
-semicolonToken = token(lambda t: isinstance(t, scanner.SemicolonToken))
-lcurlyToken = token(lambda t: isinstance(t, scanner.LCurlyToken))
-rcurlyToken = token(lambda t: isinstance(t, scanner.RCurlyToken))
-commaToken = token(lambda t: isinstance(t, scanner.CommaToken))
-colonToken = token(lambda t: isinstance(t, scanner.ColonToken))
-assignToken = token(lambda t: isinstance(t, scanner.AssignToken))
-lparenToken = token(lambda t: isinstance(t, scanner.LParenToken))
-rparenToken = token(lambda t: isinstance(t, scanner.RParenToken))
-addToken = token(lambda t: isinstance(t, scanner.AddToken))
-subToken = token(lambda t: isinstance(t, scanner.SubToken))
-starToken = token(lambda t: isinstance(t, scanner.StarToken))
-divToken = token(lambda t: isinstance(t, scanner.DivToken))
-logicNotToken = token(lambda t: isinstance(t, scanner.LogicNotToken))
-notToken = token(lambda t: isinstance(t, scanner.NotToken))
-ampersandToken = token(lambda t: isinstance(t, scanner.AmpersandToken))
-xorToken = token(lambda t: isinstance(t, scanner.XorToken))
-orToken = token(lambda t: isinstance(t, scanner.OrToken))
-equalToken = token(lambda t: isinstance(t, scanner.EqualToken))
-notEqualToken = token(lambda t: isinstance(t, scanner.NotEqualToken))
-lessThanToken = token(lambda t: isinstance(t, scanner.LessThanToken))
-greaterThanToken = token(lambda t: isinstance(t, scanner.GreaterThanToken))
-questionToken = token(lambda t: isinstance(t, scanner.QuestionToken))
-eofToken = token(lambda t: isinstance(t, scanner.EOFToken))
+identifierToken = kindToken(scanner.IdentifierToken)
+keywordToken = lambda kw: withFirst(
+  kindToken(scanner.KeywordToken, lambda t: t.val == kw),
+  [(scanner.KeywordToken.kind, kw)])
+intToken = kindToken(scanner.IntToken)
+longToken = kindToken(scanner.LongToken)
+uintToken = kindToken(scanner.UIntToken)
+ulongToken = kindToken(scanner.ULongToken)
+charToken = kindToken(scanner.CharToken)
+wcharToken = kindToken(scanner.WCharToken)
+floatToken = kindToken(scanner.FloatToken)
+doubleToken = kindToken(scanner.DoubleToken)
+longDoubleToken = kindToken(scanner.LongDoubleToken)
+incrementToken = kindToken(scanner.IncrementToken)
+decrementToken = kindToken(scanner.DecrementToken)
+logicAndToken = kindToken(scanner.LogicAndToken)
+logicOrToken = kindToken(scanner.LogicOrToken)
+lessThanEqualToken = kindToken(scanner.LessThanEqualToken)
+greaterThanEqualToken = kindToken(scanner.GreaterThanEqualToken)
+semicolonToken = kindToken(scanner.SemicolonToken)
+lcurlyToken = kindToken(scanner.LCurlyToken)
+rcurlyToken = kindToken(scanner.RCurlyToken)
+commaToken = kindToken(scanner.CommaToken)
+colonToken = kindToken(scanner.ColonToken)
+assignToken = kindToken(scanner.AssignToken)
+lparenToken = kindToken(scanner.LParenToken)
+rparenToken = kindToken(scanner.RParenToken)
+addToken = kindToken(scanner.AddToken)
+subToken = kindToken(scanner.SubToken)
+starToken = kindToken(scanner.StarToken)
+divToken = kindToken(scanner.DivToken)
+logicNotToken = kindToken(scanner.LogicNotToken)
+notToken = kindToken(scanner.NotToken)
+ampersandToken = kindToken(scanner.AmpersandToken)
+xorToken = kindToken(scanner.XorToken)
+orToken = kindToken(scanner.OrToken)
+equalToken = kindToken(scanner.EqualToken)
+notEqualToken = kindToken(scanner.NotEqualToken)
+lessThanToken = kindToken(scanner.LessThanToken)
+greaterThanToken = kindToken(scanner.GreaterThanToken)
+questionToken = kindToken(scanner.QuestionToken)
+eofToken = kindToken(scanner.EOFToken)
 
 # primary-expression:
 #   identifier
@@ -342,15 +723,15 @@ charExpr = (
 wcharExpr = (
   mbind(wcharToken, lambda const:
   mreturn(syntree.ConstExpr(const.pos, syntree.WCharType(), const.val))))
-constExpr = mplus(mplus(mplus(mplus(mplus(mplus(mplus(mplus(intExpr,
+constExpr = rule(mplus(mplus(mplus(mplus(mplus(mplus(mplus(mplus(intExpr,
   longExpr), uintExpr), ulongExpr), floatExpr), doubleExpr), longDoubleExpr),
-  charExpr), wcharExpr)
+  charExpr), wcharExpr), "constExpr")
 nestedExpr = (
   mbind(lparenToken, lambda _:
   mbind(expr, lambda expr_:
   mbind(rparenToken, lambda _:
   mreturn(expr_)))))
-primaryExpr = mplus(mplus(varExpr, constExpr), nestedExpr)
+primaryExpr = rule(mplus(mplus(varExpr, constExpr), nestedExpr), "primaryExpr")
 
 # argument-expression-list-suffix:
 #   ',' assignment-expression argument-expression-list-suffix?
@@ -393,10 +774,11 @@ postfixExprSuffix = mplus(mplus(funPostfixExprSuffix, incPostfixExprSuffix),
 
 # postfix-expression:
 #   primary-expression postfix-expression-suffix?
-postfixExpr = (
+postfixExpr = rule(
   mbind(primaryExpr, lambda expr_:
   mbind(option([], postfixExprSuffix), lambda exprs:
-  mreturn(reduce(lambda expr_, type_: type_(expr_), exprs, expr_)))))
+  mreturn(reduce(lambda expr_, type_: type_(expr_), exprs, expr_)))),
+  "postfixExpr")
 
 # unary-expression:
 #   postfix-expression
@@ -445,208 +827,78 @@ logicNotExpr = (
   mbind(logicNotToken, lambda t:
   mbind(castExpr, lambda expr_:
   mreturn(syntree.LogicNotExpr(t.pos, expr_)))))
-unaryExpr = mplus(mplus(mplus(mplus(mplus(mplus(mplus(mplus(postfixExpr,
+unaryExpr = memo(mplus(mplus(mplus(mplus(mplus(mplus(mplus(mplus(postfixExpr,
   preIncExpr), preDecExpr), addrOfExpr), derefExpr), plusExpr), minusExpr),
-  notExpr), logicNotExpr)
+  notExpr), logicNotExpr), "unaryExpr")
 
 # cast-expression:
 #   unary-expression
 #   '(' type-name ')' cast-expression
 castExpr = unaryExpr
 
-# multiplicative-expression-suffix:
-#   '*' cast-expression multiplicative-expression-suffix?
-#   '/' cast-expression multiplicative-expression-suffix?
-#   '%' cast-expression multiplicative-expression-suffix? # XXX Not implemented
-mulExprSuffix = (
-  mbind(starToken, lambda _:
-  mbind(castExpr, lambda expr_:
-  mbind(option([], multiplicativeExprSuffix), lambda exprs:
-  mreturn([(syntree.MulExpr, expr_)] + exprs)))))
-divExprSuffix = (
-  mbind(divToken, lambda _:
-  mbind(castExpr, lambda expr_:
-  mbind(option([], multiplicativeExprSuffix), lambda exprs:
-  mreturn([(syntree.DivExpr, expr_)] + exprs)))))
-multiplicativeExprSuffix = mplus(mulExprSuffix, divExprSuffix)
-
 # multiplicative-expression:
-#   cast-expression multiplicative-expression-suffix?
-multiplicativeExpr = (
-  mbind(castExpr, lambda expr_:
-  mbind(option([], multiplicativeExprSuffix), lambda exprs:
-  mreturn(reduce(lambda lexpr, (type_, rexpr):
-    type_(lexpr, rexpr), exprs, expr_)))))
-
-# additive-expression-suffix:
-#   '+' multiplicative-expression additive-expression-suffix?
-#   '-' multiplicative-expression additive-expression-suffix?
-addExprSuffix = (
-  mbind(addToken, lambda _:
-  mbind(multiplicativeExpr, lambda expr_:
-  mbind(option([], addExprSuffix), lambda exprs:
-  mreturn([(syntree.AddExpr, expr_)] + exprs)))))
-subExprSuffix = (
-  mbind(subToken, lambda _:
-  mbind(multiplicativeExpr, lambda expr_:
-  mbind(option([], subExprSuffix), lambda exprs:
-  mreturn([(syntree.SubExpr, expr_)] + exprs)))))
-additiveExprSuffix = mplus(addExprSuffix, subExprSuffix)
-
+#   cast-expression
+#   multiplicative-expression '*' cast-expression
+#   multiplicative-expression '/' cast-expression
+#   multiplicative-expression '%' cast-expression # XXX Not implemented
+#
 # additive-expression:
-#   multiplicative-expression additive-expression-suffix?
-additiveExpr = (
-  mbind(multiplicativeExpr, lambda expr_:
-  mbind(option([], additiveExprSuffix), lambda exprs:
-  mreturn(reduce(lambda lexpr, (type_, rexpr):
-    type_(lexpr, rexpr), exprs, expr_)))))
-
+#   multiplicative-expression
+#   additive-expression '+' multiplicative-expression
+#   additive-expression '-' multiplicative-expression
+#
 # shift-expression:
-#   additive-expression shift-expression-suffix?
+#   additive-expression
+#   shift-expression '<<' additive-expression # XXX Not implemented
+#   shift-expression '>>' additive-expression # XXX Not implemented
 #
-# shift-expression-suffix:
-#   '<<' additive-expression shift-expression-suffix? # XXX Not implemented
-#   '>>' additive-expression shift-expression-suffix? # XXX Not implemented
-shiftExpr = additiveExpr
-
-# relational-expression-suffix:
-#   '<' shift-expression relational-expression-suffix?
-#   '>' shift-expression relational-expression-suffix?
-#   '<=' shift-expression relational-expression-suffix?
-#   '>=' shift-expression relational-expression-suffix?
-lessExprSuffix = (
-  mbind(lessThanToken, lambda _:
-  mbind(shiftExpr, lambda expr_:
-  mbind(option([], relExprSuffix), lambda exprs:
-  mreturn([(syntree.LessThanExpr, expr_)] + exprs)))))
-greaterExprSuffix = (
-  mbind(greaterThanToken, lambda _:
-  mbind(shiftExpr, lambda expr_:
-  mbind(option([], relExprSuffix), lambda exprs:
-  mreturn([(syntree.GreaterThanExpr, expr_)] + exprs)))))
-lessThanEqualExprSuffix = (
-  mbind(lessThanEqualToken, lambda _:
-  mbind(shiftExpr, lambda expr_:
-  mbind(option([], relExprSuffix), lambda exprs:
-  mreturn([(syntree.LessThanEqualExpr, expr_)] + exprs)))))
-greaterThanEqualExprSuffix = (
-  mbind(greaterThanEqualToken, lambda _:
-  mbind(shiftExpr, lambda expr_:
-  mbind(option([], relExprSuffix), lambda exprs:
-  mreturn([(syntree.GreaterThanEqualExpr, expr_)] + exprs)))))
-relExprSuffix = mplus(mplus(mplus(lessExprSuffix, greaterExprSuffix),
-  lessThanEqualExprSuffix), greaterThanEqualExprSuffix)
-
 # relational-expression:
-#   shift-expression relational-expression-suffix?
-relExpr = (
-  mbind(shiftExpr, lambda expr_:
-  mbind(option([], relExprSuffix), lambda exprs:
-  mreturn(reduce(lambda lexpr, (type_, rexpr):
-    type_(lexpr, rexpr), exprs, expr_)))))
-
-# equality-expression-suffix:
-#   '==' relational-expression equality-expression-suffix?
-#   '!=' relational-expression equality-expression-suffix?
-equalExprSuffix = (
-  mbind(equalToken, lambda _:
-  mbind(relExpr, lambda expr_:
-  mbind(option([], equalExprSuffix), lambda exprs:
-  mreturn([(syntree.EqualExpr, expr_)] + exprs)))))
-notEqualExprSuffix = (
-  mbind(notEqualToken, lambda _:
-  mbind(relExpr, lambda expr_:
-  mbind(option([], notEqualExprSuffix), lambda exprs:
-  mreturn([(syntree.NotEqualExpr, expr_)] + exprs)))))
-equalityExprSuffix = mplus(equalExprSuffix, notEqualExprSuffix)
-
+#   shift-expression
+#   relational-expression '<' shift-expression
+#   relational-expression '>' shift-expression
+#   relational-expression '<=' shift-expression
+#   relational-expression '>=' shift-expression
+#
 # equality-expression:
-#   relational-expression equality-expression-suffix?
-equalityExpr = (
-  mbind(relExpr, lambda expr_:
-  mbind(option([], equalityExprSuffix), lambda exprs:
-  mreturn(reduce(lambda lexpr, (type_, rexpr):
-    type_(lexpr, rexpr), exprs, expr_)))))
-
-# and-expression-suffix:
-#   '&' equality-expression and-expression-suffix?
-andExprSuffix = (
-  mbind(ampersandToken, lambda _:
-  mbind(equalityExpr, lambda expr_:
-  mbind(option([], andExprSuffix), lambda exprs:
-  mreturn([expr_] + exprs)))))
-
+#   relational-expression
+#   equality-expression '==' relational-expression
+#   equality-expression '!=' relational-expression
+#
 # and-expression:
-#   equality-expression and-expression-suffix?
-andExpr = (
-  mbind(equalityExpr, lambda expr_:
-  mbind(option([], andExprSuffix), lambda exprs:
-  mreturn(reduce(lambda lexpr, rexpr:
-    syntree.AndExpr(lexpr, rexpr), exprs, expr_)))))
-
-# exclusive-or-expression-suffix:
-#   '^' and-expression exclusive-or-expression-suffix?
-exclOrExprSuffix = (
-  mbind(xorToken, lambda _:
-  mbind(andExpr, lambda expr_:
-  mbind(option([], exclOrExprSuffix), lambda exprs:
-  mreturn([expr_] + exprs)))))
-
+#   equality-expression
+#   and-expression '&' equality-expression
+#
 # exclusive-or-expression:
-#   and-expression exclusive-or-expression-suffix?
-exclOrExpr = (
-  mbind(andExpr, lambda expr_:
-  mbind(option([], exclOrExprSuffix), lambda exprs:
-  mreturn(reduce(lambda lexpr, rexpr:
-    syntree.XorExpr(lexpr, rexpr), exprs, expr_)))))
-
-# inclusive-or-expression-suffix:
-#   '|' exclusive-or-expression inclusive-of-expression-suffix?
-inclOrExprSuffix = (
-  mbind(orToken, lambda _:
-  mbind(exclOrExpr, lambda expr_:
-  mbind(option([], inclOrExprSuffix), lambda exprs:
-  mreturn([expr_] + exprs)))))
-
+#   and-expression
+#   exclusive-or-expression '^' and-expression
+#
 # inclusive-or-expression:
-#   exclusive-or-expression inclusive-of-expression-suffix?
-inclOrExpr = (
-  mbind(exclOrExpr, lambda expr_:
-  mbind(option([], inclOrExprSuffix), lambda exprs:
-  mreturn(reduce(lambda lexpr, rexpr:
-    syntree.OrExpr(lexpr, rexpr), exprs, expr_)))))
-
-# logical-and-expression-suffix:
-#   '&&' inclusive-or-expression logical-and-expression-suffix?
-logicAndExprSuffix = (
-  mbind(logicAndToken, lambda _:
-  mbind(inclOrExpr, lambda expr_:
-  mbind(option([], logicAndExprSuffix), lambda exprs:
-  mreturn([expr_] + exprs)))))
-
+#   exclusive-or-expression
+#   inclusive-or-expression '|' exclusive-or-expression
+#
 # logical-and-expression:
-#   inclusive-or-expression logical-and-expression-suffix?
-logicAndExpr = (
-  mbind(inclOrExpr, lambda expr_:
-  mbind(option([], logicAndExprSuffix), lambda exprs:
-  mreturn(reduce(lambda lexpr, rexpr:
-    syntree.LogicAndExpr(lexpr, rexpr), exprs, expr_)))))
-
-# logical-or-expression-suffix:
-#   '||' logical-and-expression logical-or-expression-suffix?
-logicOrExprSuffix = (
-  mbind(logicOrToken, lambda _:
-  mbind(logicAndExpr, lambda expr_:
-  mbind(option([], logicOrExprSuffix), lambda exprs:
-  mreturn([expr_] + exprs)))))
-
+#   inclusive-or-expression
+#   logical-and-expression '&&' inclusive-or-expression
+#
 # logical-or-expression:
-#   logical-and-expression logical-or-expression-suffix?
-logicOrExpr = (
-  mbind(logicAndExpr, lambda expr_:
-  mbind(option([], logicOrExprSuffix), lambda exprs:
-  mreturn(reduce(lambda lexpr, rexpr:
-    syntree.LogicOrExpr(lexpr, rexpr), exprs, expr_)))))
+#   logical-and-expression
+#   logical-or-expression '||' logical-and-expression
+BINARY_LEVELS = [
+  {scanner.LogicOrToken: syntree.LogicOrExpr},
+  {scanner.LogicAndToken: syntree.LogicAndExpr},
+  {scanner.OrToken: syntree.OrExpr},
+  {scanner.XorToken: syntree.XorExpr},
+  {scanner.AmpersandToken: syntree.AndExpr},
+  {scanner.EqualToken: syntree.EqualExpr,
+    scanner.NotEqualToken: syntree.NotEqualExpr},
+  {scanner.LessThanToken: syntree.LessThanExpr,
+    scanner.GreaterThanToken: syntree.GreaterThanExpr,
+    scanner.LessThanEqualToken: syntree.LessThanEqualExpr,
+    scanner.GreaterThanEqualToken: syntree.GreaterThanEqualExpr},
+  {scanner.AddToken: syntree.AddExpr, scanner.SubToken: syntree.SubExpr},
+  {scanner.StarToken: syntree.MulExpr, scanner.DivToken: syntree.DivExpr},
+]
+logicOrExpr = memo(binaryOps(castExpr, BINARY_LEVELS), "logicOrExpr")
 
 # conditional-expression:
 #   logical-or-expression
@@ -660,7 +912,7 @@ condExpr_ = (
   mbind(colonToken, lambda _:
   mbind(condExpr, lambda fexpr:
   mreturn(syntree.CondExpr(expr_, texpr, fexpr)))))))))
-condExpr = mplus(condExpr_, logicOrExpr)
+condExpr = memo(mplus(condExpr_, logicOrExpr), "condExpr")
 
 # assignment-expression:
 #   conditional-expression
@@ -672,23 +924,13 @@ assignExpr_ = (
   mbind(assignToken, lambda _:
   mbind(assignExpr, lambda rexpr:
   mreturn(syntree.AssignExpr(lexpr, None, rexpr)))))))
-assignExpr = mplus(assignExpr_, condExpr)
-
-# expression-suffix:
-#   ',' assignment-expression expression-suffix?
-exprSuffix = (
-  mbind(commaToken, lambda _:
-  mbind(assignExpr, lambda expr_:
-  mbind(option([], exprSuffix), lambda exprs:
-  mreturn([expr_] + exprs)))))
+assignExpr = memo(mplus(assignExpr_, condExpr), "assignExpr")
 
 # expression:
-#   assignment-expression expression-suffix?
-expr = (
-  mbind(assignExpr, lambda expr_:
-  mbind(option([], exprSuffix), lambda exprs:
-  mreturn(reduce(lambda lexpr, rexpr:
-    syntree.CommaExpr(lexpr, rexpr), exprs, expr_)))))
+#   assignment-expression
+#   expression ',' assignment-expression
+expr = memo(binaryOps(assignExpr, [{scanner.CommaToken: syntree.CommaExpr}]),
+  "expr")
 
 # jump-statement:
 #   'goto' identifier ';' # XXX Not implemented
@@ -708,7 +950,7 @@ returnStmt = (
   mbind(option(None, expr), lambda expr_:
   mbind(semicolonToken, lambda _:
   mreturn(syntree.ReturnStmt(t.pos, expr_))))))
-jumpStmt = mplus(mplus(continueStmt, breakStmt), returnStmt)
+jumpStmt = rule(mplus(mplus(continueStmt, breakStmt), returnStmt), "jumpStmt")
 
 # iteration-statement:
 #   'while' '(' expression ')' statement
@@ -732,38 +974,38 @@ forStmt = (
   mbind(rparenToken, lambda _:
   mbind(stmt, lambda stmt_:
   mreturn(syntree.ForStmt(initExpr, condExpr, nextExpr, stmt_))))))))))))
-iterationStmt = mplus(whileStmt, forStmt)
+iterationStmt = rule(mplus(whileStmt, forStmt), "iterationStmt")
 
 # selection-statement:
 #   'if' '(' expression ')' statement
 #   'if' '(' expression ')' statement 'else' statement
 #   'switch' '(' expression ')' statement # XXX Not implemented
-selectionStmt = (
+selectionStmt = rule(
   mbind(keywordToken("if"), lambda _:
   mbind(lparenToken, lambda _:
   mbind(expr, lambda expr_:
   mbind(rparenToken, lambda _:
   mbind(stmt, lambda tstmt:
   mbind(option(None, mbind(keywordToken("else"), lambda _: stmt)), lambda fstmt:
-  mreturn(syntree.IfStmt(expr_, tstmt, fstmt)))))))))
+  mreturn(syntree.IfStmt(expr_, tstmt, fstmt)))))))), "selectionStmt")
 
 # expression-statement:
 #  expression? ';'
 exprStmtLook = lookAhead(mbind(option(None, expr), lambda _: semicolonToken))
-exprStmt = (
+exprStmt = rule(
   mbind(try_(exprStmtLook), lambda _:
   mbind(option(None, expr), lambda expr_:
   mbind(semicolonToken, lambda _:
-  mreturn(syntree.ExprStmt(expr_))))))
+  mreturn(syntree.ExprStmt(expr_))))), "exprStmt")
 
 # compound-statement:
 #   '{' declaration-list? statement-list? '}'
-compoundStmt = (
+compoundStmt = rule(
   mbind(lcurlyToken, lambda _:
   mbind(declList0, lambda decls:
   mbind(stmtList0, lambda stmts:
   mbind(rcurlyToken, lambda _:
-  mreturn(syntree.CompoundStmt(decls, stmts)))))))
+  mreturn(syntree.CompoundStmt(decls, stmts)))))), "compoundStmt")
 
 # statement:
 #   labeled-statement # XXX Not implemented
@@ -772,8 +1014,8 @@ compoundStmt = (
 #   selection-statement
 #   iteration-statement
 #   jump-statement
-stmt = mplus(mplus(mplus(mplus(compoundStmt, exprStmt), selectionStmt),
-  iterationStmt), jumpStmt)
+stmt = rule(mplus(mplus(mplus(mplus(compoundStmt, exprStmt), selectionStmt),
+  iterationStmt), jumpStmt), "stmt")
 
 # statement-list:
 #   statement+
@@ -803,10 +1045,10 @@ def mkParamDecl(specs, declarator_):
   declarator_.applySpecs(storageClassSpec, typeSpec)
   return syntree.ParamDecl(declarator_)
 
-paramDecl = (
+paramDecl = rule(
   mbind(lambda *a: declSpecs(*a), lambda specs: # defer
   mbind(declarator, lambda declarator_:
-  mreturn(mkParamDecl(specs, declarator_)))))
+  mreturn(mkParamDecl(specs, declarator_)))), "paramDecl")
 
 # parameter-list-suffix:
 #   ',' parameter-declaration parameter-list-suffix?
@@ -847,11 +1089,11 @@ def normalizeTypeQuals(quals):
 
   return (isConst, isVolatile)
 
-pointer = (
+pointer = rule(
   mbind(starToken, lambda _:
   mbind(typeQualList0, lambda typeQuals:
   mbind(option([], pointer), lambda cvs:
-  mreturn([normalizeTypeQuals(typeQuals)] + cvs)))))
+  mreturn([normalizeTypeQuals(typeQuals)] + cvs)))), "pointer")
 
 # direct-declarator-suffix:
 #   '[' constant-expression? ']' direct-declarator-suffix? # XXX Not implemented
@@ -885,10 +1127,11 @@ nestedDirectDeclarator = (
   mbind(declarator, lambda declarator:
   mbind(rparenToken, lambda _:
   mreturn(declarator)))))
-directDeclarator = (
+directDeclarator = rule(
   mbind(mplus(nameDirectDeclarator, nestedDirectDeclarator), lambda direct:
   mbind(many(directDeclaratorSuffix), lambda suffixes:
-  mreturn(syntree.DirectDeclarator.fromSuffixes(direct, suffixes)))))
+  mreturn(syntree.DirectDeclarator.fromSuffixes(direct, suffixes)))),
+  "directDeclarator")
 
 # declarator:
 #   pointer? direct-declarator
@@ -902,7 +1145,7 @@ pointerDeclarator = (
   mbind(pointer, lambda cvs:
   mbind(directDeclarator, lambda direct:
   mreturn(mkPointerDeclarator(cvs, direct))))))
-declarator = mplus(pointerDeclarator, directDeclarator)
+declarator = memo(mplus(pointerDeclarator, directDeclarator), "declarator")
 
 # type-qualifier:
 #   'const'
@@ -960,9 +1203,9 @@ signedTypeSpec = (
 unsignedTypeSpec = (
   mbind(keywordToken("unsigned"), lambda t:
   mreturn(syntree.UnsignedTypeSpec(t.pos))))
-typeSpec = mplus(mplus(mplus(mplus(mplus(mplus(mplus(mplus(voidTypeSpec,
+typeSpec = rule(mplus(mplus(mplus(mplus(mplus(mplus(mplus(mplus(voidTypeSpec,
   charTypeSpec), shortTypeSpec), intTypeSpec), longTypeSpec), floatTypeSpec),
-  doubleTypeSpec), signedTypeSpec), unsignedTypeSpec)
+  doubleTypeSpec), signedTypeSpec), unsignedTypeSpec), "typeSpec")
 
 # storage-class-specifier
 #   'typedef'
@@ -985,9 +1228,9 @@ autoStorageClassSpec = (
 registerStorageClassSpec = (
   mbind(keywordToken("register"), lambda t:
   mreturn(syntree.RegisterStorageClassSpec(t.pos))))
-storageClassSpec = mplus(mplus(mplus(mplus(typedefStorageClassSpec,
+storageClassSpec = rule(mplus(mplus(mplus(mplus(typedefStorageClassSpec,
   externStorageClassSpec), staticStorageClassSpec), autoStorageClassSpec),
-  registerStorageClassSpec)
+  registerStorageClassSpec), "storageClassSpec")
 
 # init-declarator:
 #   declarator
@@ -1004,18 +1247,18 @@ initDeclaratorListSuffix = (
 
 # init-declarator-list:
 #   init-declarator init-declarator-list-suffix?
-initDeclaratorList = (
+initDeclaratorList = rule(
   mbind(initDeclarator, lambda init:
   mbind(option([], initDeclaratorListSuffix), lambda inits:
-  mreturn([init] + inits))))
+  mreturn([init] + inits))), "initDeclaratorList")
 
 # declaration-specifiers:
 #   storage-class-specifier declaration-specifiers?
 #   type-specifier declaration-specifiers?
 #   type-qualifier declaration-specifiers?
 declSpec = mplus(mplus(storageClassSpec, typeSpec), typeQual)
-declSpecs = many1(declSpec)
-declSpecs0 = many(declSpec)
+declSpecs = rule(many1(declSpec), "declSpecs")
+declSpecs0 = memo(many(declSpec), "declSpecs0")
 
 def normalizeDeclSpecs(specs):
   # At most one storage-class specifier may be given in the declaration
@@ -1059,16 +1302,16 @@ def mkDecl(specs, inits):
 
   return syntree.Decl(specs[0].pos, inits)
 
-decl = (
+decl = rule(
   mbind(declSpecs, lambda specs:
   mbind(option([], initDeclaratorList), lambda inits:
   mbind(semicolonToken, lambda _:
-  mreturn(mkDecl(specs, inits))))))
+  mreturn(mkDecl(specs, inits))))), "decl")
 
 # declaration-list:
 #   declaration+
 declList = many1(decl)
-declList0 = many(decl)
+declList0 = memo(many(decl), "declList0")
 
 # function-definition:
 #   declaration-specifiers? declarator declaration-list? compound-statement
@@ -1137,12 +1380,12 @@ funDef_ = (
   mbind(declList0, lambda decls:
   mbind(compoundStmt, lambda stmt:
   mreturn(mkFunDef(specs, declarator_, decls, stmt))))))))
-funDef = label(funDef_, "function definition")
+funDef = rule(label(funDef_, "function definition"), "funDef")
 
 # external-declaration:
 #   function-definition
 #   declaration
-externalDecl = mplus(funDef, decl)
+externalDecl = rule(mplus(funDef, decl), "externalDecl")
 
 # translation-unit:
 #   external-declaration+
@@ -1150,9 +1393,142 @@ translationUnit = (
   mbind(many1(externalDecl), lambda decls:
   mreturn(syntree.TranslationUnit(decls))))
 
-def parse(ts):
-  """Parse a C program, returning a syntax tree."""
-  parser = (
-    mbind(translationUnit, lambda tu:
-    mbind(eofToken, lambda _: mreturn(tu))))
-  return runParser(parser, ts)
+def topLevel(externalDecl_, prelude=None):
+  """Return a parser for a whole program made of declarations parsed by
+  `externalDecl_`, following the declarations of the prelude, if any."""
+  if prelude is None:
+    return (
+      mbind(many1(externalDecl_), lambda decls:
+      mbind(eofToken, lambda _:
+      mreturn(syntree.TranslationUnit(decls)))))
+  else:
+    return (
+      mbind(many(externalDecl_), lambda decls:
+      mbind(eofToken, lambda _:
+      mreturn(syntree.TranslationUnit(prelude.decls + decls)))))
+
+def parse(ts, prelude=None, memo=None):
+  """Parse a C program from a `tokenstream.TokenStream` or a sequence of tokens,
+  returning a syntax tree. If a `prelude.Prelude` is given, its external
+  declarations come first in the translation unit, and the program itself may
+  be empty. If a `Memo` is given, rules that are parsed more than once at the
+  same token, such as those inside `lookAhead`, are only parsed once."""
+  if not isinstance(ts, tokenstream.TokenStream):
+    ts = tokenstream.TokenStream.fromTokens(ts)
+  return runParser(topLevel(externalDecl, prelude), ts, memo)
+
+def relocate(root, lines, delta):
+  """Return a copy of a syntax tree with each source position moved by `delta`
+  characters into the source with the given `scanner.LineIndex`."""
+  copies = {}
+  result = [None]
+  stack = [(root, result, 0)]
+  while stack:
+    x, target, key = stack.pop()
+    if id(x) in copies:
+      y = copies[id(x)]
+    elif isinstance(x, scanner.SourcePosition):
+      y = scanner.SourcePosition(lines, x.off + delta)
+    elif isinstance(x, scanner.Token):
+      y = tuple.__new__(type(x), [relocate(item, lines, delta) for item in x])
+    elif isinstance(x, list):
+      y = [None] * len(x)
+      stack.extend((item, y, i) for i, item in enumerate(x))
+    elif isinstance(x, syntree.Type):
+      # Types are shared and don't have positions.
+      y = x
+    elif type(x).__module__ == syntree.__name__:
+      y = object.__new__(type(x))
+      for name in syntree.fieldNames(type(x)):
+        if hasattr(x, name):
+          stack.append((getattr(x, name), y, name))
+    else:
+      y = x
+    copies[id(x)] = y
+
+    if isinstance(target, list):
+      target[key] = y
+    else:
+      setattr(target, key, y)
+
+  return result[0]
+
+class ReparseEntry(object):
+  """An external declaration from the last version of a program"""
+
+  def __init__(self, start, end, kinds, decl, e):
+    self.start = start
+    self.end = end
+    self.kinds = kinds
+    self.decl = decl
+    self.e = e
+
+class Reparser(object):
+  """A parser for successive versions of a program that only parses the
+  external declarations that have changed since the last version.
+
+  A declaration is reused if its source text wasn't edited and it scans to the
+  same tokens. The parse of a declaration only depends on its own tokens, so
+  the result is the same as parsing the whole program again. Declarations
+  after the edit are copied with their positions moved into the new source,
+  even if the edit didn't change its length, since it may have moved a
+  newline. The syntax tree of the last version is left as it was.
+  """
+
+  def __init__(self):
+    self.source = None
+    self.entries = []
+
+  def parse(self, ts, prelude=None, memo=None):
+    """Parse a `tokenstream.TokenStream` scanned from a source string, like
+    `parse`."""
+    if not isinstance(ts, tokenstream.TokenStream) or ts.table.lines is None:
+      return parse(ts, prelude, memo)
+
+    source = ts.table.lines.str
+    if self.source is None:
+      reusable = {}
+    else:
+      off, removed, inserted = tokenstream.findEdit(self.source, source)
+      delta = len(inserted) - removed
+      reusable = {}
+      for entry in self.entries:
+        if entry.end <= off:
+          reusable[entry.start] = entry, None
+        elif entry.start >= off + removed:
+          reusable[entry.start + delta] = entry, delta
+
+    lines = ts.table.lines
+    entries = []
+
+    def externalDecl_(ts, i, cok, cerr, eok, eerr):
+      start = ts.span(i)[0]
+      # The delta is None for declarations before the edit, which keep their
+      # positions.
+      entry, delta = reusable.get(start, (None, None))
+      if entry is not None:
+        n = len(entry.kinds)
+        end = entry.end + (delta or 0)
+        if (ts.has(i + n - 1) and ts.table.kindSlice(ts.lo + i,
+            ts.lo + i + n) == entry.kinds and ts.span(i + n - 1)[1] == end):
+          decl = entry.decl if delta is None else relocate(entry.decl, lines,
+            delta)
+          j, msgs = entry.e
+          e = (None if j is None else j + i, msgs)
+          entries.append(ReparseEntry(start, end, entry.kinds, decl, entry.e))
+          return cok, (decl, i + n, e)
+
+      def store(decl, j, e):
+        kinds = ts.table.kindSlice(ts.lo + i, ts.lo + j)
+        k, msgs = e
+        entries.append(ReparseEntry(start, ts.span(j - 1)[1], kinds, decl,
+          (None if k is None else k - i, msgs)))
+        return cok, (decl, j, e)
+
+      return externalDecl(ts, i, store, cerr, eok, eerr)
+
+    try:
+      return runParser(topLevel(externalDecl_, prelude), ts, memo)
+    finally:
+      self.source = source
+      self.entries = entries
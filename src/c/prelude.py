@@ -0,0 +1,38 @@
+"""
+Headers that are scanned and parsed once and compiled in front of programs
+"""
+
+import hashlib
+
+import llparser
+import tokenstream
+
+class Prelude(object):
+  """A header whose external declarations are included at the start of every
+  program that is parsed with it"""
+
+  def __init__(self, source):
+    self.source = source
+    self.tokens = tokenstream.scan(source)
+    self.decls = llparser.parse(self.tokens).decls
+
+  def __repr__(self):
+    return "%s(decls=%r)" % (type(self).__name__, self.decls)
+
+# Preludes that have already been parsed, by the SHA-1 hash of their source
+_preludes = {}
+
+def prelude(source):
+  """Return the `Prelude` for the given header source, only scanning and parsing
+  it the first time it is used."""
+  key = hashlib.sha1(source).hexdigest()
+  try:
+    return _preludes[key]
+  except KeyError:
+    prelude_ = _preludes[key] = Prelude(source)
+    return prelude_
+
+def load(path):
+  """Return the `Prelude` for the header file at the given path."""
+  with open(path, "rb") as file_:
+    return prelude(file_.read())
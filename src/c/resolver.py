@@ -0,0 +1,132 @@
+"""
+A semantic analysis pass that resolves the names in a C syntax tree
+
+`resolve` binds each `syntree.VarExpr` to the variable it refers to before code
+generation, so that `tacgen.TACGenerator` doesn't have to search the
+environment for every use of a name. Global names are bound to their
+`GlobalVar` and parameters to their `ParamVar`. Local variables are bound to
+their slot in the frame of their function: the index of their declaration in
+the order that the code generator visits declarations, since their
+`LocalVar`s are only allocated along with the temporaries during code
+generation.
+"""
+
+from error import CompileError
+import syntree
+from tacgen import Env
+from threeaddr.threeaddr import GlobalVar, ParamVar
+
+# The scope depths of global names and parameters. Blocks are deeper.
+GLOBAL_DEPTH = 0
+PARAM_DEPTH = 1
+
+class UndeclaredError(CompileError):
+  """An error raised for the undeclared names in a program, which are all
+  reported at once"""
+
+  def __init__(self, names):
+    pos, id_ = names[0]
+    if len(names) == 1:
+      msg = "`%s' undeclared" % id_
+    else:
+      msg = "undeclared names: %s" % ", ".join("`%s' (%s)" % (id_, pos)
+        for pos, id_ in names)
+    CompileError.__init__(self, pos, msg)
+    self.names = names
+
+class Resolver(syntree.NodeVisitor):
+  """A visitor that resolves the variable expressions in a syntax tree
+
+  The environment maps names to their binding and scope depth. Undeclared
+  names are collected in `undeclared`, which maps each of them to the position
+  of its earliest use, rather than stopping the pass.
+  """
+
+  def __init__(self):
+    # The current environment and its depth
+    self.env = Env()
+    self.depth = GLOBAL_DEPTH
+
+    # The next frame slot of the current function
+    self.slots = 0
+
+    # The undeclared names that have been found
+    self.undeclared = {}
+
+  def _pushEnv(self):
+    """Push an empty environment onto the environment stack"""
+    self.env = Env(self.env)
+    self.depth += 1
+
+  def _popEnv(self):
+    """Remove the current environment from the environment stack"""
+    self.env = self.env.outer
+    self.depth -= 1
+
+  def visitVarExpr(self, node):
+    """Bind a variable expression to the variable that its name refers to"""
+    varEnv = self.env.find(node.id)
+    if varEnv is None:
+      pos = self.undeclared.get(node.id)
+      if pos is None or node.pos < pos:
+        self.undeclared[node.id] = node.pos
+      node.binding, node.depth = None, None
+    else:
+      node.binding, node.depth = varEnv[node.id]
+
+  def visitForStmt(self, node):
+    """Resolve a for statement in the order that its code is generated"""
+    for expr in [node.initExpr, node.condExpr, node.stmt, node.nextExpr]:
+      if expr is not None:
+        yield self.visitChild(expr)
+
+  def visitCompoundStmt(self, node):
+    """Resolve a compound statement in a local environment"""
+    self._pushEnv()
+    for decl in node.decls:
+      yield self.visitChild(decl)
+    for stmt in node.stmts:
+      yield self.visitChild(stmt)
+    self._popEnv()
+
+  def visitDecl(self, node):
+    """Add the names in a declaration to the environment"""
+    for init in node.inits:
+      if self.env.outer is None:
+        self.env[init.id] = (GlobalVar(init.id), GLOBAL_DEPTH)
+      else:
+        self.env[init.id] = (self.slots, self.depth)
+        self.slots += 1
+
+  def visitFunDef(self, node):
+    """Resolve a function definition with its parameters in scope"""
+    id_ = node.declarator.id
+    if id_ not in self.env:
+      self.env[id_] = (GlobalVar(id_), GLOBAL_DEPTH)
+
+    self._pushEnv()
+    self.slots = 0
+
+    # Parameters increase in offset from right to left
+    params = node.declarator.params
+    for param, off in zip(params, reversed(xrange(len(params)))):
+      self.env[param.declarator.id] = (ParamVar(off), PARAM_DEPTH)
+
+    yield self.visitChild(node.stmt)
+    self._popEnv()
+
+  def visitTranslationUnit(self, node):
+    """Resolve each declaration in a translation unit"""
+    for decl in node.decls:
+      yield self.visitChild(decl)
+
+def resolve(tu):
+  """Resolve the names in a translation unit, returning it, or raise an
+  `UndeclaredError` for all of its undeclared names, each at its earliest use,
+  in the order of those uses."""
+  resolver = Resolver()
+  resolver.visit(tu)
+  if resolver.undeclared:
+    raise UndeclaredError(sorted((pos, id_)
+      for id_, pos in resolver.undeclared.iteritems()))
+  return tu
@@ -2,7 +2,10 @@
 A scanner for ANSI C
 """
 
+from array import array
+import bisect
 import new
+import re
 import string
 
 import error
@@ -30,6 +33,80 @@ class Position(tuple):
   line = property(lambda self: self[0])
   col = property(lambda self: self[1])
 
+class LineIndex(object):
+  """The offsets of the start of each line in an input string, used to find the
+  line and column of an offset. The offsets are only found the first time they
+  are needed."""
+
+  def __init__(self, str_):
+    self.str = str_
+    self._starts = None
+
+  NEWLINE_PATTERN = re.compile('\n')
+
+  def __starts(self):
+    """Return the sorted offsets of the start of each line."""
+    if self._starts is None:
+      # Buffers and mmaps can be searched with regular expressions, but don't
+      # have a find method.
+      finditer = LineIndex.NEWLINE_PATTERN.finditer
+      starts = array('i', [0])
+      starts.extend(m.end() for m in finditer(self.str))
+      self._starts = starts
+    return self._starts
+
+  def lineCol(self, off):
+    """Return the line and column of the given offset."""
+    starts = self.__starts()
+    line = bisect.bisect_right(starts, off)
+    return line, off - starts[line - 1] + 1
+
+  def position(self, off):
+    """Return the `Position` of the given offset."""
+    return Position(*self.lineCol(off))
+
+class SourcePosition(object):
+  """The position of a token or error in an input string, stored as an offset.
+  The line and column are only found when they are used, such as when an error
+  is formatted, and otherwise it behaves like the equivalent `Position`."""
+
+  __slots__ = ("lines", "off")
+
+  def __init__(self, lines, off):
+    self.lines = lines
+    self.off = off
+
+  def __repr__(self):
+    return "%s(line=%r, col=%r)" % (type(self).__name__, self.line, self.col)
+
+  def __str__(self):
+    return "line %d, column %d" % self.lineCol()
+
+  def __cmp__(self, other):
+    if isinstance(other, SourcePosition) and other.lines is self.lines:
+      return cmp(self.off, other.off)
+    elif isinstance(other, (SourcePosition, Position)):
+      return cmp(self.lineCol(), tuple(other))
+    else:
+      return NotImplemented
+
+  def __hash__(self):
+    return hash(self.lineCol())
+
+  def __iter__(self):
+    return iter(self.lineCol())
+
+  def next(self, c='\0'):
+    """Return the next position after consuming the given character."""
+    return SourcePosition(self.lines, self.off + 1)
+
+  def lineCol(self):
+    """Return the line and column of this position."""
+    return self.lines.lineCol(self.off)
+
+  line = property(lambda self: self.lineCol()[0])
+  col = property(lambda self: self.lineCol()[1])
+
 class ScanError(error.CompileError):
   """An error encountered while scanning a string"""
 
@@ -49,6 +126,9 @@ class Token(tuple):
   pos = property(lambda self: self[0])
   """The position of the token in the input string"""
 
+  kind = None
+  """The integer kind of the token type, or None for abstract token types"""
+
 class ValueToken(Token):
   """The base class of all tokens with a value"""
 
@@ -421,14 +501,37 @@ class EOFToken(Token):
   def __str__(self):
     return "end of file"
 
+# Every concrete token type has a small integer kind, so that token types can be
+# stored in an array and compared without isinstance. TOKEN_TYPES maps kinds
+# back to token types.
+TOKEN_TYPES = (
+  IdentifierToken, KeywordToken, IntToken, LongToken, UIntToken, ULongToken,
+  FloatToken, DoubleToken, LongDoubleToken, CharToken, WCharToken,
+  StringToken, WStringToken, EllipsisToken, RightShiftAssignToken,
+  LeftShiftAssignToken, AddAssignToken, SubAssignToken, MulAssignToken,
+  DivAssignToken, ModAssignToken, AndAssignToken, XorAssignToken,
+  OrAssignToken, RightShiftToken, LeftShiftToken, IncrementToken,
+  DecrementToken, ArrowToken, LogicAndToken, LogicOrToken,
+  GreaterThanEqualToken, LessThanEqualToken, EqualToken, NotEqualToken,
+  SemicolonToken, LCurlyToken, RCurlyToken, CommaToken, ColonToken,
+  AssignToken, LParenToken, RParenToken, LSquareToken, RSquareToken,
+  PeriodToken, AddToken, SubToken, StarToken, DivToken, ModToken,
+  LogicNotToken, NotToken, AmpersandToken, XorToken, OrToken,
+  GreaterThanToken, LessThanToken, QuestionToken, EOFToken)
+
+for kind, cls in enumerate(TOKEN_TYPES):
+  cls.kind = kind
+del kind, cls
+
 # Scanner types
 class Scanner(object):
   """A base class for continuation- and state-based scanners
 
   Each state is a function that is passed the current character (or None at
-  EOF), the current position, and continuations for transitioning to the given
-  state and consuming the current character or passing it to the next state
-  respectively.
+  EOF), its offset, the `LineIndex` of the input, and continuations for
+  transitioning to the given state and consuming the current character or
+  passing it to the next state respectively. Positions are only built from the
+  offset and the LineIndex when a token, warning or error is generated.
 
   self._state is used as the starting state for scanners derived from this
   class. Scanners should transition to self._final to terminate.
@@ -437,8 +540,12 @@ class Scanner(object):
   def __init__(self, final=None):
     self._final = final
 
-  def __call__(self, c, off, pos, cconsume, cpass):
-    return self._start(c, off, pos, cconsume, cpass)
+  def __call__(self, c, off, lines, cconsume, cpass):
+    self.lines = lines
+    return self._start(c, off, lines, cconsume, cpass)
+
+  tokPos = property(lambda self: SourcePosition(self.lines, self.tokOff))
+  """The position of the token being scanned"""
 
 class ScannerIter(object):
   """An iterator that runs a scanner on an input and yields a sequence of
@@ -447,16 +554,16 @@ class ScannerIter(object):
   def __init__(self, start, str_, trace=False):
     self._state = start
     self.str = str_
+    self.lines = LineIndex(str_)
     self.off = 0
-    self.pos = Position(1, 1)
     self.trace = trace
 
-  def __consume(self, newState, off, pos, toks):
+  def __consume(self, newState, off, toks):
     """Transition to a new state, emitting the given tokens and consuming the
     current character."""
-    return (newState, off + 1, pos.next(self.c(off)), toks)
+    return (newState, off + 1, toks)
 
-  def __pass(self, newState, curOff, curPos, curToks):
+  def __pass(self, newState, curOff, curToks):
     """Transition to a new state, emitting the given tokens and passing the
     current character to that state."""
     if newState:
@@ -469,18 +576,16 @@ class ScannerIter(object):
           name = "%s._start" % type(newState).__name__
         print "%s(%r)" % (name, self.c(curOff))
 
-      return newState(self.c(curOff), curOff, curPos,
-        lambda s, toks=(): self.__consume(s, curOff, curPos, curToks + toks),
-        lambda s, off=curOff, pos=curPos, toks=():
-          self.__pass(s, off, pos, curToks + toks))
+      return newState(self.c(curOff), curOff, self.lines,
+        lambda s, toks=(): self.__consume(s, curOff, curToks + toks),
+        lambda s, off=curOff, toks=(): self.__pass(s, off, curToks + toks))
     else:
-      return (None, curOff, curPos, curToks)
+      return (None, curOff, curToks)
 
   def __iter__(self):
     """Process the input, generating a sequence of tokens."""
     while self._state:
-      self._state, self.off, self.pos, toks = self.__pass(self._state,
-        self.off, self.pos, ())
+      self._state, self.off, toks = self.__pass(self._state, self.off, ())
       for tok in toks:
         yield tok
 
@@ -508,9 +613,9 @@ class IdentifierOrKeywordScanner(Scanner):
     else:
       return KeywordToken(self.tokPos, self.tokStr)
 
-  def _start(self, c, off, pos, cconsume, cpass):
+  def _start(self, c, off, lines, cconsume, cpass):
     """The starting state (no input)"""
-    self.tokPos = pos
+    self.tokOff = off
     self.tokStr = c
 
     if c and (c.isalpha() or c == '_'):
@@ -519,7 +624,7 @@ class IdentifierOrKeywordScanner(Scanner):
       # This scanner isn't called directly, so this shouldn't happen.
       assert False
 
-  def _identifier(self, c, off, pos, cconsume, cpass):
+  def _identifier(self, c, off, lines, cconsume, cpass):
     """The main character sequence"""
     if c and (c.isalnum() or c == '_'):
       self.tokStr += c
@@ -548,9 +653,9 @@ class NumberScanner(Scanner):
     base."""
     return c in self.BASE_DIGITS[self.base]
 
-  def _start(self, c, off, pos, cconsume, cpass):
+  def _start(self, c, off, lines, cconsume, cpass):
     """The starting state (no input)"""
-    self.tokPos = pos
+    self.tokOff = off
     self.tokStr = ""
     self.base = 10
     self.hasU = False
@@ -566,17 +671,17 @@ class NumberScanner(Scanner):
       # This scanner isn't called directly, so this shouldn't happen.
       assert False
 
-  def _hexOrOctal(self, c, off, pos, cconsume, cpass):
+  def _hexOrOctal(self, c, off, lines, cconsume, cpass):
     """A single zero has been read"""
     if c and c in "xX":
       self.base = 16
       return cconsume(self._digits)
     else:
       self.base = 8
-      self.octPos = None
+      self.octOff = None
       return cpass(self._digits)
 
-  def _digits(self, c, off, pos, cconsume, cpass):
+  def _digits(self, c, off, lines, cconsume, cpass):
     """The main sequence of digits"""
     if c and self._isDigit(c):
       self.tokStr += c
@@ -585,10 +690,13 @@ class NumberScanner(Scanner):
       self.tokStr += c
       # Defer raising an error until we know this isn't a floating-point
       # constant beginning with 0.
-      self.octPos = pos
+      self.octOff = off
       self.octDigit = c
       return cconsume(self._digits)
     elif c and c == '.':
+      if self.base == 16:
+        raise ScanError(SourcePosition(lines, off),
+          "hexadecimal floating constants are not supported")
       self.tokStr += c
       return cconsume(self._decimal)
     elif c and c in "eE":
@@ -598,12 +706,12 @@ class NumberScanner(Scanner):
       return cpass(self._floatSuffix)
     else:
       # Raise an error if this is an octal constant with non-octal digits.
-      if self.base == 8 and self.octPos:
-        raise ScanError(self.octPos, "invalid digit `%s' in octal constant" %
-          self.octDigit)
+      if self.base == 8 and self.octOff is not None:
+        raise ScanError(SourcePosition(lines, self.octOff),
+          "invalid digit `%s' in octal constant" % self.octDigit)
       return cpass(self._intSuffix)
 
-  def _intSuffix(self, c, off, pos, cconsume, cpass):
+  def _intSuffix(self, c, off, lines, cconsume, cpass):
     """The end of an integer"""
     if c and not self.hasU and c in "uU":
       self.hasU = True
@@ -612,7 +720,8 @@ class NumberScanner(Scanner):
       self.hasL = True
       return cconsume(self._intSuffix)
     elif c and c.isalnum():
-      raise ScanError(pos, "invalid suffix `%s' on integer constant" % c)
+      raise ScanError(SourcePosition(lines, off),
+        "invalid suffix `%s' on integer constant" % c)
     else:
       if self.hasU and self.hasL:
         cls = ULongToken
@@ -625,7 +734,7 @@ class NumberScanner(Scanner):
       val = int(self.tokStr, self.base)
       return cpass(self._final, toks=(cls(self.tokPos, val),))
 
-  def _decimal(self, c, off, pos, cconsume, cpass):
+  def _decimal(self, c, off, lines, cconsume, cpass):
     """In a floating-point number after the decimal point, if any"""
     if c and c.isdigit():
       self.tokStr += c
@@ -636,7 +745,7 @@ class NumberScanner(Scanner):
     else:
       return cpass(self._floatSuffix)
 
-  def _exponent(self, c, off, pos, cconsume, cpass):
+  def _exponent(self, c, off, lines, cconsume, cpass):
     """In an exponent immediately after the 'e'"""
     if c and c.isdigit():
       return cpass(self._exponentDigits)
@@ -644,14 +753,14 @@ class NumberScanner(Scanner):
       self.tokStr += c
     return cconsume(self._exponentSign)
 
-  def _exponentSign(self, c, off, pos, cconsume, cpass):
+  def _exponentSign(self, c, off, lines, cconsume, cpass):
     """In an exponent after the sign, if any"""
     if c and c.isdigit():
       return cpass(self._exponentDigits)
     else:
-      raise ScanError(pos, "exponent has no digits")
+      raise ScanError(SourcePosition(lines, off), "exponent has no digits")
 
-  def _exponentDigits(self, c, off, pos, cconsume, cpass):
+  def _exponentDigits(self, c, off, lines, cconsume, cpass):
     """The main sequence of digits in an exponent"""
     if c and c.isdigit():
       self.tokStr += c
@@ -659,7 +768,7 @@ class NumberScanner(Scanner):
     else:
       return cpass(self._floatSuffix)
 
-  def _floatSuffix(self, c, off, pos, cconsume, cpass):
+  def _floatSuffix(self, c, off, lines, cconsume, cpass):
     """The end of a floating-point constant"""
     if c and not (self.hasF or self.hasL) and c in "fF":
       self.hasF = True
@@ -668,7 +777,8 @@ class NumberScanner(Scanner):
       self.hasL = True
       return cconsume(self._floatSuffix)
     elif c and c.isalnum():
-      raise ScanError(pos, "invalid suffix `%s' on floating constant" % c)
+      raise ScanError(SourcePosition(lines, off),
+        "invalid suffix `%s' on floating constant" % c)
     else:
       if self.hasF:
         cls = FloatToken
@@ -688,16 +798,18 @@ class CharScanner(Scanner):
     'v': '\v'}
 
   @classmethod
-  def escapedChar(cls, c, pos):
-    """Return the actual character value for an escaped character."""
+  def escapedChar(cls, c, lines, off):
+    """Return the actual character value for an escaped character at the given
+    offset."""
     try:
       return cls.CHAR_ESCAPES[c]
     except KeyError:
-      raise ScanError(pos, "unknown escape sequence: `\\%s'" % c)
+      raise ScanError(SourcePosition(lines, off),
+        "unknown escape sequence: `\\%s'" % c)
 
-  def _start(self, c, off, pos, cconsume, cpass):
+  def _start(self, c, off, lines, cconsume, cpass):
     """The starting state"""
-    self.tokPos = pos
+    self.tokOff = off
     self.escape = False
 
     if c and c == 'L':
@@ -707,7 +819,7 @@ class CharScanner(Scanner):
       self.wide = False
       return cpass(self._open)
 
-  def _open(self, c, off, pos, cconsume, cpass):
+  def _open(self, c, off, lines, cconsume, cpass):
     """Before an opening quote"""
     if c and c == '\'':
       return cconsume(self._char)
@@ -715,11 +827,11 @@ class CharScanner(Scanner):
       # This scanner isn't called directly, so this shouldn't happen.
       assert False
 
-  def _char(self, c, off, pos, cconsume, cpass):
+  def _char(self, c, off, lines, cconsume, cpass):
     """The character constant"""
     if c:
       if self.escape:
-        self.tokVal = CharScanner.escapedChar(c, pos)
+        self.tokVal = CharScanner.escapedChar(c, lines, off)
       else:
         if c == '\\':
           self.escape = True
@@ -730,7 +842,7 @@ class CharScanner(Scanner):
     else:
       return cpass(self._close)
 
-  def _close(self, c, off, pos, cconsume, cpass):
+  def _close(self, c, off, lines, cconsume, cpass):
     """Before a closing quote"""
     if c and c == '\'':
       if not self.wide:
@@ -739,14 +851,15 @@ class CharScanner(Scanner):
         cls = WCharToken
       return cconsume(self._final, (cls(self.tokPos, self.tokVal),))
     else:
-      raise ScanError(pos, "missing terminating ' character")
+      raise ScanError(SourcePosition(lines, off),
+        "missing terminating ' character")
 
 class StringScanner(Scanner):
   """A scanner that accepts string literals"""
 
-  def _start(self, c, off, pos, cconsume, cpass):
+  def _start(self, c, off, lines, cconsume, cpass):
     """The starting state"""
-    self.tokPos = pos
+    self.tokOff = off
     self.tokStr = ""
     self.escape = False
 
@@ -757,7 +870,7 @@ class StringScanner(Scanner):
       self.wide = False
       return cpass(self._open)
 
-  def _open(self, c, off, pos, cconsume, cpass):
+  def _open(self, c, off, lines, cconsume, cpass):
     """Before an opening quote"""
     if c and c == '"':
       return cconsume(self._string)
@@ -765,11 +878,11 @@ class StringScanner(Scanner):
       # This scanner isn't called directly, so this shouldn't happen.
       assert False
 
-  def _string(self, c, off, pos, cconsume, cpass):
+  def _string(self, c, off, lines, cconsume, cpass):
     """In a string literal"""
     if c:
       if self.escape:
-        self.tokStr += CharScanner.escapedChar(c, pos)
+        self.tokStr += CharScanner.escapedChar(c, lines, off)
         self.escape = False
       else:
         if c == '"':
@@ -785,20 +898,17 @@ class StringScanner(Scanner):
             self.tokStr += c
       return cconsume(self._string)
     else:
-      raise ScanError(pos, "unexpected EOF in string literal")
+      raise ScanError(SourcePosition(lines, off),
+        "unexpected EOF in string literal")
 
 class CScanner(Scanner):
   """A scanner that generates C tokens from an input string"""
 
-  @classmethod
-  def _genPeriods(cls, pos, n):
-    """Return (a tuple of n sequential period tokens starting at the given
-    position, the next available position)."""
-    if not n:
-      return ((), pos)
-    else:
-      toks_, pos_ = cls._genPeriods(pos.next(), n - 1)
-      return ((PeriodToken(pos),) + toks_, pos_)
+  def _genPeriods(self, n):
+    """Return a tuple of n sequential period tokens starting at the current
+    token."""
+    return tuple(PeriodToken(SourcePosition(self.lines, self.tokOff + i))
+      for i in xrange(n))
 
   def _closeParen(self):
     """Consume a right parenthesis, updating the open parenthesis count."""
@@ -819,7 +929,7 @@ class CScanner(Scanner):
     if self.openSquare < 0:
       raise ScanError(self.tokPos, "unmatched `]'")
 
-  def _start(self, c, off, pos, cconsume, cpass):
+  def _start(self, c, off, lines, cconsume, cpass):
     """The starting state"""
     self.openParens = 0
     self.openCurly = 0
@@ -828,10 +938,9 @@ class CScanner(Scanner):
 
     return cpass(self._main)
 
-  def _main(self, c, off, pos, cconsume, cpass):
+  def _main(self, c, off, lines, cconsume, cpass):
     """The main sequence of tokens"""
     self.tokOff = off
-    self.tokPos = pos
 
     if c:
       self.newline = (c == '\n')
@@ -864,7 +973,7 @@ class CScanner(Scanner):
       elif c == '%':
         return cconsume(self._percent)
       elif c == '~':
-        return cconsume(self._main, (NotToken(pos),))
+        return cconsume(self._main, (NotToken(self.tokPos),))
       elif c == '&':
         return cconsume(self._amp)
       elif c == '^':
@@ -876,107 +985,104 @@ class CScanner(Scanner):
       elif c == '!':
         return cconsume(self._excl)
       elif c == ';':
-        return cconsume(self._main, (SemicolonToken(pos),))
+        return cconsume(self._main, (SemicolonToken(self.tokPos),))
       elif c == '{':
         self.openCurly += 1
-        return cconsume(self._main, (LCurlyToken(pos),))
+        return cconsume(self._main, (LCurlyToken(self.tokPos),))
       elif c == '}':
         self._closeCurly()
-        return cconsume(self._main, (RCurlyToken(pos),))
+        return cconsume(self._main, (RCurlyToken(self.tokPos),))
       elif c == ',':
-        return cconsume(self._main, (CommaToken(pos),))
+        return cconsume(self._main, (CommaToken(self.tokPos),))
       elif c == ':':
         return cconsume(self._colon)
       elif c == '(':
         self.openParens += 1
-        return cconsume(self._main, (LParenToken(pos),))
+        return cconsume(self._main, (LParenToken(self.tokPos),))
       elif c == ')':
         self._closeParen()
-        return cconsume(self._main, (RParenToken(pos),))
+        return cconsume(self._main, (RParenToken(self.tokPos),))
       elif c == '[':
         self.openSquare += 1
-        return cconsume(self._main, (LSquareToken(pos),))
+        return cconsume(self._main, (LSquareToken(self.tokPos),))
       elif c == ']':
         self._closeSquare()
-        return cconsume(self._main, (RSquareToken(pos),))
+        return cconsume(self._main, (RSquareToken(self.tokPos),))
       elif c == '?':
-        return cconsume(self._main, (QuestionToken(pos),))
+        return cconsume(self._main, (QuestionToken(self.tokPos),))
       elif c.isspace():
         return cconsume(self._main)
       else:
-        raise ScanError(pos, "unrecognized character: `%s'" % c)
+        raise ScanError(self.tokPos, "unrecognized character: `%s'" % c)
     else:
       if self.openParens > 0:
-        raise ScanError(pos, "unexpected EOF: unmatched `('")
+        raise ScanError(self.tokPos, "unexpected EOF: unmatched `('")
       if self.openCurly > 0:
-        raise ScanError(pos, "unexpected EOF: unmatched `{'")
+        raise ScanError(self.tokPos, "unexpected EOF: unmatched `{'")
       if self.openSquare > 0:
-        raise ScanError(pos, "unexpected EOF: unmatched `['")
+        raise ScanError(self.tokPos, "unexpected EOF: unmatched `['")
       if not self.newline:
-        toks = (ScanWarning(pos, "no newline at end of file"),)
+        toks = (ScanWarning(self.tokPos, "no newline at end of file"),)
       else:
         toks = ()
-      return cpass(self._final, toks=toks + (EOFToken(pos),))
+      return cpass(self._final, toks=toks + (EOFToken(self.tokPos),))
 
-  def _identifierOrWide(self, c, off, pos, cconsume, cpass):
+  def _identifierOrWide(self, c, off, lines, cconsume, cpass):
     """An 'L' has been read"""
     if c and c == '\'':
-      return cpass(CharScanner(self._main), self.tokOff, self.tokPos)
+      return cpass(CharScanner(self._main), self.tokOff)
     elif c and c == '"':
-      return cpass(StringScanner(self._main), self.tokOff, self.tokPos)
+      return cpass(StringScanner(self._main), self.tokOff)
     else:
-      return cpass(IdentifierOrKeywordScanner(self._main), self.tokOff,
-        self.tokPos)
+      return cpass(IdentifierOrKeywordScanner(self._main), self.tokOff)
 
-  def _comment(self, c, off, pos, cconsume, cpass):
+  def _comment(self, c, off, lines, cconsume, cpass):
     """In a comment"""
     if c and c == '*':
       return cconsume(self._commentStar)
     elif c:
       return cconsume(self._comment)
     else:
-      raise ScanError(pos, "unexpected EOF in comment")
+      raise ScanError(SourcePosition(lines, off), "unexpected EOF in comment")
 
-  def _commentStar(self, c, off, pos, cconsume, cpass):
+  def _commentStar(self, c, off, lines, cconsume, cpass):
     """In a comment after an asterisk"""
     if c and c == '/': # End the comment
       return cconsume(self._main)
     else:
       return cpass(self._comment)
 
-  def _dot(self, c, off, pos, cconsume, cpass):
+  def _dot(self, c, off, lines, cconsume, cpass):
     """One dot has been read"""
     if c and c == '.':
       return cconsume(self._2dot)
     elif c and c.isdigit():
       # A number beginning with a decimal point
-      return cpass(NumberScanner(self._main), self.tokOff, self.tokPos)
+      return cpass(NumberScanner(self._main), self.tokOff)
     else:
-      toks, pos_ = self._genPeriods(self.tokPos, 1)
-      return cpass(self._main, toks=toks)
+      return cpass(self._main, toks=self._genPeriods(1))
 
-  def _2dot(self, c, off, pos, cconsume, cpass):
+  def _2dot(self, c, off, lines, cconsume, cpass):
     """Two dots have been read"""
     if c and c == '.':
       return cconsume(self._3dot)
     elif c and c.isdigit():
       # Reserve a dot for the number
-      toks, pos_ = self._genPeriods(self.tokPos, 1)
-      return cpass(NumberScanner(self._main), self.tokOff + 1, pos_, toks=toks)
+      return cpass(NumberScanner(self._main), self.tokOff + 1,
+        toks=self._genPeriods(1))
     else:
-      toks, pos_ = self._genPeriods(self.tokPos, 2)
-      return cpass(self._main, toks=toks)
+      return cpass(self._main, toks=self._genPeriods(2))
 
-  def _3dot(self, c, off, pos, cconsume, cpass):
+  def _3dot(self, c, off, lines, cconsume, cpass):
     """Three dots have been read"""
     if c and c.isdigit():
       # Reserve a dot for the number
-      toks, pos_ = self._genPeriods(self.tokPos, 2)
-      return cpass(NumberScanner(self._main), self.tokOff + 2, pos_, toks=toks)
+      return cpass(NumberScanner(self._main), self.tokOff + 2,
+        toks=self._genPeriods(2))
     else:
       return cpass(self._main, toks=(EllipsisToken(self.tokPos),))
 
-  def _greater(self, c, off, pos, cconsume, cpass):
+  def _greater(self, c, off, lines, cconsume, cpass):
     """A greater-than symbol has been read"""
     if c and c == '>':
       return cconsume(self._2greater)
@@ -985,14 +1091,14 @@ class CScanner(Scanner):
     else:
       return cpass(self._main, toks=(GreaterThanToken(self.tokPos),))
 
-  def _2greater(self, c, off, pos, cconsume, cpass):
+  def _2greater(self, c, off, lines, cconsume, cpass):
     """Two greater-than symbols have been read"""
     if c and c == '=':
       return cconsume(self._main, (RightShiftAssignToken(self.tokPos),))
     else:
       return cpass(self._main, toks=(RightShiftToken(self.tokPos),))
 
-  def _less(self, c, off, pos, cconsume, cpass):
+  def _less(self, c, off, lines, cconsume, cpass):
     """A less-than symbol has been read"""
     if c and c == '<':
       return cconsume(self._2less)
@@ -1007,14 +1113,14 @@ class CScanner(Scanner):
     else:
       return cpass(self._main, toks=(LessThanToken(self.tokPos),))
 
-  def _2less(self, c, off, pos, cconsume, cpass):
+  def _2less(self, c, off, lines, cconsume, cpass):
     """Two less-than symbols have been read"""
     if c and c == '=':
       return cconsume(self._main, (LeftShiftAssignToken(self.tokPos),))
     else:
       return cpass(self._main, toks=(LeftShiftToken(self.tokPos),))
 
-  def _plus(self, c, off, pos, cconsume, cpass):
+  def _plus(self, c, off, lines, cconsume, cpass):
     """A plus sign has been read"""
     if c and c == '=':
       return cconsume(self._main, (AddAssignToken(self.tokPos),))
@@ -1023,7 +1129,7 @@ class CScanner(Scanner):
     else:
       return cpass(self._main, toks=(AddToken(self.tokPos),))
 
-  def _minus(self, c, off, pos, cconsume, cpass):
+  def _minus(self, c, off, lines, cconsume, cpass):
     """A minus sign has been read"""
     if c and c == '=':
       return cconsume(self._main, (SubAssignToken(self.tokPos),))
@@ -1034,14 +1140,14 @@ class CScanner(Scanner):
     else:
       return cpass(self._main, toks=(SubToken(self.tokPos),))
 
-  def _star(self, c, off, pos, cconsume, cpass):
+  def _star(self, c, off, lines, cconsume, cpass):
     """A star has been read"""
     if c and c == '=':
       return cconsume(self._main, (MulAssignToken(self.tokPos),))
     else:
       return cpass(self._main, toks=(StarToken(self.tokPos),))
 
-  def _slash(self, c, off, pos, cconsume, cpass):
+  def _slash(self, c, off, lines, cconsume, cpass):
     """A slash has been read"""
     if c and c == '*': # Begin a comment
       return cconsume(self._comment)
@@ -1050,7 +1156,7 @@ class CScanner(Scanner):
     else:
       return cpass(self._main, toks=(DivToken(self.tokPos),))
 
-  def _percent(self, c, off, pos, cconsume, cpass):
+  def _percent(self, c, off, lines, cconsume, cpass):
     """A percent sign has been read"""
     if c and c == '=':
       return cconsume(self._main, (ModAssignToken(self.tokPos),))
@@ -1060,7 +1166,7 @@ class CScanner(Scanner):
     else:
       return cpass(self._main, toks=(ModToken(self.tokPos),))
 
-  def _amp(self, c, off, pos, cconsume, cpass):
+  def _amp(self, c, off, lines, cconsume, cpass):
     """An ampersand has been read"""
     if c and c == '=':
       return cconsume(self._main, (AndAssignToken(self.tokPos),))
@@ -1069,14 +1175,14 @@ class CScanner(Scanner):
     else:
       return cpass(self._main, toks=(AmpersandToken(self.tokPos),))
 
-  def _caret(self, c, off, pos, cconsume, cpass):
+  def _caret(self, c, off, lines, cconsume, cpass):
     """A caret has been read"""
     if c and c == '=':
       return cconsume(self._main, (XorAssignToken(self.tokPos),))
     else:
       return cpass(self._main, toks=(XorToken(self.tokPos),))
 
-  def _pipe(self, c, off, pos, cconsume, cpass):
+  def _pipe(self, c, off, lines, cconsume, cpass):
     """A pipe symbol has been read"""
     if c and c == '=':
       return cconsume(self._main, (OrAssignToken(self.tokPos),))
@@ -1085,21 +1191,21 @@ class CScanner(Scanner):
     else:
       return cpass(self._main, toks=(OrToken(self.tokPos),))
 
-  def _equal(self, c, off, pos, cconsume, cpass):
+  def _equal(self, c, off, lines, cconsume, cpass):
     """An equal sign has been read"""
     if c and c == '=':
       return cconsume(self._main, (EqualToken(self.tokPos),))
     else:
       return cpass(self._main, toks=(AssignToken(self.tokPos),))
 
-  def _excl(self, c, off, pos, cconsume, cpass):
+  def _excl(self, c, off, lines, cconsume, cpass):
     """An exclamation point has been read"""
     if c and c == '=':
       return cconsume(self._main, (NotEqualToken(self.tokPos),))
     else:
       return cpass(self._main, toks=(LogicNotToken(self.tokPos),))
 
-  def _colon(self, c, off, pos, cconsume, cpass):
+  def _colon(self, c, off, lines, cconsume, cpass):
     """A colon has been read"""
     if c and c == '>': # Right square bracket digraph
       self._closeSquare()
@@ -1130,8 +1236,47 @@ def tokensAndWarnings(xs, warnings):
     else:
       yield x
 
-def scan(str_, trace=False):
-  """Scan an input string, returning a generator that yields tokens."""
+def source(input_):
+  """Return an input string for the scanners, given a string, buffer, mmap,
+  bytearray or memoryview.
+
+  Strings, buffers and mmaps are used as they are, since indexing and slicing
+  them returns strings and they can be matched with regular expressions.
+  Bytearrays are wrapped in a buffer without copying them. A memoryview is
+  copied, since Python 2's regular expressions can't match one.
+  """
+  if isinstance(input_, bytearray):
+    return buffer(input_)
+  elif isinstance(input_, memoryview):
+    return input_.tobytes()
+  else:
+    return input_
+
+# The number of characters to read at a time when scanning a file
+CHUNK_SIZE = 1 << 16
+
+def scanFile(file_, chunkSize=CHUNK_SIZE):
+  """Scan an open file a chunk at a time, returning a generator that yields the
+  same tokens as `scan` would for its contents without reading the whole file
+  into memory."""
+  import tablescanner
+  return tablescanner.scanStream(iter(lambda: file_.read(chunkSize), ""))
+
+def scan(str_, trace=False, tables=False):
+  """Scan an input string, returning a generator that yields tokens. The input
+  can be anything that `source` accepts.
+
+  If `tables` is set, the faster table-driven scanner in `tablescanner` is used
+  instead, which yields exactly the same tokens and warnings but does not
+  support tracing.
+  """
+  str_ = source(str_)
+  if tables:
+    import tablescanner
+    for tok in tablescanner.scan(str_):
+      yield tok
+    return
+
   iter_ = ScannerIter(CScanner(), str_, trace)
 
   for tok in iter_:
@@ -2,11 +2,39 @@
 Syntax tree nodes for a subset of ANSI C
 
 These types roughly correspond to the non-terminals in the C syntax
-specification.
+specification. Every class declares its fields in `__slots__`, so that nodes
+don't carry an instance dictionary; a subclass without fields of its own
+declares empty `__slots__`.
+
+Visit functions that visit other nodes are generators, so that deep trees are
+visited without recursion: they yield `NodeVisitor.visitChild` for each node
+that they visit and are sent back its result, and they raise `Return` with
+their own result. `runVisit` runs them on an explicit stack.
 """
 
+from types import GeneratorType
+
 import scanner
 
+# The visit function for each visitor class and node class
+_visits = {}
+
+def findVisit(visitorCls, cls):
+  """Return the function that a visitor class visits nodes of the given class
+  with: the visitXXX function for the class or its nearest base class that
+  has one, or else the visitor's `genericVisit`."""
+  for base in cls.__mro__:
+    visit = getattr(visitorCls, "visit%s" % base.__name__, None)
+    if visit is not None:
+      break
+  else:
+    visit = getattr(visitorCls, "genericVisit", None)
+    if visit is None:
+      raise AttributeError("'%s' object has no attribute 'visit%s'" %
+        (visitorCls.__name__, cls.__name__))
+  # Call the plain function, skipping the unbound method's type check
+  return getattr(visit, "__func__", visit)
+
 def visitable(cls):
   """A decorator for implementing the visitor pattern
 
@@ -16,21 +44,158 @@ def visitable(cls):
   class Foo(...):
     def accept(self, visitor):
       return visitor.visitFoo(self)
+
+  The visit function is looked up once for each visitor class by `findVisit`,
+  and cached. If it is a generator, it is run by `runVisit`.
   """
 
   def accept(self, visitor, *args):
     # Grab the visitXXX function
-    visit = getattr(visitor, "visit%s" % cls.__name__)
-    return visit(self, *args)
+    try:
+      visit = _visits[type(visitor), cls]
+    except KeyError:
+      visit = _visits[type(visitor), cls] = findVisit(type(visitor), cls)
+    return runVisit(visit(visitor, self, *args))
 
   # Add the accept function to the class
   setattr(cls, "accept", accept)
   return cls
 
+# The names of the fields of each node class, including inherited ones
+_fieldNames = {}
+
+def fieldNames(cls):
+  """Return the names of the fields of a syntax tree node class, which are the
+  `__slots__` of the class and its base classes."""
+  try:
+    return _fieldNames[cls]
+  except KeyError:
+    names = _fieldNames[cls] = tuple(name for base in reversed(cls.__mro__)
+      for name in base.__dict__.get("__slots__", ()))
+    return names
+
+def isNode(x):
+  """Return whether a value is a syntax tree node. Types are shared between
+  trees, so they are not nodes."""
+  return type(x).__module__ == __name__ and not isinstance(x, Type)
+
+def iterChildren(node):
+  """Yield the nodes in the fields of a syntax tree node, in order, including
+  the nodes in fields that are lists."""
+  for name in fieldNames(type(node)):
+    value = getattr(node, name, None)
+    if isinstance(value, (list, tuple)):
+      for item in value:
+        if isNode(item):
+          yield item
+    elif isNode(value):
+      yield value
+
+def walk(node):
+  """Yield a syntax tree node and all of its descendants in preorder, without
+  recursion."""
+  stack = [node]
+  while stack:
+    node = stack.pop()
+    yield node
+    stack.extend(reversed(list(iterChildren(node))))
+
+class Return(Exception):
+  """Raised by a visit generator with its result, to return it to the visit
+  that yielded to it"""
+
+  value = property(lambda self: self.args[0] if self.args else None)
+
+def runVisit(result):
+  """Return the result of a visit function, running it first if it is a
+  generator. Each generator that a running generator yields is run in turn,
+  on an explicit stack, and any other value that it yields is sent straight
+  back to it."""
+  if type(result) is not GeneratorType:
+    return result
+
+  # The send method of each generator that is running
+  sends = [result.send]
+  send = sends[-1]
+  value = None
+  while True:
+    try:
+      result = send(value)
+    except Return, e:
+      value = e.args[0] if e.args else None
+    except StopIteration:
+      value = None
+    else:
+      if type(result) is GeneratorType:
+        send = result.send
+        sends.append(send)
+        value = None
+      else:
+        value = result
+      continue
+
+    # The generator on top of the stack has finished
+    sends.pop()
+    if not sends:
+      return value
+    send = sends[-1]
+
+class NodeVisitor(object):
+  """A base class for visitors of syntax trees
+
+  `visit` calls the visitXXX function of the visitor for the node's class, or
+  for its nearest base class that has one. Nodes without a visit function are
+  passed to `genericVisit`, which visits their children.
+  """
+
+  def visit(self, node, *args):
+    """Visit a node, returning the result of its visit function. Unlike
+    `accept`, this also works for nodes that aren't `visitable`."""
+    return runVisit(self.visitChild(node, *args))
+
+  def visitChild(self, node, *args):
+    """Call the visit function for a node without running it, for a visit
+    generator to yield."""
+    try:
+      visit = _visits[type(self), type(node)]
+    except KeyError:
+      visit = _visits[type(self), type(node)] = findVisit(type(self),
+        type(node))
+    return visit(self, node, *args)
+
+  def genericVisit(self, node, *args):
+    """Visit the children of a node that has no visit function of its own."""
+    for child in iterChildren(node):
+      yield self.visitChild(child, *args)
+
 # Built-in types
 
+# The types that have been constructed, by their class and fields
+_types = {}
+
 class Type(object):
-  """The base class for all types"""
+  """The base class for all types
+
+  Types are immutable and hash-consed: constructing a type with the same
+  fields as an existing one returns the existing type, so each scalar type is a
+  singleton and equal types are the same object. The fields are given to the
+  constructor in the order of `__slots__`.
+  """
+
+  __slots__ = ()
+
+  def __new__(cls, *fields):
+    key = (cls,) + fields
+    try:
+      return _types[key]
+    except KeyError:
+      type_ = _types[key] = object.__new__(cls)
+      for name, value in zip(cls.__slots__, fields):
+        object.__setattr__(type_, name, value)
+      return type_
+
+  def __setattr__(self, name, value):
+    raise AttributeError("types are immutable")
 
   def __repr__(self):
     return "%s()" % type(self).__name__
@@ -38,35 +203,52 @@ class Type(object):
 class IntType(Type):
   """An integer type"""
 
+  __slots__ = ()
+
 class LongType(Type):
   """A long integer type"""
 
+  __slots__ = ()
+
 class UIntType(Type):
   """An unsigned integer type"""
 
+  __slots__ = ()
+
 class ULongType(Type):
   """An unsigned long integer type"""
 
+  __slots__ = ()
+
 class FloatType(Type):
   """A single-precision floating-point type"""
 
+  __slots__ = ()
+
 class DoubleType(Type):
   """A double-precision floating-point type"""
 
+  __slots__ = ()
+
 class LongDoubleType(Type):
   """A long double floating-point type"""
 
+  __slots__ = ()
+
 class CharType(Type):
   """A character type"""
 
+  __slots__ = ()
+
 class WCharType(Type):
   """A wide character type"""
 
+  __slots__ = ()
+
 class PointerType(Type):
   """A pointer type"""
 
-  def __init__(self, inner):
-    self.inner = inner
+  __slots__ = ("inner",)
 
   def __repr__(self):
     return "%s(inner=%r)" % (type(self).__name__, self.inner)
@@ -74,9 +256,10 @@ class PointerType(Type):
 class FunType(Type):
   """A function type"""
 
-  def __init__(self, params, ret):
-    self.params = params
-    self.ret = ret
+  __slots__ = ("params", "ret")
+
+  def __new__(cls, params, ret):
+    return Type.__new__(cls, tuple(params), ret)
 
   def __repr__(self):
     return ("%s(params=%r, ret=%r)" % (type(self).__name__, self.params,
@@ -88,6 +271,8 @@ class FunType(Type):
 class TranslationUnit(object):
   """A translation unit"""
 
+  __slots__ = ("decls",)
+
   def __init__(self, decls):
     self.decls = decls
 
@@ -97,10 +282,14 @@ class TranslationUnit(object):
 class ExternalDecl(object):
   """An external declaration"""
 
+  __slots__ = ()
+
 @visitable
 class FunDef(ExternalDecl):
   """A function definition"""
 
+  __slots__ = ("declarator", "stmt")
+
   def __init__(self, declarator, stmt):
     self.declarator = declarator
     self.stmt = stmt
@@ -115,6 +304,8 @@ class FunDef(ExternalDecl):
 class Decl(object):
   """A declaration"""
 
+  __slots__ = ("pos", "inits")
+
   def __init__(self, pos, inits):
     self.pos = pos
     self.inits = inits
@@ -125,6 +316,8 @@ class Decl(object):
 class DeclSpec(object):
   """A declaration specifier"""
 
+  __slots__ = ("pos",)
+
   def __init__(self, pos):
     self.pos = pos
 
@@ -134,6 +327,8 @@ class DeclSpec(object):
 class InitDeclarator(object):
   """An initialization declarator"""
 
+  __slots__ = ("declarator", "init")
+
   def __init__(self, declarator, init):
     self.declarator = declarator
     self.init = init
@@ -145,54 +340,88 @@ class InitDeclarator(object):
 class StorageClassSpec(DeclSpec):
   """A storage class specifier"""
 
+  __slots__ = ()
+
 class TypedefStorageClassSpec(StorageClassSpec):
   """The typedef storage class"""
 
+  __slots__ = ()
+
 class ExternStorageClassSpec(StorageClassSpec):
   """The extern storage class"""
 
+  __slots__ = ()
+
 class StaticStorageClassSpec(StorageClassSpec):
   """The static storage class"""
 
+  __slots__ = ()
+
 class AutoStorageClassSpec(StorageClassSpec):
   """The auto storage class"""
 
+  __slots__ = ()
+
 class RegisterStorageClassSpec(StorageClassSpec):
   """The register storage class"""
 
+  __slots__ = ()
+
 class TypeSpec(DeclSpec):
   """A type specifier"""
 
+  __slots__ = ()
+
 class VoidTypeSpec(TypeSpec):
   """The void type specifier"""
 
+  __slots__ = ()
+
 class CharTypeSpec(TypeSpec):
   """The char type specifier"""
 
+  __slots__ = ()
+
 class ShortTypeSpec(TypeSpec):
   """The short type specifier"""
 
+  __slots__ = ()
+
 class IntTypeSpec(TypeSpec):
   """The int type specifier"""
 
+  __slots__ = ()
+
 class LongTypeSpec(TypeSpec):
   """The long type specifier"""
 
+  __slots__ = ()
+
 class FloatTypeSpec(TypeSpec):
   """The float type specifier"""
 
+  __slots__ = ()
+
 class DoubleTypeSpec(TypeSpec):
   """The double type specifier"""
 
+  __slots__ = ()
+
 class SignedTypeSpec(TypeSpec):
   """The signed type specifier"""
 
+  __slots__ = ()
+
 class UnsignedTypeSpec(TypeSpec):
   """The unsigned type specifier"""
 
+  __slots__ = ()
+
 class TypedefNameSpec(TypeSpec):
   """A typedef name type specifier"""
 
+  __slots__ = ("id",)
+
   def __init__(self, id_):
     self.id = id_
 
@@ -202,9 +431,13 @@ class TypedefNameSpec(TypeSpec):
 class StructOrUnionSpec(TypeSpec):
   """A struct or union type specifier"""
 
+  __slots__ = ()
+
 class InlineStructOrUnionSpec(StructOrUnionSpec):
   """A struct or union type specified inline"""
 
+  __slots__ = ("id", "decls")
+
   def __init__(self, id_, decls):
     self.id = id_
     self.decls = decls
@@ -215,6 +448,8 @@ class InlineStructOrUnionSpec(StructOrUnionSpec):
 class NamedStructOrUnionSpec(StructOrUnionSpec):
   """A struct or union type specified by name"""
 
+  __slots__ = ("id",)
+
   def __init__(self, id_):
     self.id = id_
 
@@ -224,27 +459,43 @@ class NamedStructOrUnionSpec(StructOrUnionSpec):
 class StructSpec(StructOrUnionSpec):
   """A struct type specifier"""
 
+  __slots__ = ()
+
 class InlineStructSpec(StructSpec, InlineStructOrUnionSpec):
   """A struct type specified inline"""
 
+  __slots__ = ()
+
 class NamedStructSpec(StructSpec, NamedStructOrUnionSpec):
   """A struct type specified by name"""
 
+  __slots__ = ()
+
 class UnionSpec(StructOrUnionSpec):
   """A union type specifier"""
 
+  __slots__ = ()
+
 class InlineUnionSpec(UnionSpec, InlineStructOrUnionSpec):
   """A union type specified inline"""
 
+  __slots__ = ()
+
 class NamedUnionSpec(UnionSpec, NamedStructOrUnionSpec):
   """A union type specified by name"""
 
+  __slots__ = ()
+
 class EnumSpec(TypeSpec):
   """An enumeration type specifier"""
 
+  __slots__ = ()
+
 class InlineEnumSpec(EnumSpec):
   """An enumeration type specified inline"""
 
+  __slots__ = ("id", "enums")
+
   def __init__(self, id_, enums):
     self.id = id_
     self.enums = enums
@@ -255,6 +506,8 @@ class InlineEnumSpec(EnumSpec):
 class NamedEnumSpec(EnumSpec):
   """An enumeration type specified by name"""
 
+  __slots__ = ("id",)
+
   def __init__(self, id_):
     self.id = id_
 
@@ -264,6 +517,8 @@ class NamedEnumSpec(EnumSpec):
 class Enumerator(object):
   """An item in an enumeration"""
 
+  __slots__ = ("id", "expr")
+
   def __init__(self, id_, expr):
     self.id = id_
     self.expr = expr
@@ -274,15 +529,23 @@ class Enumerator(object):
 class TypeQual(DeclSpec):
   """A type qualifier"""
 
+  __slots__ = ()
+
 class ConstTypeQual(TypeQual):
   """A constant type qualifier"""
 
+  __slots__ = ()
+
 class VolatileTypeQual(TypeQual):
   """A volatile type qualifier"""
 
+  __slots__ = ()
+
 class Declarator(object):
   """A declarator"""
 
+  __slots__ = ("storageClassSpec", "type")
+
   def __init__(self):
     self.storageClassSpec = None
     self.type = None
@@ -298,6 +561,8 @@ class Declarator(object):
 class PointerDeclarator(Declarator):
   """A pointer declarator"""
 
+  __slots__ = ("const", "volatile", "inner")
+
   def __init__(self, cv, inner):
     Declarator.__init__(self)
     self.const, self.volatile = cv
@@ -309,15 +574,37 @@ class PointerDeclarator(Declarator):
         self.volatile, self.inner))
 
   def applySpecs(self, storageClassSpec, typeSpec):
+    # Pointers can be nested too deeply to recurse through, so apply the specs
+    # to the innermost declarator and build the pointer types outward from it.
+    pointers = []
+    declarator = self
+    while isinstance(declarator, PointerDeclarator):
+      pointers.append(declarator)
+      declarator = declarator.inner
+    declarator.applySpecs(None, typeSpec)
+    type_ = declarator.type
+    for pointer in reversed(pointers):
+      pointer.storageClassSpec = None
+      type_ = pointer.type = PointerType(type_)
     self.storageClassSpec = storageClassSpec
-    self.inner.applySpecs(None, typeSpec)
-    self.type = PointerType(self.inner.type)
 
-  id = property(lambda self: self.inner.id)
+  id = property(lambda self: _nameDeclarator(self).id)
+
+def _nameDeclarator(declarator):
+  """Return the name declarator that a declarator is built around, walking
+  down through the declarators in a loop since they can be nested deeply."""
+  while not isinstance(declarator, NameDeclarator):
+    if isinstance(declarator, PointerDeclarator):
+      declarator = declarator.inner
+    else:
+      declarator = declarator.direct
+  return declarator
 
 class DirectDeclarator(Declarator):
   """A direct declarator"""
 
+  __slots__ = ()
+
   @classmethod
   def fromSuffixes(cls, direct, suffixes):
     """Construct a direct declarator from a declarator and a list of
@@ -328,6 +615,8 @@ class DirectDeclarator(Declarator):
 class NameDeclarator(DirectDeclarator):
   """A name declarator"""
 
+  __slots__ = ("id",)
+
   def __init__(self, id_):
     DirectDeclarator.__init__(self)
     self.id = id_
@@ -339,6 +628,8 @@ class NameDeclarator(DirectDeclarator):
 class ArrayDeclarator(DirectDeclarator):
   """An array declarator"""
 
+  __slots__ = ("direct", "expr")
+
   def __init__(self, direct, expr):
     DirectDeclarator.__init__(self)
     self.direct = direct
@@ -349,11 +640,13 @@ class ArrayDeclarator(DirectDeclarator):
       (type(self).__name__, self.storageClassSpec, self.type, self.direct,
         self.expr))
 
-  id = property(lambda self: self.direct.id)
+  id = property(lambda self: _nameDeclarator(self).id)
 
 class FunDeclarator(DirectDeclarator):
   """A function declarator"""
 
+  __slots__ = ("direct", "params")
+
   def __init__(self, direct, params):
     DirectDeclarator.__init__(self)
     self.direct = direct
@@ -368,11 +661,13 @@ class FunDeclarator(DirectDeclarator):
     self.type = FunType([param.declarator.type for param in self.params],
       IntType()) # XXX all functions return int
 
-  id = property(lambda self: self.direct.id)
+  id = property(lambda self: _nameDeclarator(self).id)
 
 class KRFunDeclarator(DirectDeclarator):
   """A K&R-style function declarator"""
 
+  __slots__ = ("direct", "ids")
+
   def __init__(self, direct, ids):
     DirectDeclarator.__init__(self)
     self.direct = direct
@@ -383,14 +678,18 @@ class KRFunDeclarator(DirectDeclarator):
       (type(self).__name__, self.storageClassSpec, self.type, self.direct,
         self.ids))
 
-  id = property(lambda self: self.direct.id)
+  id = property(lambda self: _nameDeclarator(self).id)
 
 class DirectDeclaratorSuffix(object):
   """A direct declarator suffix"""
 
+  __slots__ = ()
+
 class ArrayDeclaratorSuffix(DirectDeclaratorSuffix):
   """An array declarator suffix"""
 
+  __slots__ = ("expr",)
+
   def __init__(self, expr):
     self.expr = expr
 
@@ -405,6 +704,8 @@ class ArrayDeclaratorSuffix(DirectDeclaratorSuffix):
 class ParamDeclaratorSuffix(DirectDeclaratorSuffix):
   """A parameter list declarator suffix"""
 
+  __slots__ = ("params",)
+
   def __init__(self, params):
     self.params = params
 
@@ -419,6 +720,8 @@ class ParamDeclaratorSuffix(DirectDeclaratorSuffix):
 class KRDeclaratorSuffix(DirectDeclaratorSuffix):
   """A K&R-style names-only declarator suffix"""
 
+  __slots__ = ("ids",)
+
   def __init__(self, ids):
     self.ids = ids
 
@@ -433,6 +736,8 @@ class KRDeclaratorSuffix(DirectDeclaratorSuffix):
 class ParamDecl(object):
   """A parameter declaration"""
 
+  __slots__ = ("declarator",)
+
   def __init__(self, declarator):
     self.declarator = declarator
 
@@ -442,6 +747,8 @@ class ParamDecl(object):
 class Initializer(object):
   """An initializer"""
 
+  __slots__ = ("exprs",)
+
   def __init__(self, exprs):
     self.exprs = exprs
 
@@ -453,18 +760,24 @@ class Initializer(object):
 class Stmt(object):
   """A statement"""
 
+  __slots__ = ()
+
   def __repr__(self):
     return "%s()" % type(self).__name__
 
 class LabeledStmt(Stmt):
   """A labeled statement"""
 
+  __slots__ = ()
+
   # XXX Not implemented
 
 @visitable
 class CompoundStmt(Stmt):
   """A compound statement"""
 
+  __slots__ = ("decls", "stmts")
+
   def __init__(self, decls, stmts):
     self.decls = decls
     self.stmts = stmts
@@ -477,6 +790,8 @@ class CompoundStmt(Stmt):
 class ExprStmt(Stmt):
   """An expression statement"""
 
+  __slots__ = ("expr",)
+
   def __init__(self, expr):
     self.expr = expr
 
@@ -486,10 +801,14 @@ class ExprStmt(Stmt):
 class SelectionStmt(Stmt):
   """A selection statement"""
 
+  __slots__ = ()
+
 @visitable
 class IfStmt(SelectionStmt):
   """An if statement"""
 
+  __slots__ = ("expr", "tstmt", "fstmt")
+
   def __init__(self, expr, tstmt, fstmt):
     self.expr = expr
     self.tstmt = tstmt
@@ -504,10 +823,14 @@ class IfStmt(SelectionStmt):
 class IterationStmt(Stmt):
   """An iteration statement"""
 
+  __slots__ = ()
+
 @visitable
 class WhileStmt(IterationStmt):
   """A while statement"""
 
+  __slots__ = ("expr", "stmt")
+
   def __init__(self, expr, stmt):
     self.expr = expr
     self.stmt = stmt
@@ -522,6 +845,8 @@ class WhileStmt(IterationStmt):
 class ForStmt(IterationStmt):
   """A for statement"""
 
+  __slots__ = ("initExpr", "condExpr", "nextExpr", "stmt")
+
   def __init__(self, initExpr, condExpr, nextExpr, stmt):
     self.initExpr = initExpr
     self.condExpr = condExpr
@@ -536,6 +861,8 @@ class ForStmt(IterationStmt):
 class JumpStmt(Stmt):
   """A jump statement"""
 
+  __slots__ = ("pos",)
+
   def __init__(self, pos):
     self.pos = pos
 
@@ -545,6 +872,8 @@ class JumpStmt(Stmt):
 class GoToStmt(JumpStmt):
   """A goto statement"""
 
+  __slots__ = ("id",)
+
   def __init__(self, pos, id_):
     JumpStmt.__init__(self, pos)
     self.id = id_
@@ -556,14 +885,20 @@ class GoToStmt(JumpStmt):
 class ContinueStmt(JumpStmt):
   """A continue statement"""
 
+  __slots__ = ()
+
 @visitable
 class BreakStmt(JumpStmt):
   """A break statement"""
 
+  __slots__ = ()
+
 @visitable
 class ReturnStmt(JumpStmt):
   """A return statement"""
 
+  __slots__ = ("expr",)
+
   def __init__(self, pos, expr):
     JumpStmt.__init__(self, pos)
     self.expr = expr
@@ -576,10 +911,14 @@ class ReturnStmt(JumpStmt):
 class Expr(object):
   """An expression"""
 
+  __slots__ = ()
+
 @visitable
 class CommaExpr(Expr):
   """A comma expression"""
 
+  __slots__ = ("lexpr", "rexpr")
+
   def __init__(self, lexpr, rexpr):
     self.lexpr = lexpr
     self.rexpr = rexpr
@@ -594,6 +933,8 @@ class CommaExpr(Expr):
 class AssignExpr(Expr):
   """An assignment expression"""
 
+  __slots__ = ("lexpr", "op", "rexpr")
+
   def __init__(self, lexpr, op, rexpr):
     self.lexpr = lexpr
     self.op = op
@@ -609,6 +950,8 @@ class AssignExpr(Expr):
 class CondExpr(Expr):
   """A conditional expression"""
 
+  __slots__ = ("expr", "texpr", "fexpr")
+
   def __init__(self, expr, texpr, fexpr):
     self.expr = expr
     self.texpr = texpr
@@ -623,6 +966,8 @@ class CondExpr(Expr):
 class BinaryExpr(Expr):
   """A binary expression"""
 
+  __slots__ = ("lexpr", "rexpr")
+
   def __init__(self, lexpr, rexpr):
     self.lexpr = lexpr
     self.rexpr = rexpr
@@ -637,65 +982,97 @@ class BinaryExpr(Expr):
 class LessThanExpr(BinaryExpr):
   """A less-than expression"""
 
+  __slots__ = ()
+
 @visitable
 class GreaterThanExpr(BinaryExpr):
   """A greater-than expression"""
 
+  __slots__ = ()
+
 @visitable
 class LessThanEqualExpr(BinaryExpr):
   """A less-than-or-equal-to exression"""
 
+  __slots__ = ()
+
 @visitable
 class GreaterThanEqualExpr(BinaryExpr):
   """A greater-than-or-equal-to expression"""
 
+  __slots__ = ()
+
 @visitable
 class EqualExpr(BinaryExpr):
   """An equal-to expression"""
 
+  __slots__ = ()
+
 @visitable
 class NotEqualExpr(BinaryExpr):
   """A not-equal-to expression"""
 
+  __slots__ = ()
+
 @visitable
 class AndExpr(BinaryExpr):
   """A bitwise AND expression"""
 
+  __slots__ = ()
+
 @visitable
 class XorExpr(BinaryExpr):
   """A bitwise XOR expression"""
 
+  __slots__ = ()
+
 @visitable
 class OrExpr(BinaryExpr):
   """A bitwise OR expression"""
 
+  __slots__ = ()
+
 @visitable
 class LogicAndExpr(BinaryExpr):
   """A logical AND expression"""
 
+  __slots__ = ()
+
 @visitable
 class LogicOrExpr(BinaryExpr):
   """A logical OR expression"""
 
+  __slots__ = ()
+
 @visitable
 class MulExpr(BinaryExpr):
   """A multiplication expression"""
 
+  __slots__ = ()
+
 @visitable
 class DivExpr(BinaryExpr):
   """A division expression"""
 
+  __slots__ = ()
+
 @visitable
 class AddExpr(BinaryExpr):
   """An addition expression"""
 
+  __slots__ = ()
+
 @visitable
 class SubExpr(BinaryExpr):
   """A subtraction expression"""
 
+  __slots__ = ()
+
 class UnaryExpr(Expr):
   """A unary expression"""
 
+  __slots__ = ("pos", "expr")
+
   def __init__(self, pos, expr):
     self.pos = pos
     self.expr = expr
@@ -707,37 +1084,55 @@ class UnaryExpr(Expr):
 class PreIncExpr(UnaryExpr):
   """A pre-increment expression"""
 
+  __slots__ = ()
+
 @visitable
 class PreDecExpr(UnaryExpr):
   """A pre-decrement expression"""
 
+  __slots__ = ()
+
 @visitable
 class AddrOfExpr(UnaryExpr):
   """An address-of expression"""
 
+  __slots__ = ()
+
 @visitable
 class DerefExpr(UnaryExpr):
   """A dereference expression"""
 
+  __slots__ = ()
+
 @visitable
 class PlusExpr(UnaryExpr):
   """A unary plus expression"""
 
+  __slots__ = ()
+
 @visitable
 class NegExpr(UnaryExpr):
   """A negation expression"""
 
+  __slots__ = ()
+
 @visitable
 class NotExpr(UnaryExpr):
   """A bitwise NOT expression"""
 
+  __slots__ = ()
+
 @visitable
 class LogicNotExpr(UnaryExpr):
   """A logical NOT expression"""
 
+  __slots__ = ()
+
 class PostfixExpr(Expr):
   """A postfix expression"""
 
+  __slots__ = ("expr",)
+
   def __init__(self, expr):
     self.expr = expr
 
@@ -750,6 +1145,8 @@ class PostfixExpr(Expr):
 class CallExpr(PostfixExpr):
   """A function call expression"""
 
+  __slots__ = ("argExprs",)
+
   def __init__(self, expr, argExprs):
     PostfixExpr.__init__(self, expr)
     self.argExprs = argExprs
@@ -762,20 +1159,32 @@ class CallExpr(PostfixExpr):
 class PostIncExpr(PostfixExpr):
   """A post-increment expression"""
 
+  __slots__ = ()
+
 @visitable
 class PostDecExpr(PostfixExpr):
   """A post-decrement expression"""
 
+  __slots__ = ()
+
 class PrimaryExpr(Expr):
   """A primary expression"""
 
+  __slots__ = ()
+
 @visitable
 class VarExpr(PrimaryExpr):
   """A variable expression"""
 
+  __slots__ = ("pos", "id", "binding", "depth")
+
   def __init__(self, pos, id_):
     self.pos = pos
     self.id = id_
+    # The variable and the scope depth that the name refers to, which are set
+    # by c.resolver
+    self.binding = None
+    self.depth = None
 
   def __repr__(self):
     return "%s(pos=%r, id_=%r)" % (type(self).__name__, self.pos, self.id)
@@ -784,6 +1193,8 @@ class VarExpr(PrimaryExpr):
 class ConstExpr(PrimaryExpr):
   """A constant expression"""
 
+  __slots__ = ("pos", "type", "val")
+
   def __init__(self, pos, type_, val):
     self.pos = pos
     self.type = type_
@@ -796,6 +1207,8 @@ class ConstExpr(PrimaryExpr):
 class StringLiteralExpr(PrimaryExpr):
   """A string literal expression"""
 
+  __slots__ = ("val",)
+
   def __init__(self, val):
     self.val = val
 
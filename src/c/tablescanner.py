@@ -0,0 +1,890 @@
+"""
+A table-driven scanner for ANSI C
+
+This scanner accepts exactly the same language as `scanner.CScanner`, but the
+continuation-based state machine is compiled into flat integer transition
+tables that are driven by a single loop. States that consume runs of similar
+characters (identifiers, digits, whitespace, comments, and string literals)
+skip the whole run with a regular expression derived from the same tables.
+
+The paths through the tables from the main state to each token are also
+compiled into regular expressions wherever they don't depend on anything but
+the input characters, so most tokens are recognized with a single match, and
+the tables only handle the rest (comments, escape sequences, errors, and so
+on).
+"""
+
+import re
+
+from scanner import *
+
+# Character classes
+(C_EOF, C_NEWLINE, C_SPACE, C_LETTER, C_HEXALPHA, C_E, C_F, C_LOWER_L,
+  C_UPPER_L, C_U, C_X, C_UNDERSCORE, C_ALNUM, C_DIGIT0, C_DIGIT17, C_DIGIT89,
+  C_PERIOD, C_GREATER, C_LESS, C_PLUS, C_MINUS, C_STAR, C_SLASH, C_PERCENT,
+  C_TILDE, C_AMP, C_CARET, C_PIPE, C_EQUAL, C_EXCL, C_SEMICOLON, C_LCURLY,
+  C_RCURLY, C_COMMA, C_COLON, C_LPAREN, C_RPAREN, C_LSQUARE, C_RSQUARE,
+  C_QUESTION, C_QUOTE, C_DQUOTE, C_BACKSLASH, C_OTHER) = range(44)
+NCLASSES = 44
+
+_PUNCTUATION_CLASSES = {
+  '\n': C_NEWLINE, '_': C_UNDERSCORE, '.': C_PERIOD, '>': C_GREATER,
+  '<': C_LESS, '+': C_PLUS, '-': C_MINUS, '*': C_STAR, '/': C_SLASH,
+  '%': C_PERCENT, '~': C_TILDE, '&': C_AMP, '^': C_CARET, '|': C_PIPE,
+  '=': C_EQUAL, '!': C_EXCL, ';': C_SEMICOLON, '{': C_LCURLY, '}': C_RCURLY,
+  ',': C_COMMA, ':': C_COLON, '(': C_LPAREN, ')': C_RPAREN, '[': C_LSQUARE,
+  ']': C_RSQUARE, '?': C_QUESTION, '\'': C_QUOTE, '"': C_DQUOTE,
+  '\\': C_BACKSLASH, 'e': C_E, 'E': C_E, 'f': C_F, 'F': C_F, 'l': C_LOWER_L,
+  'L': C_UPPER_L, 'u': C_U, 'U': C_U, 'x': C_X, 'X': C_X, '0': C_DIGIT0,
+  '8': C_DIGIT89, '9': C_DIGIT89}
+
+def classify(c):
+  """Return the character class of a single character."""
+  try:
+    return _PUNCTUATION_CLASSES[c]
+  except KeyError:
+    pass
+
+  if c in "abcdABCD":
+    return C_HEXALPHA
+  elif c in "1234567":
+    return C_DIGIT17
+  elif c.isalpha():
+    return C_LETTER
+  elif c.isdigit():
+    # Digits outside of [0-9] are never valid in any base, just like 8 and 9
+    # are never valid octal digits.
+    return C_DIGIT89
+  elif c.isalnum():
+    return C_ALNUM
+  elif c.isspace():
+    return C_SPACE
+  else:
+    return C_OTHER
+
+# Character classes for every ASCII character, extended lazily on lookup.
+# Byte and Unicode strings are classified separately, since non-ASCII bytes are
+# never letters.
+CLASSES = dict((chr(i), classify(chr(i))) for i in xrange(128))
+UNICODE_CLASSES = dict((unichr(i), classify(unichr(i))) for i in xrange(128))
+
+# Groups of character classes
+LETTERS = (C_LETTER, C_HEXALPHA, C_E, C_F, C_LOWER_L, C_UPPER_L, C_U, C_X)
+DIGITS = (C_DIGIT0, C_DIGIT17, C_DIGIT89)
+OCTAL_DIGITS = (C_DIGIT0, C_DIGIT17)
+HEX_DIGITS = DIGITS + (C_HEXALPHA, C_E, C_F)
+ALNUMS = LETTERS + DIGITS + (C_ALNUM,)
+IDENTIFIER_CHARS = ALNUMS + (C_UNDERSCORE,)
+
+# Actions
+A_CONSUME = 0
+"""Consume the current character."""
+A_APPEND = 1
+"""Consume the current character, appending it to the token buffer."""
+A_PASS = 2
+"""Pass the current character to the next state."""
+A_EMIT = 3
+"""Emit the token given by the argument, passing the current character to the
+next state."""
+A_EMIT_CONSUME = 4
+"""Emit the token given by the argument after consuming the current
+character."""
+A_ERROR = 5
+"""Raise the error given by the argument at the current character."""
+A_BASE = 6
+"""Consume the current character, setting the numeric base to the argument."""
+A_PASS_BASE = 7
+"""Pass the current character to the next state, setting the numeric base to
+the argument."""
+A_APPEND_OCTAL = 8
+"""Append a digit that is invalid in an octal constant."""
+A_ERROR_OCTAL = 9
+"""Raise an error for the last invalid octal digit."""
+A_ESCAPE = 10
+"""Consume an escaped character, appending its value to the token buffer."""
+A_PERIODS = 11
+"""Emit the number of period tokens given by the argument."""
+A_PERIOD_NUMBER = 12
+"""Emit the number of period tokens given by the argument, then start a
+floating-point constant at the last period consumed."""
+A_EOF = 13
+"""Finish scanning."""
+
+# Error messages, which are formatted with the current character
+(E_UNRECOGNIZED, E_COMMENT_EOF, E_INT_SUFFIX, E_FLOAT_SUFFIX, E_EXPONENT,
+  E_CHAR_CLOSE, E_STRING_EOF, E_HEX_FLOAT) = range(8)
+ERRORS = [
+  "unrecognized character: `%s'",
+  "unexpected EOF in comment",
+  "invalid suffix `%s' on integer constant",
+  "invalid suffix `%s' on floating constant",
+  "exponent has no digits",
+  "missing terminating ' character",
+  "unexpected EOF in string literal",
+  "hexadecimal floating constants are not supported"]
+
+# Brackets, mapped to (index into the open bracket counts, change in count)
+BRACKETS = {
+  LParenToken: (0, 1), RParenToken: (0, -1),
+  LCurlyToken: (1, 1), RCurlyToken: (1, -1),
+  LSquareToken: (2, 1), RSquareToken: (2, -1)}
+OPEN_BRACKETS = "({["
+CLOSE_BRACKETS = ")}]"
+
+# The state machine
+# Each state maps character classes to (action, argument, next state).
+# Classes that are not listed use the state's default transition, and later
+# entries override earlier ones.
+STATES = [
+  # The main sequence of tokens (CScanner._main)
+  ("MAIN", (A_ERROR, E_UNRECOGNIZED, "MAIN"), [
+    ((C_EOF,), (A_EOF, None, None)),
+    ((C_NEWLINE, C_SPACE), (A_CONSUME, None, "MAIN")),
+    ((C_LETTER, C_HEXALPHA, C_E, C_F, C_LOWER_L, C_U, C_X, C_UNDERSCORE),
+      (A_CONSUME, None, "IDENTIFIER")),
+    ((C_UPPER_L,), (A_CONSUME, None, "WIDE")),
+    ((C_DIGIT0,), (A_APPEND, None, "HEX_OR_OCTAL")),
+    ((C_DIGIT17, C_DIGIT89), (A_PASS_BASE, 10, "DIGITS")),
+    ((C_QUOTE,), (A_CONSUME, None, "CHAR")),
+    ((C_DQUOTE,), (A_CONSUME, None, "STRING")),
+    ((C_PERIOD,), (A_CONSUME, None, "DOT")),
+    ((C_GREATER,), (A_CONSUME, None, "GREATER")),
+    ((C_LESS,), (A_CONSUME, None, "LESS")),
+    ((C_PLUS,), (A_CONSUME, None, "PLUS")),
+    ((C_MINUS,), (A_CONSUME, None, "MINUS")),
+    ((C_STAR,), (A_CONSUME, None, "STAR")),
+    ((C_SLASH,), (A_CONSUME, None, "SLASH")),
+    ((C_PERCENT,), (A_CONSUME, None, "PERCENT")),
+    ((C_TILDE,), (A_EMIT_CONSUME, NotToken, "MAIN")),
+    ((C_AMP,), (A_CONSUME, None, "AMP")),
+    ((C_CARET,), (A_CONSUME, None, "CARET")),
+    ((C_PIPE,), (A_CONSUME, None, "PIPE")),
+    ((C_EQUAL,), (A_CONSUME, None, "EQUAL")),
+    ((C_EXCL,), (A_CONSUME, None, "EXCL")),
+    ((C_SEMICOLON,), (A_EMIT_CONSUME, SemicolonToken, "MAIN")),
+    ((C_LCURLY,), (A_EMIT_CONSUME, LCurlyToken, "MAIN")),
+    ((C_RCURLY,), (A_EMIT_CONSUME, RCurlyToken, "MAIN")),
+    ((C_COMMA,), (A_EMIT_CONSUME, CommaToken, "MAIN")),
+    ((C_COLON,), (A_CONSUME, None, "COLON")),
+    ((C_LPAREN,), (A_EMIT_CONSUME, LParenToken, "MAIN")),
+    ((C_RPAREN,), (A_EMIT_CONSUME, RParenToken, "MAIN")),
+    ((C_LSQUARE,), (A_EMIT_CONSUME, LSquareToken, "MAIN")),
+    ((C_RSQUARE,), (A_EMIT_CONSUME, RSquareToken, "MAIN")),
+    ((C_QUESTION,), (A_EMIT_CONSUME, QuestionToken, "MAIN"))]),
+
+  # Identifiers and keywords (IdentifierOrKeywordScanner)
+  ("IDENTIFIER", (A_EMIT, IdentifierToken, "MAIN"), [
+    (IDENTIFIER_CHARS, (A_CONSUME, None, "IDENTIFIER"))]),
+  ("WIDE", (A_PASS, None, "IDENTIFIER"), [
+    ((C_QUOTE,), (A_CONSUME, None, "WCHAR")),
+    ((C_DQUOTE,), (A_CONSUME, None, "WSTRING"))]),
+
+  # Numeric constants (NumberScanner)
+  ("HEX_OR_OCTAL", (A_PASS_BASE, 8, "OCTAL_DIGITS"), [
+    ((C_X,), (A_BASE, 16, "HEX_DIGITS"))]),
+  ("DIGITS", (A_PASS, None, "INT_SUFFIX"), [
+    (DIGITS, (A_APPEND, None, "DIGITS")),
+    ((C_PERIOD,), (A_APPEND, None, "DECIMAL")),
+    ((C_E,), (A_APPEND, None, "EXPONENT")),
+    ((C_F,), (A_PASS, None, "FLOAT_SUFFIX"))]),
+  ("OCTAL_DIGITS", (A_PASS, None, "INT_SUFFIX"), [
+    (OCTAL_DIGITS, (A_APPEND, None, "OCTAL_DIGITS")),
+    ((C_DIGIT89,), (A_APPEND_OCTAL, None, "BAD_OCTAL_DIGITS")),
+    ((C_PERIOD,), (A_APPEND, None, "DECIMAL")),
+    ((C_E,), (A_APPEND, None, "EXPONENT")),
+    ((C_F,), (A_PASS, None, "FLOAT_SUFFIX"))]),
+  # Deferred until we know this isn't a floating-point constant
+  ("BAD_OCTAL_DIGITS", (A_ERROR_OCTAL, None, None), [
+    (OCTAL_DIGITS, (A_APPEND, None, "BAD_OCTAL_DIGITS")),
+    ((C_DIGIT89,), (A_APPEND_OCTAL, None, "BAD_OCTAL_DIGITS")),
+    ((C_PERIOD,), (A_APPEND, None, "DECIMAL")),
+    ((C_E,), (A_APPEND, None, "EXPONENT")),
+    ((C_F,), (A_PASS, None, "FLOAT_SUFFIX"))]),
+  ("HEX_DIGITS", (A_PASS, None, "INT_SUFFIX"), [
+    (HEX_DIGITS, (A_APPEND, None, "HEX_DIGITS")),
+    ((C_PERIOD,), (A_ERROR, E_HEX_FLOAT, None))]),
+  ("INT_SUFFIX", (A_EMIT, IntToken, "MAIN"), [
+    (ALNUMS, (A_ERROR, E_INT_SUFFIX, None)),
+    ((C_U,), (A_CONSUME, None, "INT_SUFFIX_U")),
+    ((C_LOWER_L, C_UPPER_L), (A_CONSUME, None, "INT_SUFFIX_L"))]),
+  ("INT_SUFFIX_U", (A_EMIT, UIntToken, "MAIN"), [
+    (ALNUMS, (A_ERROR, E_INT_SUFFIX, None)),
+    ((C_LOWER_L, C_UPPER_L), (A_CONSUME, None, "INT_SUFFIX_UL"))]),
+  ("INT_SUFFIX_L", (A_EMIT, LongToken, "MAIN"), [
+    (ALNUMS, (A_ERROR, E_INT_SUFFIX, None)),
+    ((C_U,), (A_CONSUME, None, "INT_SUFFIX_UL"))]),
+  ("INT_SUFFIX_UL", (A_EMIT, ULongToken, "MAIN"), [
+    (ALNUMS, (A_ERROR, E_INT_SUFFIX, None))]),
+  ("DECIMAL", (A_PASS, None, "FLOAT_SUFFIX"), [
+    (DIGITS, (A_APPEND, None, "DECIMAL")),
+    ((C_E,), (A_APPEND, None, "EXPONENT"))]),
+  # Anything after the 'e' other than a digit is consumed, and only signs are
+  # kept.
+  ("EXPONENT", (A_CONSUME, None, "EXPONENT_SIGN"), [
+    (DIGITS, (A_PASS, None, "EXPONENT_DIGITS")),
+    ((C_PLUS, C_MINUS), (A_APPEND, None, "EXPONENT_SIGN"))]),
+  ("EXPONENT_SIGN", (A_ERROR, E_EXPONENT, None), [
+    (DIGITS, (A_PASS, None, "EXPONENT_DIGITS"))]),
+  ("EXPONENT_DIGITS", (A_PASS, None, "FLOAT_SUFFIX"), [
+    (DIGITS, (A_APPEND, None, "EXPONENT_DIGITS"))]),
+  ("FLOAT_SUFFIX", (A_EMIT, DoubleToken, "MAIN"), [
+    (ALNUMS, (A_ERROR, E_FLOAT_SUFFIX, None)),
+    ((C_F,), (A_CONSUME, None, "FLOAT_SUFFIX_F")),
+    ((C_LOWER_L, C_UPPER_L), (A_CONSUME, None, "FLOAT_SUFFIX_L"))]),
+  ("FLOAT_SUFFIX_F", (A_EMIT, FloatToken, "MAIN"), [
+    (ALNUMS, (A_ERROR, E_FLOAT_SUFFIX, None))]),
+  ("FLOAT_SUFFIX_L", (A_EMIT, LongDoubleToken, "MAIN"), [
+    (ALNUMS, (A_ERROR, E_FLOAT_SUFFIX, None))]),
+
+  # Character constants (CharScanner)
+  ("CHAR", (A_APPEND, None, "CHAR_CLOSE"), [
+    ((C_EOF,), (A_PASS, None, "CHAR_CLOSE")),
+    ((C_BACKSLASH,), (A_CONSUME, None, "CHAR_ESCAPE"))]),
+  ("CHAR_ESCAPE", (A_ESCAPE, None, "CHAR_CLOSE"), [
+    ((C_EOF,), (A_PASS, None, "CHAR_CLOSE"))]),
+  ("CHAR_CLOSE", (A_ERROR, E_CHAR_CLOSE, None), [
+    ((C_QUOTE,), (A_EMIT_CONSUME, CharToken, "MAIN"))]),
+  ("WCHAR", (A_APPEND, None, "WCHAR_CLOSE"), [
+    ((C_EOF,), (A_PASS, None, "WCHAR_CLOSE")),
+    ((C_BACKSLASH,), (A_CONSUME, None, "WCHAR_ESCAPE"))]),
+  ("WCHAR_ESCAPE", (A_ESCAPE, None, "WCHAR_CLOSE"), [
+    ((C_EOF,), (A_PASS, None, "WCHAR_CLOSE"))]),
+  ("WCHAR_CLOSE", (A_ERROR, E_CHAR_CLOSE, None), [
+    ((C_QUOTE,), (A_EMIT_CONSUME, WCharToken, "MAIN"))]),
+
+  # String literals (StringScanner)
+  ("STRING", (A_APPEND, None, "STRING"), [
+    ((C_EOF,), (A_ERROR, E_STRING_EOF, None)),
+    ((C_BACKSLASH,), (A_CONSUME, None, "STRING_ESCAPE")),
+    ((C_DQUOTE,), (A_EMIT_CONSUME, StringToken, "MAIN"))]),
+  ("STRING_ESCAPE", (A_ESCAPE, None, "STRING"), [
+    ((C_EOF,), (A_ERROR, E_STRING_EOF, None))]),
+  ("WSTRING", (A_APPEND, None, "WSTRING"), [
+    ((C_EOF,), (A_ERROR, E_STRING_EOF, None)),
+    ((C_BACKSLASH,), (A_CONSUME, None, "WSTRING_ESCAPE")),
+    ((C_DQUOTE,), (A_EMIT_CONSUME, WStringToken, "MAIN"))]),
+  ("WSTRING_ESCAPE", (A_ESCAPE, None, "WSTRING"), [
+    ((C_EOF,), (A_ERROR, E_STRING_EOF, None))]),
+
+  # Comments
+  ("COMMENT", (A_CONSUME, None, "COMMENT"), [
+    ((C_EOF,), (A_ERROR, E_COMMENT_EOF, None)),
+    ((C_STAR,), (A_CONSUME, None, "COMMENT_STAR"))]),
+  ("COMMENT_STAR", (A_PASS, None, "COMMENT"), [
+    ((C_SLASH,), (A_CONSUME, None, "MAIN"))]),
+
+  # Operators and punctuators
+  ("DOT", (A_EMIT, PeriodToken, "MAIN"), [
+    ((C_PERIOD,), (A_CONSUME, None, "DOT2")),
+    (DIGITS, (A_PERIOD_NUMBER, 0, "DECIMAL"))]),
+  ("DOT2", (A_PERIODS, 2, "MAIN"), [
+    ((C_PERIOD,), (A_CONSUME, None, "DOT3")),
+    (DIGITS, (A_PERIOD_NUMBER, 1, "DECIMAL"))]),
+  ("DOT3", (A_EMIT, EllipsisToken, "MAIN"), [
+    (DIGITS, (A_PERIOD_NUMBER, 2, "DECIMAL"))]),
+  ("GREATER", (A_EMIT, GreaterThanToken, "MAIN"), [
+    ((C_GREATER,), (A_CONSUME, None, "GREATER2")),
+    ((C_EQUAL,), (A_EMIT_CONSUME, GreaterThanEqualToken, "MAIN"))]),
+  ("GREATER2", (A_EMIT, RightShiftToken, "MAIN"), [
+    ((C_EQUAL,), (A_EMIT_CONSUME, RightShiftAssignToken, "MAIN"))]),
+  ("LESS", (A_EMIT, LessThanToken, "MAIN"), [
+    ((C_LESS,), (A_CONSUME, None, "LESS2")),
+    ((C_EQUAL,), (A_EMIT_CONSUME, LessThanEqualToken, "MAIN")),
+    ((C_PERCENT,), (A_EMIT_CONSUME, LCurlyToken, "MAIN")), # Digraph
+    ((C_COLON,), (A_EMIT_CONSUME, LSquareToken, "MAIN"))]), # Digraph
+  ("LESS2", (A_EMIT, LeftShiftToken, "MAIN"), [
+    ((C_EQUAL,), (A_EMIT_CONSUME, LeftShiftAssignToken, "MAIN"))]),
+  ("PLUS", (A_EMIT, AddToken, "MAIN"), [
+    ((C_EQUAL,), (A_EMIT_CONSUME, AddAssignToken, "MAIN")),
+    ((C_PLUS,), (A_EMIT_CONSUME, IncrementToken, "MAIN"))]),
+  ("MINUS", (A_EMIT, SubToken, "MAIN"), [
+    ((C_EQUAL,), (A_EMIT_CONSUME, SubAssignToken, "MAIN")),
+    ((C_MINUS,), (A_EMIT_CONSUME, DecrementToken, "MAIN")),
+    ((C_GREATER,), (A_EMIT_CONSUME, ArrowToken, "MAIN"))]),
+  ("STAR", (A_EMIT, StarToken, "MAIN"), [
+    ((C_EQUAL,), (A_EMIT_CONSUME, MulAssignToken, "MAIN"))]),
+  ("SLASH", (A_EMIT, DivToken, "MAIN"), [
+    ((C_STAR,), (A_CONSUME, None, "COMMENT")),
+    ((C_EQUAL,), (A_EMIT_CONSUME, DivAssignToken, "MAIN"))]),
+  ("PERCENT", (A_EMIT, ModToken, "MAIN"), [
+    ((C_EQUAL,), (A_EMIT_CONSUME, ModAssignToken, "MAIN")),
+    ((C_GREATER,), (A_EMIT_CONSUME, RCurlyToken, "MAIN"))]), # Digraph
+  ("AMP", (A_EMIT, AmpersandToken, "MAIN"), [
+    ((C_EQUAL,), (A_EMIT_CONSUME, AndAssignToken, "MAIN")),
+    ((C_AMP,), (A_EMIT_CONSUME, LogicAndToken, "MAIN"))]),
+  ("CARET", (A_EMIT, XorToken, "MAIN"), [
+    ((C_EQUAL,), (A_EMIT_CONSUME, XorAssignToken, "MAIN"))]),
+  ("PIPE", (A_EMIT, OrToken, "MAIN"), [
+    ((C_EQUAL,), (A_EMIT_CONSUME, OrAssignToken, "MAIN")),
+    ((C_PIPE,), (A_EMIT_CONSUME, LogicOrToken, "MAIN"))]),
+  ("EQUAL", (A_EMIT, AssignToken, "MAIN"), [
+    ((C_EQUAL,), (A_EMIT_CONSUME, EqualToken, "MAIN"))]),
+  ("EXCL", (A_EMIT, LogicNotToken, "MAIN"), [
+    ((C_EQUAL,), (A_EMIT_CONSUME, NotEqualToken, "MAIN"))]),
+  ("COLON", (A_EMIT, ColonToken, "MAIN"), [
+    ((C_GREATER,), (A_EMIT_CONSUME, RSquareToken, "MAIN"))])] # Digraph
+
+STATE_NAMES = [name for name, _, _ in STATES]
+STATE_IDS = dict((name, i) for i, name in enumerate(STATE_NAMES))
+S_MAIN = STATE_IDS["MAIN"]
+
+def _compileTables(states):
+  """Compile a list of state descriptions into flat (action, argument, next
+  state) tables indexed by state * NCLASSES + character class."""
+  actions, args, nexts = [], [], []
+
+  for name, default, transitions in states:
+    row = [default] * NCLASSES
+    for classes, transition in transitions:
+      for cls in classes:
+        row[cls] = transition
+
+    for action, arg, next_ in row:
+      actions.append(action)
+      args.append(arg)
+      nexts.append(STATE_IDS[next_] if next_ is not None else -1)
+
+  return actions, args, nexts
+
+ACTIONS, ARGS, NEXTS = _compileTables(STATES)
+
+def _compileRuns(states):
+  """Return (regular expression, action) for each state, where the regular
+  expression matches the longest run of ASCII characters that loop back to that
+  state using the action, or None if there are no such characters."""
+  runs = []
+
+  for state, name in enumerate(STATE_NAMES):
+    chars = []
+    runAction = None
+    for c, cls in sorted(CLASSES.iteritems()):
+      i = state * NCLASSES + cls
+      if ACTIONS[i] in (A_CONSUME, A_APPEND) and NEXTS[i] == state:
+        assert runAction in (None, ACTIONS[i])
+        runAction = ACTIONS[i]
+        chars.append(c)
+
+    if chars:
+      runs.append((re.compile("[%s]+" % "".join(re.escape(c) for c in chars)),
+        runAction))
+    else:
+      runs.append((None, None))
+
+  return runs
+
+RUNS = _compileRuns(STATES)
+
+def _transitions(state):
+  """Return ({transition: [ASCII characters]}, EOF transition) for a state."""
+  transitions = {}
+  for c, cls in sorted(CLASSES.iteritems()):
+    t = state * NCLASSES + cls
+    transitions.setdefault((ACTIONS[t], ARGS[t], NEXTS[t]), []).append(c)
+  t = state * NCLASSES + C_EOF
+  return transitions, (ACTIONS[t], ARGS[t], NEXTS[t])
+
+def _charset(chars):
+  """Return a regular expression that matches any of the given characters."""
+  return "[%s]" % "".join(re.escape(c) for c in chars)
+
+# Kinds of token values
+(V_NONE, V_IDENTIFIER, V_INT, V_FLOAT, V_TEXT) = range(5)
+INT_TOKENS = (IntToken, UIntToken, LongToken, ULongToken)
+FLOAT_TOKENS = (FloatToken, DoubleToken, LongDoubleToken)
+
+def _valueKind(cls):
+  """Return the kind of value that a token type carries."""
+  if cls is IdentifierToken:
+    return V_IDENTIFIER
+  elif cls in INT_TOKENS:
+    return V_INT
+  elif cls in FLOAT_TOKENS:
+    return V_FLOAT
+  elif issubclass(cls, ValueToken):
+    return V_TEXT
+  else:
+    return V_NONE
+
+def _consumed(prefix, suffix, n):
+  """Return (prefix, suffix) as described by `_compileTokenPattern` after `n`
+  characters that are not buffered are consumed, where `n` is None for any
+  number of characters."""
+  if suffix is None:
+    if prefix is None or n is None:
+      return None, None
+    return prefix + n, None
+  elif n is None:
+    return prefix, None
+  else:
+    return prefix, suffix + n
+
+def _compileTransition(transition, chars, eof, groups, base, prefix, suffix,
+    path):
+  """Return a regular expression for a single transition out of the last state
+  in `path`, as described by `_compileTokenPattern`, or None."""
+  action, arg, next_ = transition
+  chars = _charset(chars)
+
+  if action in (A_PASS, A_PASS_BASE):
+    pattern = _compileTokenPattern(next_, groups,
+      arg if action == A_PASS_BASE else base, prefix, suffix, path)
+    if pattern is not None:
+      return "(?=%s)%s" % (chars, pattern)
+
+  elif action in (A_CONSUME, A_BASE):
+    prefix, suffix = _consumed(prefix, suffix, 1)
+    pattern = _compileTokenPattern(next_, groups,
+      arg if action == A_BASE else base, prefix, suffix, path)
+    if pattern is not None:
+      return chars + pattern
+
+  elif action == A_APPEND and not suffix:
+    pattern = _compileTokenPattern(next_, groups, base, prefix, 0, path)
+    if pattern is not None:
+      return chars + pattern
+
+  elif action in (A_EMIT, A_EMIT_CONSUME):
+    consumed = action == A_EMIT_CONSUME
+    kind = _valueKind(arg)
+    if consumed:
+      prefix, suffix = _consumed(prefix, suffix, 1)
+    if kind in (V_INT, V_FLOAT, V_TEXT) and (prefix is None or suffix is None or
+        (kind == V_INT and base is None)):
+      return None
+
+    groups.append((arg, consumed, BRACKETS.get(arg), kind, base, prefix,
+      suffix or 0))
+    if consumed:
+      return chars + "()"
+    elif eof == transition:
+      # The next character is only looked at, so it must be one that the
+      # tables would emit this token for.
+      return "(?=%s|\\Z)()" % chars
+    else:
+      return "(?=%s)()" % chars
+
+  return None
+
+def _compileTokenPattern(state, groups, base=None, prefix=0, suffix=None,
+    path=()):
+  """Return a regular expression that matches the ASCII input from the given
+  state up to the point at which a token is emitted, or None if there is no
+  such input.
+
+  Only transitions that pass, consume, or buffer characters or emit tokens are
+  followed, so input that the expression does not match must be scanned with
+  the tables. Each emitted token is marked by an empty group, and (token type,
+  whether the last character was consumed, bracket, value kind, base, prefix,
+  suffix) is appended to `groups` for each group, where bracket is the token's
+  entry in BRACKETS, if any.
+
+  The token buffer is the text of the token without the first `prefix` and last
+  `suffix` characters. `suffix` is None until a character is buffered, after
+  which characters may only be buffered until `suffix` is nonzero. Either is
+  None once it varies, in which case only tokens that don't use the buffer can
+  be emitted.
+  """
+  if state == S_MAIN or state in path:
+    return None
+  path += (state,)
+  transitions, eof = _transitions(state)
+
+  loop = ""
+  if (A_CONSUME, None, state) in transitions:
+    loop = _charset(transitions.pop((A_CONSUME, None, state))) + "*"
+    prefix, suffix = _consumed(prefix, suffix, None)
+  elif (A_APPEND, None, state) in transitions:
+    if suffix:
+      return None
+    loop = _charset(transitions.pop((A_APPEND, None, state))) + "*"
+    suffix = 0
+
+  alternatives = []
+  for transition, chars in sorted(transitions.iteritems()):
+    pattern = _compileTransition(transition, chars, eof, groups, base, prefix,
+      suffix, path)
+    if pattern is not None:
+      alternatives.append(pattern)
+
+  if not alternatives:
+    return None
+  return "%s(?:%s)" % (loop, "|".join(alternatives))
+
+def _compileMainPatterns():
+  """Return a list of (regular expression, groups) for tokens beginning in the
+  main state, as described by `_compileTokenPattern`.
+
+  The first expression matches a run of whitespace in group 1, followed by an
+  optional token. The expressions are split so that none of them has more
+  groups than the `re` module supports, and the others are only tried if the
+  first doesn't match a token.
+  """
+  transitions, eof = _transitions(S_MAIN)
+  spaces = _charset(transitions.pop((A_CONSUME, None, S_MAIN)))
+
+  compiled = []
+  for transition, chars in sorted(transitions.iteritems()):
+    transitionGroups = []
+    pattern = _compileTransition(transition, chars, eof, transitionGroups,
+      None, 0, None, (S_MAIN,))
+    if pattern is not None:
+      compiled.append((len(transitionGroups), pattern, transitionGroups))
+
+  # Put as many tokens as possible in the first expression.
+  patterns = []
+  alternatives = []
+  groups = [None, None]
+  for _, pattern, transitionGroups in sorted(compiled):
+    if len(groups) + len(transitionGroups) > 100:
+      patterns.append((alternatives, groups))
+      alternatives = []
+      groups = [None]
+    alternatives.append(pattern)
+    groups.extend(transitionGroups)
+  patterns.append((alternatives, groups))
+
+  (first, firstGroups), rest = patterns[0], patterns[1:]
+  return ([(re.compile("(%s*)(?:%s)?" % (spaces, "|".join(first))),
+    firstGroups)] + [(re.compile("|".join(alternatives)), groups)
+    for alternatives, groups in rest])
+
+MAIN_PATTERNS = _compileMainPatterns()
+
+def _position(str_, off):
+  """Return the position of the given offset in an input string."""
+  return SourcePosition(LineIndex(str_), off)
+
+def _value(cls, str_, start, end, buf, base):
+  """Return the value of a token given its type and the scanned input."""
+  if cls is IdentifierToken:
+    val = str_[start:end]
+    if val in IdentifierOrKeywordScanner.KEYWORDS:
+      return KeywordToken, val
+    return cls, val
+  elif cls in INT_TOKENS:
+    return cls, int("".join(buf), base)
+  elif cls in FLOAT_TOKENS:
+    return cls, float("".join(buf))
+  elif cls in (CharToken, WCharToken, StringToken, WStringToken):
+    return cls, "".join(buf)
+  else:
+    return cls, None
+
+def scanRaw(str_, start=0, opens=(0, 0, 0), newline=True, final=True):
+  """Scan an input string, yielding (token type, start offset, end offset,
+  value) tuples. Warnings are yielded with ScanWarning as the token type and the
+  message as the value.
+
+  Scanning can be restarted in the middle of a string at the end of a token,
+  given the number of each kind of bracket that is open there and whether the
+  last character that wasn't part of a token was a newline. If `final` is not
+  set, the string is only the start of the input, and scanning stops without
+  generating the tokens that are still pending when the string runs out.
+
+  Like `scanner.ScannerIter`, tokens are only released once the character after
+  them has been consumed, so an error discards exactly the same pending tokens.
+  """
+  classes = UNICODE_CLASSES if isinstance(str_, unicode) else CLASSES
+  actions = ACTIONS
+  args = ARGS
+  nexts = NEXTS
+  runs = RUNS
+  (mainPattern, mainGroups), otherPatterns = MAIN_PATTERNS[0], [
+    (pattern.match, groups) for pattern, groups in MAIN_PATTERNS[1:]]
+  mainMatch = mainPattern.match
+  keywords = IdentifierOrKeywordScanner.KEYWORDS
+  n = len(str_)
+
+  state = S_MAIN
+  i = start
+  opens = list(opens)
+  buf = []
+  base = 10
+  octOff = None
+  out = []
+
+  while True:
+    if state == S_MAIN:
+      # Try to match whitespace and a whole token at once.
+      m = mainMatch(str_, i)
+      tokStart = m.end(1)
+      if tokStart != i:
+        newline = str_[tokStart - 1] == '\n'
+        i = tokStart
+        if out:
+          for tok in out:
+            yield tok
+          del out[:]
+
+      # The group that marks the token, if any. Group 1 of the first expression
+      # is the whitespace, but in the others it marks a token.
+      groups = mainGroups
+      group = m.lastindex
+      if group == 1:
+        group = None
+        for match, groups in otherPatterns:
+          m = match(str_, i)
+          if m is not None:
+            group = m.lastindex
+            break
+
+      if group is not None:
+        tokCls, consumed, bracket, kind, tokBase, prefix, suffix = \
+          groups[group]
+        # Let the tables report unmatched brackets.
+        if bracket is None or opens[bracket[0]] + bracket[1] >= 0:
+          if bracket is not None:
+            opens[bracket[0]] += bracket[1]
+          newline = False
+          if out:
+            for tok in out:
+              yield tok
+            del out[:]
+
+          j = m.end()
+          if kind == V_NONE:
+            val = None
+          elif kind == V_IDENTIFIER:
+            val = str_[i:j]
+            if val in keywords:
+              tokCls = KeywordToken
+          elif kind == V_INT:
+            val = int(str_[i + prefix:j - suffix], tokBase)
+          elif kind == V_FLOAT:
+            val = float(str_[i + prefix:j - suffix])
+          else:
+            val = str_[i + prefix:j - suffix]
+
+          if consumed:
+            yield (tokCls, i, j, val)
+          else:
+            out.append((tokCls, i, j, val))
+          i = j
+          continue
+
+    if i < n:
+      c = str_[i]
+      try:
+        cls = classes[c]
+      except KeyError:
+        cls = classes[c] = classify(c)
+    elif not final:
+      return
+    else:
+      c = None
+      cls = C_EOF
+
+    if state == S_MAIN:
+      start = i
+      if cls != C_EOF:
+        newline = cls == C_NEWLINE
+
+    t = state * NCLASSES + cls
+    action = actions[t]
+
+    if action == A_CONSUME or action == A_APPEND:
+      if action == A_APPEND:
+        buf.append(c)
+      i += 1
+      state = nexts[t]
+
+      # Skip the rest of a run of similar characters
+      run, runAction = runs[state]
+      if run is not None:
+        m = run.match(str_, i)
+        if m:
+          j = m.end()
+          if runAction == A_APPEND:
+            buf.append(str_[i:j])
+          elif state == S_MAIN:
+            newline = str_[j - 1] == '\n'
+          i = j
+
+    elif action == A_PASS:
+      state = nexts[t]
+      continue
+
+    elif action == A_EMIT or action == A_EMIT_CONSUME:
+      end = i if action == A_EMIT else i + 1
+      tokCls, val = _value(args[t], str_, start, end, buf, base)
+      del buf[:]
+
+      # Keep track of brackets
+      try:
+        index, change = BRACKETS[tokCls]
+      except KeyError:
+        pass
+      else:
+        opens[index] += change
+        if opens[index] < 0:
+          raise ScanError(_position(str_, start), "unmatched `%s'" %
+            CLOSE_BRACKETS[index])
+
+      out.append((tokCls, start, end, val))
+      state = nexts[t]
+      if action == A_EMIT:
+        continue
+      i += 1
+
+    elif action == A_PASS_BASE:
+      base = args[t]
+      state = nexts[t]
+      continue
+
+    elif action == A_BASE:
+      base = args[t]
+      i += 1
+      state = nexts[t]
+
+    elif action == A_APPEND_OCTAL:
+      buf.append(c)
+      octOff = i
+      i += 1
+      state = nexts[t]
+
+    elif action == A_ESCAPE:
+      try:
+        buf.append(CharScanner.CHAR_ESCAPES[c])
+      except KeyError:
+        raise ScanError(_position(str_, i), "unknown escape sequence: `\\%s'"
+          % c)
+      i += 1
+      state = nexts[t]
+
+    elif action == A_PERIODS or action == A_PERIOD_NUMBER:
+      for off in xrange(start, start + args[t]):
+        out.append((PeriodToken, off, off + 1, None))
+      state = nexts[t]
+      if action == A_PERIODS:
+        continue
+
+      # Restart at the last period as a floating-point constant
+      start += args[t]
+      i = start + 1
+      buf.append('.')
+      base = 10
+
+    elif action == A_ERROR or action == A_ERROR_OCTAL:
+      if action == A_ERROR_OCTAL:
+        pos = _position(str_, octOff)
+        msg = "invalid digit `%s' in octal constant" % str_[octOff]
+      else:
+        pos = _position(str_, i)
+        msg = ERRORS[args[t]]
+        if "%s" in msg:
+          msg %= c
+      raise ScanError(pos, msg)
+
+    else: # A_EOF
+      for index, count in enumerate(opens):
+        if count > 0:
+          raise ScanError(_position(str_, i), "unexpected EOF: unmatched `%s'"
+            % OPEN_BRACKETS[index])
+
+      if not newline:
+        out.append((ScanWarning, i, i, "no newline at end of file"))
+      out.append((EOFToken, i, i, None))
+
+      for tok in out:
+        yield tok
+      return
+
+    # A character was consumed, so release the pending tokens.
+    if out:
+      for tok in out:
+        yield tok
+      del out[:]
+
+def scan(str_):
+  """Scan an input string, returning a generator that yields the same tokens and
+  warnings as `scanner.scan`."""
+  newTuple = tuple.__new__
+  lines = LineIndex(str_)
+
+  for cls, start, end, val in scanRaw(str_):
+    pos = SourcePosition(lines, start)
+    if val is None:
+      yield newTuple(cls, (pos,))
+    elif cls is ScanWarning:
+      yield ScanWarning(pos, val)
+    else:
+      yield newTuple(cls, (pos, val))
+
+# The number of characters after the end of a token that the scanner may look
+# at before the token is generated, as in "...1"
+MAX_LOOKAHEAD = 2
+
+def _advanceLine(buf, base, last, off, line, lineStart):
+  """Return the line and the offset of its start at `off` in a buffer that
+  starts at offset `base` of the input, given the same at `last`."""
+  newlines = buf.count('\n', last, off)
+  if newlines:
+    return line + newlines, base + buf.rfind('\n', last, off) + 1
+  return line, lineStart
+
+def scanStream(chunks):
+  """Scan an input string given as a sequence of chunks, returning a generator
+  that yields the same tokens and warnings as `scan`. Only the part of the input
+  that hasn't been scanned yet is kept in memory."""
+  chunks = iter(chunks)
+  buf = ""
+  base = 0
+  opens = [0, 0, 0]
+  newline = True
+  final = False
+  # The line and the offset of its start at `last` in the buffer
+  line = 1
+  lineStart = 0
+  last = 0
+
+  while not final:
+    try:
+      buf += next(chunks)
+    except StopIteration:
+      final = True
+
+    # Tokens that end close to the end of the buffer might be different once
+    # more input is read, so they are scanned again with the next chunk.
+    limit = len(buf) - MAX_LOOKAHEAD - 1
+    restart = 0
+    toks = scanRaw(buf, 0, opens, newline, final)
+    while True:
+      try:
+        cls, start, end, val = next(toks)
+      except StopIteration:
+        break
+      except ScanError, e:
+        off = e.pos.off
+        line, lineStart = _advanceLine(buf, base, last, off, line, lineStart)
+        raise ScanError(Position(line, base + off - lineStart + 1), e.msg)
+
+      if not final and end > limit:
+        break
+
+      # Advance the current line to the start of this token
+      line, lineStart = _advanceLine(buf, base, last, start, line, lineStart)
+      last = start
+
+      pos = Position(line, base + start - lineStart + 1)
+      if cls is ScanWarning:
+        yield ScanWarning(pos, val)
+        continue
+      elif val is None:
+        yield cls(pos)
+      else:
+        yield cls(pos, val)
+
+      try:
+        index, change = BRACKETS[cls]
+      except KeyError:
+        pass
+      else:
+        opens[index] += change
+      restart = end
+      newline = False
+
+    # Keep the input after the last token that was generated
+    line, lineStart = _advanceLine(buf, base, last, restart, line, lineStart)
+    buf = buf[restart:]
+    base += restart
+    last = 0
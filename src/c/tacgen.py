@@ -24,7 +24,7 @@ class Env(dict):
     return self if var in self else (self.outer.find(var) if self.outer is not
       None else None)
 
-class TACGenerator(object):
+class TACGenerator(syntree.NodeVisitor):
   """A three-address code generator that generates code from a C syntax tree
 
   visitXXX functions accept a syntax tree node and return a node-specific value.
@@ -37,6 +37,9 @@ class TACGenerator(object):
   visitXXX functions for statements accept a syntax tree node and a boolean
   value indicating whether the statement always returns from its enclosing
   function or not.
+
+  visitXXX functions that generate code for other nodes are generators that
+  are run by `syntree.runVisit`, so that deeply nested programs don't recurse.
   """
 
   def __init__(self):
@@ -50,19 +53,29 @@ class TACGenerator(object):
     # The current environment
     self.env = Env()
 
+    # The local variables of the current function, in the order that they are
+    # declared, which is the order of the slots that c.resolver gives them
+    self.frame = []
+
     # Break and continue jump locations
     self.breaks = []
     self.continues = []
 
+  def genericVisit(self, node, *args):
+    """Raise an error for a node that there is no code generation for, rather
+    than visiting its children and generating nothing for it."""
+    raise NotImplementedError("no code generation for %s" %
+      type(node).__name__)
+
   def __genLValue(self, expr, label):
     """Generate code to get an address from an expression, raising an error if
     the expression is not an lvalue."""
-    addrVar = expr.accept(self, True)
+    addrVar = yield self.visitChild(expr, True)
 
     if addrVar is None:
       raise CompileError(expr.pos, "lvalue required as %s" % label)
 
-    return addrVar
+    raise syntree.Return(addrVar)
 
   def _pushEnv(self):
     """Push an empty environment onto the environment stack"""
@@ -87,15 +100,21 @@ class TACGenerator(object):
 
   def visitVarExpr(self, node, lvalue=False):
     """Generate code for a variable expression"""
-    # Look up the variable binding
-    varEnv = self.env.find(node.id)
-
-    # Check for undefined variables
-    # XXX This should be done before code generation
-    if varEnv is None:
-      raise CompileError(node.pos, "`%s' undeclared" % node.id)
-
-    var = varEnv[node.id]
+    binding = node.binding
+    if binding is None:
+      # The tree wasn't resolved, so look up the variable binding
+      varEnv = self.env.find(node.id)
+
+      # Check for undefined variables
+      if varEnv is None:
+        raise CompileError(node.pos, "`%s' undeclared" % node.id)
+
+      var = varEnv[node.id]
+    elif type(binding) is int:
+      # Local variables are resolved to their slot in the frame
+      var = self.frame[binding]
+    else:
+      var = binding
 
     if lvalue:
       # Generate a variable containing the address of the result
@@ -110,45 +129,45 @@ class TACGenerator(object):
     """Generate code for an increment expression"""
     # The result of an increment expression is not an lvalue
     if lvalue:
-      return None
+      return
 
     # Allocate a temporary variable for the result
     rvar = next(self.varGen)
     # Generate code for the value of the variable
-    var = node.expr.accept(self)
+    var = yield self.visitChild(node.expr)
     # Generate code for the address of the variable
-    addrVar = self.__genLValue(node.expr, "increment operand")
+    addrVar = yield self.__genLValue(node.expr, "increment operand")
     # Generate the increment instruction
     self.code.append(Add(rvar, var, 1))
     # Store the result in the lvalue
     self.code.append(Store(addrVar, rvar))
 
     if post:
-      return var
+      raise syntree.Return(var)
     else:
-      return rvar
+      raise syntree.Return(rvar)
 
   def visitDecExpr(self, node, lvalue, post):
     """Generate code for a decrement expression"""
     # The result of a decrement expression is not an lvalue
     if lvalue:
-      return None
+      return
 
     # Allocate a temporary variable for the result
     rvar = next(self.varGen)
     # Generate code for the value of the variable
-    var = node.expr.accept(self)
+    var = yield self.visitChild(node.expr)
     # Generate code for the address of the variable
-    addrVar = self.__genLValue(node.expr, "decrement operand")
+    addrVar = yield self.__genLValue(node.expr, "decrement operand")
     # Generate the decrement instruction
     self.code.append(Sub(rvar, var, 1))
     # Store the result in the lvalue
     self.code.append(Store(addrVar, rvar))
 
     if post:
-      return var
+      raise syntree.Return(var)
     else:
-      return rvar
+      raise syntree.Return(rvar)
 
   def visitPostIncExpr(self, node, lvalue=False):
     """Generate code for a post-increment expression"""
@@ -162,12 +181,12 @@ class TACGenerator(object):
     """Generate code for a function call expression"""
     # The result of a call is not an lvalue
     if lvalue:
-      return None
+      return
 
     # Allocate a temporary variable for the return value
     var = next(self.varGen)
     # Generate code to grab the function address
-    funAddrVar = node.expr.accept(self, True)
+    funAddrVar = yield self.visitChild(node.expr, True)
 
     # Check for invalid functions
     # XXX This should be done in the type checker
@@ -177,7 +196,7 @@ class TACGenerator(object):
     # Generate code for the expressions used as function arguments, pushing the
     # actual arguments on the parameter stack.
     for expr in node.argExprs:
-      argVar = expr.accept(self)
+      argVar = yield self.visitChild(expr)
       self.code.append(PushParam(argVar))
 
     # Generate the call instruction
@@ -185,7 +204,7 @@ class TACGenerator(object):
     # Clean up the stack
     self.code.append(PopParams(len(node.argExprs)))
 
-    return var
+    raise syntree.Return(var)
 
   def visitPreIncExpr(self, node, lvalue=False):
     """Generate code for a pre-increment expression"""
@@ -207,17 +226,17 @@ class TACGenerator(object):
   def visitDerefExpr(self, node, lvalue=False):
     """Generate code for a dereference expression"""
     # Generate code for the expression to dereference
-    addrVar = node.expr.accept(self)
+    addrVar = yield self.visitChild(node.expr)
 
     if lvalue:
-      return addrVar
+      raise syntree.Return(addrVar)
     else:
       # Allocate a temporary variable for the value at the memory location.
       var = next(self.varGen)
       # Load the value at the memory location into the temporary variable.
       self.code.append(Load(var, addrVar))
 
-      return var
+      raise syntree.Return(var)
 
   def visitPlusExpr(self, node, lvalue=False):
     """Generate code for a unary plus expression"""
@@ -225,73 +244,73 @@ class TACGenerator(object):
     if lvalue:
       return None
 
-    return node.expr.accept(self)
+    return self.visitChild(node.expr)
 
   def visitNegExpr(self, node, lvalue=False):
     """Generate code for a negation expression"""
     # The result of a negation expression is not an lvalue
     if lvalue:
-      return None
+      return
 
     # Allocate a temporary variable for the result
     var = next(self.varGen)
     # Generate code for the inner expression
-    rvar = node.expr.accept(self)
+    rvar = yield self.visitChild(node.expr)
     # Generate the instruction
     self.code.append(Neg(var, rvar))
 
-    return var
+    raise syntree.Return(var)
 
   def visitNotExpr(self, node, lvalue=False):
     """Generate code for a bitwise NOT expression"""
     # The result of a bitwise NOT expression is not an lvalue
     if lvalue:
-      return None
+      return
 
     # Allocate a temporary variable for the result
     var = next(self.varGen)
     # Generate code for the inner expression
-    rvar = node.expr.accept(self)
+    rvar = yield self.visitChild(node.expr)
     # Generate the instruction
     self.code.append(Not(var, rvar))
 
-    return var
+    raise syntree.Return(var)
 
   def visitLogicNotExpr(self, node, lvalue=False):
     """Generate code for a logical NOT expression"""
     # The result of a bitwise NOT expression is not an lvalue
     if lvalue:
-      return None
+      return
 
     # Allocate a temporary variable for the result
     var = next(self.varGen)
     # Generate code for the inner expression
-    rvar = node.expr.accept(self)
+    rvar = yield self.visitChild(node.expr)
     # Generate the instruction
     self.code.append(Equal(var, rvar, 0))
 
-    return var
+    raise syntree.Return(var)
 
   def visitAssignExpr(self, node, lvalue=False):
     """Generate code for an assignment expression"""
     # The result of an assignment is not an lvalue
     if lvalue:
-      return None
+      return
 
     # Generate code for the address of the variable
-    addrVar = self.__genLValue(node.lexpr, "left operand of assignment")
+    addrVar = yield self.__genLValue(node.lexpr, "left operand of assignment")
     # Generate code for the right side of the assignment
-    rvar = node.rexpr.accept(self)
+    rvar = yield self.visitChild(node.rexpr)
     # Store the right side result in the lvalue
     self.code.append(Store(addrVar, rvar))
 
-    return rvar
+    raise syntree.Return(rvar)
 
   def visitCondExpr(self, node, lvalue=False):
     """Generate code for a conditional expression"""
     # The result of a conditional expression is not an lvalue
     if lvalue:
-      return None
+      return
 
     # Allocate a temporary variable for the result
     var = next(self.varGen)
@@ -301,12 +320,12 @@ class TACGenerator(object):
     end_ = next(self.labelGen)
 
     # Generate code for the condition expression
-    cvar = node.expr.accept(self)
+    cvar = yield self.visitChild(node.expr)
     # Generate a jump to the else part on zero
     self.code.append(IfZeroJump(cvar, else_.id))
 
     # Generate code for the true part
-    tvar = node.texpr.accept(self)
+    tvar = yield self.visitChild(node.texpr)
     self.code.append(Assign(var, tvar))
     # Generate an instruction to jump to the end of the expression
     self.code.append(Jump(end_.id))
@@ -314,30 +333,30 @@ class TACGenerator(object):
     # Generate a label for the false part
     self.code.append(Label(else_.id))
     # Generate code for the false part
-    fvar = node.fexpr.accept(self)
+    fvar = yield self.visitChild(node.fexpr)
     self.code.append(Assign(var, fvar))
 
     # Generate a label for the end of the exprssion
     self.code.append(Label(end_.id))
 
-    return var
+    raise syntree.Return(var)
 
   def visitBinOpExpr(self, node, lvalue, inst):
     """Generate code for a binary operation expression"""
     # The result of a binary operation expression is not an lvalue
     if lvalue:
-      return None
+      return
 
     # Allocate a temporary variable for the result
     var = next(self.varGen)
     # Generate code for the left side of the expression
-    lvar = node.lexpr.accept(self)
+    lvar = yield self.visitChild(node.lexpr)
     # Generate code for the right side of the expression
-    rvar = node.rexpr.accept(self)
+    rvar = yield self.visitChild(node.rexpr)
     # Generate the instruction
     self.code.append(inst(var, lvar, rvar))
 
-    return var
+    raise syntree.Return(var)
 
   def visitLessThanExpr(self, node, lvalue=False):
     """Generate code for a less-than expression"""
@@ -379,7 +398,7 @@ class TACGenerator(object):
     """Generate code for a logical OR expression"""
     # The result of a logical expression is not an lvalue
     if lvalue:
-      return None
+      return
 
     # Allocate a temporary variable for the result
     var = next(self.varGen)
@@ -387,7 +406,7 @@ class TACGenerator(object):
     end_ = next(self.labelGen)
 
     # Generate code for the left expression
-    lvar = node.lexpr.accept(self)
+    lvar = yield self.visitChild(node.lexpr)
     # Convert to bool (0 or 1)
     self.code.append(NotEqual(var, lvar, 0))
 
@@ -395,20 +414,20 @@ class TACGenerator(object):
     self.code.append(IfNotZeroJump(var, end_.id))
 
     # Generate code for the right expression
-    rvar = node.rexpr.accept(self)
+    rvar = yield self.visitChild(node.rexpr)
     # Convert to bool (0 or 1)
     self.code.append(NotEqual(var, rvar, 0))
 
     # Generate the end label
     self.code.append(Label(end_.id))
 
-    return var
+    raise syntree.Return(var)
 
   def visitLogicAndExpr(self, node, lvalue=False):
     """Generate code for a logical AND expression"""
     # The result of a logical expression is not an lvalue
     if lvalue:
-      return None
+      return
 
     # Allocate a temporary variable for the result
     var = next(self.varGen)
@@ -416,7 +435,7 @@ class TACGenerator(object):
     end_ = next(self.labelGen)
 
     # Generate code for the left expression
-    lvar = node.lexpr.accept(self)
+    lvar = yield self.visitChild(node.lexpr)
     # Convert to bool (0 or 1)
     self.code.append(NotEqual(var, lvar, 0))
 
@@ -424,14 +443,14 @@ class TACGenerator(object):
     self.code.append(IfZeroJump(var, end_.id))
 
     # Generate code for the right expression
-    rvar = node.rexpr.accept(self)
+    rvar = yield self.visitChild(node.rexpr)
     # Convert to bool (0 or 1)
     self.code.append(NotEqual(var, rvar, 0))
 
     # Generate the end label
     self.code.append(Label(end_.id))
 
-    return var
+    raise syntree.Return(var)
 
   def visitMulExpr(self, node, lvalue=False):
     """Generate code for a multiplication expression"""
@@ -453,22 +472,28 @@ class TACGenerator(object):
     """Generate code for a comma expression"""
     # The result of a comma expression is not an lvalue
     if lvalue:
-      return None
+      return
 
     # Generate code for the left expression
-    node.lexpr.accept(self)
+    yield self.visitChild(node.lexpr)
     # Generate code for the right expression
-    return node.rexpr.accept(self)
+    rvar = yield self.visitChild(node.rexpr)
+
+    raise syntree.Return(rvar)
 
   def visitReturnStmt(self, node):
     """Generate code for a return statement"""
-    # Generate code for the expression to return
-    var = node.expr.accept(self)
+    # Generate code for the expression to return, if any. Every function returns
+    # int, so return 0 without one, just like falling off the end of a function.
+    if node.expr is not None:
+      var = yield self.visitChild(node.expr)
+    else:
+      var = 0
     # Generate the function epilogue
     self.code.append(EndFunc(var))
 
     # This statement returns
-    return True
+    raise syntree.Return(True)
 
   def visitBreakStmt(self, node):
     """Generate code for a break statement"""
@@ -500,12 +525,12 @@ class TACGenerator(object):
     end_ = next(self.labelGen)
 
     # Generate code for the condition expression
-    var = node.expr.accept(self)
+    var = yield self.visitChild(node.expr)
     # Generate a jump to the else part on zero
     self.code.append(IfZeroJump(var, else_.id))
 
     # Generate code for the true part
-    tRet = node.tstmt.accept(self)
+    tRet = yield self.visitChild(node.tstmt)
     # Generate an instruction to jump to the end of the statement
     self.code.append(Jump(end_.id))
 
@@ -513,16 +538,16 @@ class TACGenerator(object):
     self.code.append(Label(else_.id))
     # Generate code for the false part, if any
     if node.fstmt:
-      fRet = node.fstmt.accept(self)
+      fRet = yield self.visitChild(node.fstmt)
 
     # Generate a label for the end of the statement
     self.code.append(Label(end_.id))
 
     # This statement returns only if it has two parts and both return.
     if not node.fstmt:
-      return False
+      raise syntree.Return(False)
     else:
-      return tRet and fRet
+      raise syntree.Return(tRet and fRet)
 
   def visitWhileStmt(self, node):
     """Generate code for a while statement"""
@@ -538,12 +563,12 @@ class TACGenerator(object):
     # Generate a label for the beginning of the loop
     self.code.append(Label(begin_.id))
     # Generate code for the condition expression
-    var = node.expr.accept(self)
+    var = yield self.visitChild(node.expr)
     # Generate an instruction to jump to the end of the loop on zero
     self.code.append(IfZeroJump(var, end_.id))
 
     # Generate code for the body of the loop
-    node.stmt.accept(self)
+    yield self.visitChild(node.stmt)
     # Generate a jump to the beginning of the loop
     self.code.append(Jump(begin_.id))
 
@@ -555,7 +580,7 @@ class TACGenerator(object):
     self.continues.pop()
 
     # This statement might not return
-    return False
+    raise syntree.Return(False)
 
   def visitForStmt(self, node):
     """Generate code for a for statement"""
@@ -570,23 +595,23 @@ class TACGenerator(object):
 
     # Generate the initialization code, if any
     if node.initExpr is not None:
-      node.initExpr.accept(self)
+      yield self.visitChild(node.initExpr)
 
     # Generate a label for the beginning of the loop
     self.code.append(Label(begin_.id))
 
     if node.condExpr is not None:
       # Generate code for the condition expression
-      var = node.condExpr.accept(self)
+      var = yield self.visitChild(node.condExpr)
       # Generate an instruction to jump to the end of the loop on zero
       self.code.append(IfZeroJump(var, end_.id))
 
     # Generate code for the body of the loop
-    node.stmt.accept(self)
+    yield self.visitChild(node.stmt)
 
     # Generate code to advance to the next iteration, if any
     if node.nextExpr is not None:
-      node.nextExpr.accept(self)
+      yield self.visitChild(node.nextExpr)
 
     # Generate a jump to the beginning of the loop
     self.code.append(Jump(begin_.id))
@@ -599,15 +624,15 @@ class TACGenerator(object):
     self.continues.pop()
 
     # This statement might not return
-    return False
+    raise syntree.Return(False)
 
   def visitExprStmt(self, node):
     """Generate code for an expression statement"""
     if node.expr:
-      node.expr.accept(self)
+      yield self.visitChild(node.expr)
 
     # This statement does not return
-    return False
+    raise syntree.Return(False)
 
   def visitCompoundStmt(self, node):
     """Generate code for a compound statement"""
@@ -616,13 +641,13 @@ class TACGenerator(object):
 
     # Define local variables in the local environment
     for decl in node.decls:
-      decl.accept(self)
+      yield self.visitChild(decl)
 
     # Generate code for the body statements
     ret = False
     keepCode = None
     for stmt in node.stmts:
-      ret = stmt.accept(self)
+      ret = yield self.visitChild(stmt)
 
       # If an earlier statement always returns, then later statements are
       # always unreachable and can safely be discarded. The code must still
@@ -639,7 +664,7 @@ class TACGenerator(object):
     self._popEnv()
 
     # This statement returns if any part returns
-    return ret
+    raise syntree.Return(ret)
 
   def visitDecl(self, node):
     """Generate code for a declaration"""
@@ -659,7 +684,8 @@ class TACGenerator(object):
       # Otherwise, if this declaration is local, then map it to a temporary
       # variable
       else:
-        self.env[id_] = next(self.varGen)
+        var = self.env[id_] = next(self.varGen)
+        self.frame.append(var)
 
   def visitFunDef(self, node):
     """Generate code for a function definition"""
@@ -674,6 +700,8 @@ class TACGenerator(object):
 
     # Enter a local environment
     self._pushEnv()
+    outerFrame = self.frame
+    self.frame = []
 
     # Add the parameters to the environment (increasing in offset from right to
     # left)
@@ -685,7 +713,7 @@ class TACGenerator(object):
     varOld = self.varGen.n
 
     # Generate the function code
-    ret = node.stmt.accept(self)
+    ret = yield self.visitChild(node.stmt)
     if not ret:
       self.code.append(EndFunc(0))
 
@@ -693,6 +721,7 @@ class TACGenerator(object):
 
     # Exit the local environment
     self._popEnv()
+    self.frame = outerFrame
 
     # Restore the code buffer
     funCode = self.code
@@ -709,6 +738,6 @@ class TACGenerator(object):
     """Generate code for a translation unit"""
     # Generate code for each declaration
     for decl in node.decls:
-      decl.accept(self)
+      yield self.visitChild(decl)
 
-    return self.code
+    raise syntree.Return(self.code)
@@ -0,0 +1,648 @@
+"""
+A compact representation of a scanned sequence of tokens
+
+A `TokenStream` stores the integer kind, start offset, end offset and value
+index of each token in parallel arrays, with each distinct token value stored
+once in a separate list. Tokens are only created as `scanner.Token` tuples when
+they are indexed, so a whole program can be kept in memory and sliced cheaply
+while it is being parsed.
+
+The arrays are split into chunks of consecutive tokens, each with the offsets
+of its tokens relative to a base offset. The stream for an edited version of
+the input only scans the chunks around the edit again, and shares the rest with
+the stream it was rescanned from, moving them by changing their bases.
+"""
+
+from array import array
+import bisect
+
+from scanner import *
+import tablescanner
+
+# The largest number of tokens in a chunk. An edit copies the chunks around it,
+# so they are kept short, but the offsets of each chunk after it are moved.
+CHUNK_TOKENS = 128
+
+# Brackets by token kind, as (index, change in the number of open brackets)
+BRACKET_KINDS = dict((cls.kind, bracket)
+  for cls, bracket in tablescanner.BRACKETS.iteritems())
+
+def _countBrackets(opens, kinds):
+  """Return the number of each kind of bracket that is open after tokens of the
+  given kinds, given the number that is open before them."""
+  opens = list(opens)
+  for kind, (index, change) in BRACKET_KINDS.iteritems():
+    opens[index] += change * kinds.count(kind)
+  return tuple(opens)
+
+class TokenChunk(object):
+  """A run of consecutive tokens in a `TokenTable`, stored as parallel arrays.
+
+  The offsets of the tokens are relative to a base offset that the table keeps
+  for the chunk, so the tables of two versions of an edited input can share it
+  even if the edit moved it. The number of each kind of bracket that is open
+  before the first token is kept too, so that scanning can restart in the chunk.
+  """
+
+  __slots__ = ("kinds", "starts", "ends", "valueIds", "opens")
+
+  def __init__(self, kinds, starts, ends, valueIds, opens):
+    self.kinds = kinds
+    self.starts = starts
+    self.ends = ends
+    self.valueIds = valueIds
+    self.opens = opens
+
+def _emptyChunk(opens):
+  """Return a `TokenChunk` without any tokens to append to."""
+  return TokenChunk(array('i'), array('i'), array('i'), array('i'), opens)
+
+def _chunks(first, kinds, starts, ends, valueIds, opens):
+  """Split the columns of a run of tokens into `TokenChunk`s of nearly equal
+  size, given the index of the first token and the number of each kind of
+  bracket that is open before it. Return the chunks and the index of the first
+  token of each."""
+  n = len(kinds)
+  count = -(-n // CHUNK_TOKENS)
+  chunks = []
+  firsts = []
+  for k in xrange(count):
+    lo, hi = n * k // count, n * (k + 1) // count
+    chunkKinds = kinds[lo:hi]
+    chunks.append(TokenChunk(chunkKinds, starts[lo:hi], ends[lo:hi],
+      valueIds[lo:hi], opens))
+    firsts.append(first + lo)
+    opens = _countBrackets(opens, chunkKinds)
+  return chunks, firsts
+
+class TokenTable(object):
+  """The chunks of a token stream, shared by all of its slices. `firsts` holds
+  the index of the first token of each chunk and `bases` the offset that the
+  offsets in each chunk are relative to."""
+
+  def __init__(self, lines, chunks, firsts, bases, values, ids, tokens=None):
+    self.lines = lines
+    self.chunks = chunks
+    self.firsts = firsts
+    self.bases = bases
+    self.values = values
+    self.ids = ids
+    self.tokens = tokens
+    self.size = firsts[-1] + len(chunks[-1].kinds) if chunks else 0
+    self.lastIndex = None
+    self.lastToken = None
+    # Tokens are mostly read in order, so keep the chunk that was found last.
+    self.chunk = _emptyChunk(None)
+    self.first = 0
+    self.base = 0
+
+  def locate(self, i):
+    """Return the chunk that holds the token at the given index, the index of
+    the token in the chunk and the base of the chunk's offsets."""
+    chunk = self.chunk
+    j = i - self.first
+    if not 0 <= j < len(chunk.kinds):
+      if not 0 <= i < self.size:
+        raise IndexError("token table index out of range")
+      c = bisect.bisect_right(self.firsts, i) - 1
+      chunk = self.chunk = self.chunks[c]
+      self.first = self.firsts[c]
+      self.base = self.bases[c]
+      j = i - self.first
+    return chunk, j, self.base
+
+  def kind(self, i):
+    """Return the kind of the token at the given index."""
+    kinds = self.chunk.kinds
+    j = i - self.first
+    if 0 <= j < len(kinds):
+      return kinds[j]
+    chunk, j, base = self.locate(i)
+    return chunk.kinds[j]
+
+  def kindSlice(self, lo, hi):
+    """Return an array of the kinds of the tokens from the index `lo` up to
+    `hi`, like slicing an array of all of them."""
+    kinds = array('i')
+    hi = min(hi, self.size)
+    while lo < hi:
+      chunk, j, base = self.locate(lo)
+      part = chunk.kinds[j:j + hi - lo]
+      kinds.extend(part)
+      lo += len(part)
+    return kinds
+
+  def span(self, i):
+    """Return the start and end offsets of the token at the given index."""
+    chunk, j, base = self.locate(i)
+    return base + chunk.starts[j], base + chunk.ends[j]
+
+  def token(self, i):
+    """Return the token at the given index as a `scanner.Token`."""
+    if self.tokens is not None:
+      return self.tokens[i]
+
+    # A parser tries several alternatives at the same token before it moves
+    # on, so keep the last token that was created.
+    if i == self.lastIndex:
+      return self.lastToken
+
+    chunk, j, base = self.locate(i)
+    cls = TOKEN_TYPES[chunk.kinds[j]]
+    pos = SourcePosition(self.lines, base + chunk.starts[j])
+    val = self.value(i)
+    if val is None:
+      tok = tuple.__new__(cls, (pos,))
+    else:
+      tok = tuple.__new__(cls, (pos, val))
+
+    self.lastIndex = i
+    self.lastToken = tok
+    return tok
+
+  def value(self, i):
+    """Return the value of the token at the given index."""
+    if self.tokens is not None:
+      return self.tokens[i].val
+
+    chunk, j, base = self.locate(i)
+    valueId = chunk.valueIds[j]
+    if valueId == TEXT_VALUE:
+      return self.lines.str[base + chunk.starts[j]:base + chunk.ends[j]]
+    else:
+      return self.values[valueId]
+
+class TokenStream(object):
+  """A sequence of tokens stored as parallel arrays of token kinds and offsets.
+
+  Indexing a token stream returns a `scanner.Token`, and slicing it returns a
+  token stream that shares the same columns, so it can be used anywhere a list
+  of tokens is expected. The kind of a token can be compared with the `kind`
+  attribute of a token type without creating the token.
+  """
+
+  __slots__ = ("table", "lo", "hi")
+
+  def __init__(self, table, lo=0, hi=None):
+    self.table = table
+    self.lo = lo
+    self.hi = table.size if hi is None else hi
+
+  @classmethod
+  def fromTokens(cls, toks):
+    """Return a token stream for a sequence of `scanner.Token`s. The tokens
+    are kept as they are, since they do not carry their offsets."""
+    toks = list(toks)
+    kinds = array('i', [tok.kind for tok in toks])
+    return cls(TokenTable(None, [TokenChunk(kinds, None, None, None, None)],
+      [0], [0], None, None, toks))
+
+  def __len__(self):
+    return self.hi - self.lo
+
+  def __iter__(self):
+    token = self.table.token
+    for i in xrange(self.lo, self.hi):
+      yield token(i)
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      if index.stop is None and index.step is None and index.start >= 0:
+        # ts[n:] is by far the most common slice
+        return TokenStream(self.table, min(self.lo + index.start, self.hi),
+          self.hi)
+
+      start, stop, step = index.indices(self.hi - self.lo)
+      assert step == 1, "token streams can only be sliced contiguously"
+      return TokenStream(self.table, self.lo + start,
+        max(self.lo + start, self.lo + stop))
+
+    if index < 0:
+      index += self.hi - self.lo
+    if not 0 <= index < self.hi - self.lo:
+      raise IndexError("token stream index out of range")
+    return self.table.token(self.lo + index)
+
+  def first(self):
+    """Return the first token, like `ts[0]`."""
+    return self.table.token(self.lo)
+
+  def rest(self):
+    """Return the tokens after the first token, like `ts[1:]`."""
+    return TokenStream(self.table, self.lo + 1, self.hi)
+
+  def kind(self, index=0):
+    """Return the integer kind of the token at the given index."""
+    return self.table.kind(self.lo + index)
+
+  def value(self, index=0):
+    """Return the value of the token at the given index without creating the
+    token."""
+    return self.table.value(self.lo + index)
+
+  def span(self, index=0):
+    """Return the start and end offsets of the token at the given index in the
+    source string."""
+    return self.table.span(self.lo + index)
+
+  def has(self, index):
+    """Return whether there is a token at the given index, like
+    `index < len(ts)`."""
+    return index < self.hi - self.lo
+
+  def available(self):
+    """Return the number of tokens that can be read without scanning any more
+    of the input."""
+    return self.hi - self.lo
+
+  def finished(self):
+    """Return whether the whole input has been scanned without errors."""
+    return True
+
+# The value index of tokens whose value is their text, which is only sliced out
+# of the input when the token is created
+TEXT_VALUE = -1
+TEXT_KINDS = frozenset([IdentifierToken.kind, KeywordToken.kind])
+
+def _valueId(values, ids, kind, val):
+  """Return the index of the value of a token with the given kind in a list of
+  distinct values, adding it if it isn't there yet. `ids` maps (type, value)
+  pairs to indices, since values of different types such as 1 and 1.0 can be
+  equal."""
+  if kind in TEXT_KINDS:
+    return TEXT_VALUE
+
+  key = (type(val), val)
+  try:
+    return ids[key]
+  except KeyError:
+    valueId = ids[key] = len(values)
+    values.append(val)
+    return valueId
+
+def scan(str_, warnings=None):
+  """Scan an input string, returning a `TokenStream` of the same tokens that
+  `scanner.scan` yields. The input can be anything that `scanner.source`
+  accepts, and is kept rather than copied. Warnings are appended to `warnings`
+  if it is given, and are otherwise ignored."""
+  str_ = source(str_)
+  # The columns are collected in lists, which are quicker to append to, and
+  # only converted to arrays at the end.
+  kinds = []
+  starts = []
+  ends = []
+  valueIds = []
+  addKind = kinds.append
+  addStart = starts.append
+  addEnd = ends.append
+  addValueId = valueIds.append
+  # Values are repeated often, so each distinct value is only stored once.
+  values = [None]
+  ids = {(type(None), None): 0}
+  lines = LineIndex(str_)
+
+  for cls, start, end, val in tablescanner.scanRaw(str_):
+    if val is None:
+      valueId = 0
+    elif cls is ScanWarning:
+      if warnings is not None:
+        warnings.append(ScanWarning(SourcePosition(lines, start), val))
+      continue
+    else:
+      valueId = _valueId(values, ids, cls.kind, val)
+
+    addKind(cls.kind)
+    addStart(start)
+    addEnd(end)
+    addValueId(valueId)
+
+  chunks, firsts = _chunks(0, array('i', kinds), array('i', starts),
+    array('i', ends), array('i', valueIds), (0, 0, 0))
+  return TokenStream(TokenTable(lines, chunks, firsts, [0] * len(chunks),
+    values, ids))
+
+class LazyTokenTable(TokenTable):
+  """The chunks of a token stream that are filled from a scanner as tokens
+  are needed, rather than all at once"""
+
+  def __init__(self, str_, warnings=None):
+    str_ = source(str_)
+    # Values are repeated often, so each distinct value is only stored once.
+    TokenTable.__init__(self, LineIndex(str_), [_emptyChunk((0, 0, 0))], [0],
+      [0], [None], {(type(None), None): 0})
+    self.warnings = warnings
+    self.scanner = tablescanner.scanRaw(str_)
+    self.error = None
+
+  @classmethod
+  def failed(cls, lines, chunks, firsts, bases, values, ids, error):
+    """Return a table of the tokens that were scanned before a scan error,
+    which is raised once a token after them is needed."""
+    table = object.__new__(cls)
+    TokenTable.__init__(table, lines, chunks, firsts, bases, values, ids)
+    table.warnings = None
+    table.scanner = None
+    table.error = error
+    return table
+
+  # The number of tokens scanned ahead of the one that is needed, so that the
+  # scanner isn't resumed for every token
+  SCAN_AHEAD = 64
+
+  def fill(self, i):
+    """Scan until there is a token at the given index or the input runs out,
+    returning whether there is a token at the index. A scan error is raised
+    again each time more tokens are needed."""
+    if i < self.size:
+      return True
+
+    stop = i + self.SCAN_AHEAD
+    while self.size <= stop:
+      if self.error is not None:
+        raise self.error
+      if self.scanner is None:
+        break
+
+      try:
+        cls, start, end, val = next(self.scanner)
+      except StopIteration:
+        self.scanner = None
+        break
+      except ScanError, e:
+        self.error = e
+        if i < self.size:
+          # The error is raised once the tokens before it have been read.
+          break
+        raise
+
+      if cls is ScanWarning:
+        if self.warnings is not None:
+          self.warnings.append(ScanWarning(SourcePosition(self.lines, start),
+            val))
+        continue
+
+      chunk = self.chunks[-1]
+      if len(chunk.kinds) == CHUNK_TOKENS:
+        chunk = _emptyChunk(_countBrackets(chunk.opens, chunk.kinds))
+        self.chunks.append(chunk)
+        self.firsts.append(self.size)
+        self.bases.append(0)
+      chunk.kinds.append(cls.kind)
+      chunk.starts.append(start)
+      chunk.ends.append(end)
+      chunk.valueIds.append(_valueId(self.values, self.ids, cls.kind, val))
+      self.size += 1
+
+    return i < self.size
+
+  def complete(self):
+    """Scan the rest of the input."""
+    while self.fill(self.size):
+      pass
+
+class LazyTokenStream(TokenStream):
+  """A token stream that scans its input as its tokens are read.
+
+  Reading a token only scans a little past that token, so a parse error stops
+  the scan early, and a scan error is only raised once the parser reaches it.
+  Taking the length of a lazy token stream or slicing it scans the rest of the
+  input.
+  """
+
+  __slots__ = ()
+
+  def __init__(self, table, lo=0):
+    self.table = table
+    self.lo = lo
+    # The end of the stream is unknown until the input has been scanned.
+    self.hi = None
+
+  def __len__(self):
+    self.table.complete()
+    return self.table.size - self.lo
+
+  def __iter__(self):
+    table = self.table
+    i = self.lo
+    while table.fill(i):
+      yield table.token(i)
+      i += 1
+
+  def __getitem__(self, index):
+    if isinstance(index, slice) or index < 0:
+      self.table.complete()
+      return TokenStream(self.table, self.lo)[index]
+
+    if not self.table.fill(self.lo + index):
+      raise IndexError("token stream index out of range")
+    return self.table.token(self.lo + index)
+
+  def first(self):
+    return self[0]
+
+  def rest(self):
+    return LazyTokenStream(self.table, self.lo + 1)
+
+  def kind(self, index=0):
+    try:
+      return self.table.kind(self.lo + index)
+    except IndexError:
+      self.table.fill(self.lo + index)
+      return self.table.kind(self.lo + index)
+
+  def value(self, index=0):
+    self.table.fill(self.lo + index)
+    return self.table.value(self.lo + index)
+
+  def span(self, index=0):
+    self.table.fill(self.lo + index)
+    return TokenStream.span(self, index)
+
+  def has(self, index):
+    return self.table.fill(self.lo + index)
+
+  def available(self):
+    return self.table.size - self.lo
+
+  def finished(self):
+    table = self.table
+    return table.scanner is None and table.error is None
+
+def scanLazily(str_, warnings=None):
+  """Return a `LazyTokenStream` of the tokens that `scan` would return, which
+  are only scanned as the stream is read. Warnings are appended to `warnings`
+  as they are scanned, if it is given."""
+  return LazyTokenStream(LazyTokenTable(str_, warnings))
+
+def _matchLength(same, n):
+  """Return the length of the longest run of characters, up to `n`, that two
+  strings have in common, given a function that returns whether the characters
+  from one index up to another are the same in both. Runs that double in length
+  are compared until one differs, and then halved, so each character is only
+  compared a few times."""
+  length, size = 0, 1
+  while True:
+    size = min(size, n - length)
+    if not size or not same(length, length + size):
+      break
+    length += size
+    size *= 2
+
+  # The first difference is in the last run that was compared.
+  while size > 1:
+    half = size // 2
+    if same(length, length + half):
+      length += half
+      size -= half
+    else:
+      size = half
+  return length
+
+def findEdit(old, new):
+  """Return (offset, removed length, inserted text) for a single edit that
+  turns the string `old` into `new`."""
+  n = min(len(old), len(new))
+  prefix = _matchLength(lambda lo, hi: old[lo:hi] == new[lo:hi], n)
+  oldEnd, newEnd = len(old), len(new)
+  suffix = _matchLength(lambda lo, hi:
+    old[oldEnd - hi:oldEnd - lo] == new[newEnd - hi:newEnd - lo], n - prefix)
+  return prefix, len(old) - prefix - suffix, new[prefix:len(new) - suffix]
+
+def rescan(ts, off, removed, inserted, str_, warnings=None):
+  """Return a `TokenStream` for `str_`, which is the string that `ts` was
+  scanned from with `removed` characters at the offset `off` replaced by the
+  text `inserted`.
+
+  Only the tokens near the edit are scanned again, starting from the last token
+  that the edit can't affect and stopping as soon as a token matches one from
+  `ts` at the same place after the edit. The chunks that hold them are replaced,
+  and the other chunks are shared with `ts`, with the bases of the chunks after
+  the edit moved by its change in length. Warnings are appended to `warnings` if
+  it is given.
+
+  If the edit causes a scan error, a `LazyTokenStream` of the tokens before it
+  is returned instead, and the error is raised once they have been read, just
+  like it is for a stream returned by `scanLazily`.
+  """
+  str_ = source(str_)
+  old = ts.table
+  assert old.tokens is None, "only scanned token streams can be rescanned"
+  assert ts.finished(), "only fully scanned token streams can be rescanned"
+  assert len(old.lines.str) - removed + len(inserted) == len(str_)
+  delta = len(inserted) - removed
+  editEnd = off + len(inserted)
+  lines = LineIndex(str_)
+  chunks, firsts, bases = old.chunks, old.firsts, old.bases
+
+  # Find the last token that ends far enough before the edit that the scanner
+  # didn't look at any of the edited characters, first by chunk and then in the
+  # chunk, and restart at its end. A scan always ends with an end of file token,
+  # so there is at least one chunk.
+  limit = off - tablescanner.MAX_LOOKAHEAD - 1
+  lo, hi = 0, len(chunks)
+  while lo < hi:
+    mid = (lo + hi) // 2
+    if bases[mid] + chunks[mid].ends[0] <= limit:
+      lo = mid + 1
+    else:
+      hi = mid
+  c = max(lo - 1, 0)
+  chunk = chunks[c]
+  base = bases[c]
+  keep = bisect.bisect_right(chunk.ends, limit - base) if lo else 0
+  if keep:
+    restart = base + chunk.ends[keep - 1]
+    newline = False
+  else:
+    restart = 0
+    newline = True
+
+  # The chunk is replaced by chunks of the tokens kept from it, the tokens that
+  # are scanned again and the rest of the chunk of the first old token that
+  # matches, all relative to the base of the chunk.
+  kinds = chunk.kinds[:keep]
+  starts = chunk.starts[:keep]
+  ends = chunk.ends[:keep]
+  valueIds = chunk.valueIds[:keep]
+  opens = list(_countBrackets(chunk.opens, kinds))
+  values = old.values
+  ids = old.ids
+
+  def splice(rest):
+    """Return the chunks of the new table, the index of the first token of each
+    and their bases, with new chunks in place of the old chunks from `c` up to
+    the index `rest`."""
+    newChunks, newFirsts = _chunks(firsts[c], kinds, starts, ends, valueIds,
+      chunk.opens)
+    shift = firsts[c] + len(kinds) - (firsts[rest] if rest < len(chunks) else 0)
+    return (chunks[:c] + newChunks + chunks[rest:],
+      firsts[:c] + newFirsts + [first + shift for first in firsts[rest:]],
+      bases[:c] + [base] * len(newChunks) + [b + delta for b in bases[rest:]])
+
+  # Scan from the restart point, keeping track of the brackets open before each
+  # new token and the chunk and index of the next old token.
+  d, p = c, keep
+  oldChunk = chunk
+  oldBase = base
+  rest = len(chunks)
+  warned = False
+  scanner = tablescanner.scanRaw(str_, restart, opens, newline)
+  while True:
+    try:
+      cls, start, end, val = next(scanner)
+    except StopIteration:
+      break
+    except ScanError, e:
+      newChunks, newFirsts, newBases = splice(rest)
+      return LazyTokenStream(LazyTokenTable.failed(lines, newChunks, newFirsts,
+        newBases, values, ids, e))
+
+    if cls is ScanWarning:
+      if warnings is not None:
+        warnings.append(ScanWarning(SourcePosition(lines, start), val))
+      warned = True
+      continue
+
+    kind = cls.kind
+    if start >= editEnd:
+      while True:
+        p = bisect.bisect_left(oldChunk.starts, start - delta - oldBase, p)
+        if p < len(oldChunk.starts) or d + 1 == len(chunks):
+          break
+        d += 1
+        p = 0
+        oldChunk = chunks[d]
+        oldBase = bases[d]
+
+      if (p < len(oldChunk.starts)
+        and oldBase + oldChunk.starts[p] == start - delta
+        and oldChunk.kinds[p] == kind
+        and oldBase + oldChunk.ends[p] == end - delta
+        and old.value(firsts[d] + p) == val
+        and _countBrackets(oldChunk.opens, oldChunk.kinds[:p]) == tuple(opens)):
+        # The scanner is in the same state as it was at this token, so the rest
+        # of the tokens are the same.
+        move = oldBase + delta - base
+        kinds.extend(oldChunk.kinds[p:])
+        starts.extend(array('i', [s + move for s in oldChunk.starts[p:]]))
+        ends.extend(array('i', [e + move for e in oldChunk.ends[p:]]))
+        valueIds.extend(oldChunk.valueIds[p:])
+        # The only warning is generated just before the end of file token.
+        if (warnings is not None and not warned and str_
+          and str_[-1] != '\n'):
+          warnings.append(ScanWarning(SourcePosition(lines, len(str_)),
+            "no newline at end of file"))
+        rest = d + 1
+        break
+
+    bracket = BRACKET_KINDS.get(kind)
+    if bracket is not None:
+      opens[bracket[0]] += bracket[1]
+    kinds.append(kind)
+    starts.append(start - base)
+    ends.append(end - base)
+    valueIds.append(_valueId(values, ids, kind, val))
+
+  newChunks, newFirsts, newBases = splice(rest)
+  return TokenStream(TokenTable(lines, newChunks, newFirsts, newBases, values,
+    ids))
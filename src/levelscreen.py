@@ -6,9 +6,12 @@ import pygame
 from time import sleep
 
 import c.error
-import c.scanner
+import c.optimizer
 import c.parser
+import c.prelude
+import c.resolver
 import c.tacgen
+import c.tokenstream
 import vm.tactrans
 import vm.bytecode
 
@@ -51,9 +54,14 @@ class LevelScreen(Screen):
         self._hints = hints.read().split("\n")
     except IOError:
       self._hints = []
-    with open("assets/include.h", "rb") as headerFile:
-      self.__header = headerFile.read()
-      self.__headerLines = len(filter(lambda x: x == "\n", self.__header))
+    self.__prelude = c.prelude.load("assets/include.h")
+
+    # The last source code that was scanned, and its tokens, so that only the
+    # part of the source that was edited has to be scanned again
+    self.__source = None
+    self.__tokens = None
+    self.__memo = c.parser.Memo()
+    self.__reparser = c.parser.Reparser()
 
     # UI elements
     self._linesLabel = LineNumbers(self._ui, (0, 5.75), 46, BLUE_COLOR)
@@ -93,7 +101,7 @@ class LevelScreen(Screen):
     """Compile the source code in the text box, loading it into the robot's
     processor."""
     # Get the source code
-    source = self.__header + self._editor.text
+    source = self._editor.text
 
     print source
 
@@ -101,13 +109,20 @@ class LevelScreen(Screen):
 
     # Compile the source code
     try:
-      tokens = list(c.scanner.tokens(c.scanner.scan(source)))
-      syntree = c.parser.parse(tokens)
+      if self.__tokens is None or not self.__tokens.finished():
+        # Scan while parsing, so that an error stops the scan early. Only a
+        # stream that was scanned to the end can be rescanned.
+        tokens = c.tokenstream.scanLazily(source)
+      else:
+        off, removed, inserted = c.tokenstream.findEdit(self.__source, source)
+        tokens = c.tokenstream.rescan(self.__tokens, off, removed, inserted,
+          source)
+      self.__source, self.__tokens = source, tokens
+      syntree = self.__reparser.parse(tokens, self.__prelude, self.__memo)
+      syntree = c.optimizer.optimize(c.resolver.resolve(syntree))
       tac = syntree.accept(c.tacgen.TACGenerator())
       words, vars_ = vm.tactrans.translate(tac)
     except c.error.CompileError, e:
-      pos = c.scanner.Position(e.pos.line-self.__headerLines, e.pos.col)
-      e = c.error.CompileError(pos, e.msg)
       self._statusLabel.text = "Compile error: %s" % e
       return
     except BaseException, e:
@@ -2,7 +2,6 @@
 
 import os
 import sys
-import threading
 
 from OpenGL.GL import *
 import pygame
@@ -231,11 +230,4 @@ if __name__ == "__main__":
     os.chdir("..") # For locating assets
 
   print "Mumei running on", os.name
-  if os.name == "nt":
-    print "Increasing the stack size to 64MB..."
-    # Windows 64 fix, see http://stackoverflow.com/questions/2917210/
-    threading.stack_size(67108864)
-    thread = threading.Thread(target=main, args=sys.argv)
-    thread.start()
-  else:
-    main(*sys.argv)
+  main(*sys.argv)
@@ -0,0 +1,250 @@
+"""
+Control-flow graphs of three-address code
+
+`Program.fromCode` splits a sequence of instructions into its functions and the
+data between them. Each function starts with its `Label` and `BeginFunc` and
+runs until the label of the next function or data word. Its body is split
+into basic blocks: a block starts at a label or after a jump or `EndFunc`, and
+only its last instruction can transfer control. Each `Function` records the
+successors and predecessors of its blocks, their immediate dominators, and the
+natural loops that contain them.
+
+`Program.code` puts the instructions back into a flat list, in order. Blocks
+fall through to the next block in the list, so a pass that reorders blocks
+must add jumps where it breaks a fall-through edge.
+"""
+
+from threeaddr import *
+
+# The instructions that end a basic block
+JUMPS = (Jump, IfZeroJump, IfNotZeroJump)
+BLOCK_ENDS = JUMPS + (EndFunc,)
+
+class BasicBlock(object):
+  """A sequence of instructions that is only entered at its start and only
+  left at its end"""
+
+  def __init__(self, index, code):
+    self.index = index
+    self.code = code
+    self.succs = []
+    self.preds = []
+    # The immediate dominator, which is None for the entry block and for
+    # unreachable blocks
+    self.idom = None
+    # The innermost loop that contains the block, or None
+    self.loop = None
+
+  def __repr__(self):
+    return "%s(index=%r, succs=%r)" % (type(self).__name__, self.index,
+      [succ.index for succ in self.succs])
+
+  @property
+  def loopDepth(self):
+    """The number of loops that contain the block"""
+    depth = 0
+    loop = self.loop
+    while loop is not None:
+      depth += 1
+      loop = loop.parent
+    return depth
+
+class Loop(object):
+  """A natural loop: a header block and the blocks that can reach one of its
+  back edges without passing through the header"""
+
+  def __init__(self, header, blocks):
+    self.header = header
+    self.blocks = blocks
+    # The innermost loop that contains this one, or None
+    self.parent = None
+
+  def __repr__(self):
+    return "%s(header=%r, blocks=%r)" % (type(self).__name__,
+      self.header.index, sorted(block.index for block in self.blocks))
+
+class Function(object):
+  """The control-flow graph of a function"""
+
+  def __init__(self, id_, nwords, code):
+    self.id = id_
+    self.nwords = nwords
+    self.blocks = self._split(code)
+    self._link()
+    self.order = self._reversePostorder()
+    self._findDominators()
+    self.loops = self._findLoops()
+
+  @staticmethod
+  def _split(code):
+    """Split the body of a function into basic blocks."""
+    blocks = []
+    blockCode = []
+    for inst in code:
+      if isinstance(inst, Label) and blockCode:
+        blocks.append(BasicBlock(len(blocks), blockCode))
+        blockCode = []
+      blockCode.append(inst)
+      if isinstance(inst, BLOCK_ENDS):
+        blocks.append(BasicBlock(len(blocks), blockCode))
+        blockCode = []
+    if blockCode or not blocks:
+      blocks.append(BasicBlock(len(blocks), blockCode))
+    return blocks
+
+  def _link(self):
+    """Add the edges between the blocks."""
+    labels = {}
+    for block in self.blocks:
+      for inst in block.code:
+        if not isinstance(inst, Label):
+          break
+        labels[inst.id] = block
+
+    for block, next_ in zip(self.blocks, self.blocks[1:] + [None]):
+      last = block.code[-1] if block.code else None
+      if isinstance(last, JUMPS):
+        block.succs.append(labels[last.target])
+      if not isinstance(last, (Jump, EndFunc)) and next_ is not None:
+        if next_ not in block.succs:
+          block.succs.append(next_)
+      for succ in block.succs:
+        succ.preds.append(block)
+
+  def _reversePostorder(self):
+    """Return the blocks that are reachable from the entry block in reverse
+    postorder."""
+    order = []
+    visited = set([self.entry])
+    stack = [(self.entry, iter(self.entry.succs))]
+    while stack:
+      block, succs = stack[-1]
+      for succ in succs:
+        if succ not in visited:
+          visited.add(succ)
+          stack.append((succ, iter(succ.succs)))
+          break
+      else:
+        stack.pop()
+        order.append(block)
+    order.reverse()
+    return order
+
+  def _findDominators(self):
+    """Find the immediate dominator of each reachable block, using the
+    iterative algorithm of Cooper, Harvey and Kennedy."""
+    position = dict((block, n) for n, block in enumerate(self.order))
+
+    def intersect(a, b):
+      while a is not b:
+        while position[a] > position[b]:
+          a = a.idom
+        while position[b] > position[a]:
+          b = b.idom
+      return a
+
+    # The entry block is its own dominator while the others are found.
+    entry = self.entry
+    entry.idom = entry
+    changed = True
+    while changed:
+      changed = False
+      for block in self.order[1:]:
+        idom = None
+        for pred in block.preds:
+          if pred.idom is not None:
+            idom = pred if idom is None else intersect(pred, idom)
+        if idom is not block.idom:
+          block.idom = idom
+          changed = True
+    entry.idom = None
+
+  def dominates(self, a, b):
+    """Return whether block `a` dominates block `b`. Unreachable blocks are
+    only dominated by themselves."""
+    while b is not None:
+      if b is a:
+        return True
+      b = b.idom
+    return False
+
+  def _findLoops(self):
+    """Return the natural loops of the function, outermost first, and set the
+    innermost loop of each block."""
+    # Loops with the same header are merged.
+    bodies = {}
+    reachable = set(self.order)
+    for block in self.order:
+      for succ in block.succs:
+        if self.dominates(succ, block):
+          body = bodies.setdefault(succ, set([succ]))
+          stack = [block]
+          while stack:
+            member = stack.pop()
+            if member not in body and member in reachable:
+              body.add(member)
+              stack.extend(member.preds)
+
+    loops = sorted((Loop(header, body) for header, body in bodies.items()),
+      key=lambda loop: -len(loop.blocks))
+    for n, loop in enumerate(loops):
+      # The innermost enclosing loop is the smallest one that comes earlier
+      for outer in reversed(loops[:n]):
+        if loop.header in outer.blocks:
+          loop.parent = outer
+          break
+      for block in loop.blocks:
+        block.loop = loop
+    return loops
+
+  entry = property(lambda self: self.blocks[0])
+  """The block that the function starts at"""
+
+  def code(self):
+    """Return the instructions of the function."""
+    code = [Label(self.id), BeginFunc(self.nwords)]
+    for block in self.blocks:
+      code.extend(block.code)
+    return code
+
+class Program(object):
+  """A sequence of three-address code, split into functions and data"""
+
+  def __init__(self, items):
+    # The functions and the instructions that aren't in a function, in order
+    self.items = items
+
+  @classmethod
+  def fromCode(cls, code):
+    """Return the control-flow graphs of a sequence of instructions."""
+    code = list(code)
+    items = []
+    n = 0
+    while n < len(code):
+      if (isinstance(code[n], Label) and n + 1 < len(code) and
+        isinstance(code[n + 1], BeginFunc)):
+        end = n + 2
+        while end < len(code) and not (isinstance(code[end], Label) and
+          end + 1 < len(code) and isinstance(code[end + 1], (BeginFunc, Word))):
+          end += 1
+        items.append(Function(code[n].id, code[n + 1].nwords,
+          code[n + 2:end]))
+        n = end
+      else:
+        items.append(code[n])
+        n += 1
+    return cls(items)
+
+  def functions(self):
+    """Return the functions of the program."""
+    return [item for item in self.items if isinstance(item, Function)]
+
+  def code(self):
+    """Return the instructions of the program."""
+    code = []
+    for item in self.items:
+      if isinstance(item, Function):
+        code.extend(item.code())
+      else:
+        code.append(item)
+    return code
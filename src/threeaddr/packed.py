@@ -0,0 +1,105 @@
+"""
+A compact representation of three-address code
+
+A `PackedCode` stores a sequence of instructions in two arrays, like
+`c.arena.Arena` stores syntax trees: the opcode of each instruction, a small
+integer that indexes `INSTRUCTIONS`, and the indices of its operands in a list
+of distinct operands. Variables, constants and label names that are used by
+many instructions are only stored once.
+
+Iterating over a `PackedCode` yields its instructions as instances of the
+classes in threeaddr.threeaddr, so code that reads a list of instructions,
+such as `vm.tactrans.translate`, can read packed code unchanged. Code that
+only needs the kind of an instruction can compare its opcode with the OP_XXX
+constants instead of testing its class.
+"""
+
+from array import array
+
+from threeaddr import *
+
+# The opcodes of the instructions
+(OP_LABEL, OP_WORD, OP_BEGIN_FUNC, OP_END_FUNC, OP_ASSIGN, OP_ADDRESS_OF,
+  OP_LOAD, OP_STORE, OP_PUSH_PARAM, OP_POP_PARAMS, OP_CALL, OP_NEG, OP_NOT,
+  OP_LESS_THAN, OP_GREATER_THAN, OP_LESS_THAN_EQUAL, OP_GREATER_THAN_EQUAL,
+  OP_EQUAL, OP_NOT_EQUAL, OP_AND, OP_XOR, OP_OR, OP_MUL, OP_DIV, OP_ADD,
+  OP_SUB, OP_JUMP, OP_IF_ZERO_JUMP, OP_IF_NOT_ZERO_JUMP) = range(29)
+
+# The instruction classes, by opcode
+INSTRUCTIONS = [Label, Word, BeginFunc, EndFunc, Assign, AddressOf, Load,
+  Store, PushParam, PopParams, Call, Neg, Not, LessThan, GreaterThan,
+  LessThanEqual, GreaterThanEqual, Equal, NotEqual, And, Xor, Or, Mul, Div,
+  Add, Sub, Jump, IfZeroJump, IfNotZeroJump]
+assert len(INSTRUCTIONS) == OP_IF_NOT_ZERO_JUMP + 1
+
+# The opcodes, by instruction class
+OPCODES = dict((cls, opcode) for opcode, cls in enumerate(INSTRUCTIONS))
+
+# The number of operand indices stored for each instruction, and the index
+# stored for the operands that an instruction doesn't have
+MAX_OPERANDS = 3
+NO_OPERAND = -1
+
+class PackedCode(object):
+  """A sequence of three-address code instructions, stored as arrays"""
+
+  def __init__(self):
+    self.opcodes = array('B')
+    self.args = array('i')
+    self.operands = []
+    # The index of each operand in the list of operands, keyed by its type as
+    # well, since operands of different types such as LocalVar("@t1") and
+    # GlobalVar("@t1") can be equal
+    self._ids = {}
+
+  @classmethod
+  def fromCode(cls, code):
+    """Return packed code holding a sequence of instructions."""
+    packed = cls()
+    packed.extend(code)
+    return packed
+
+  def _operandId(self, operand):
+    """Return the index of an operand in the list of operands, adding it if it
+    isn't there yet."""
+    key = (type(operand), operand)
+    try:
+      return self._ids[key]
+    except KeyError:
+      operandId = self._ids[key] = len(self.operands)
+      self.operands.append(operand)
+      return operandId
+
+  def append(self, inst):
+    """Add an instruction to the end of the code."""
+    self.opcodes.append(OPCODES[type(inst)])
+    args = [self._operandId(operand) for operand in inst]
+    args.extend([NO_OPERAND] * (MAX_OPERANDS - len(args)))
+    self.args.extend(args)
+
+  def extend(self, code):
+    """Add a sequence of instructions to the end of the code."""
+    for inst in code:
+      self.append(inst)
+
+  def __len__(self):
+    return len(self.opcodes)
+
+  def fields(self, index):
+    """Return the operands of the instruction at the given index."""
+    operands = self.operands
+    start = index * MAX_OPERANDS
+    return tuple(operands[operandId]
+      for operandId in self.args[start:start + MAX_OPERANDS]
+      if operandId != NO_OPERAND)
+
+  def __getitem__(self, index):
+    """Return the instruction at the given index."""
+    if index < 0:
+      index += len(self.opcodes)
+    return tuple.__new__(INSTRUCTIONS[self.opcodes[index]],
+      self.fields(index))
+
+  def __iter__(self):
+    for index in xrange(len(self.opcodes)):
+      yield self[index]
@@ -0,0 +1,45 @@
+"""
+Test cases for c.arena
+"""
+
+import unittest
+
+import c.arena
+import c.parser
+import c.syntree
+import c.tacgen
+import c.tokenstream
+
+from tests.c.testparser import PROGRAM
+
+KR_PROGRAM = "int f(x, y)\nint y;\n{\n  return x ? y : 2L;\n}\n"
+
+# The main test class
+
+class TestArena(unittest.TestCase):
+  """A test class for the c.arena module"""
+
+  def test_tree(self):
+    """tree returns a copy of the syntax tree an arena was built from"""
+    for source in [PROGRAM, KR_PROGRAM, "int *const *g(int a, int *b);\n"]:
+      tu = c.parser.parse(c.tokenstream.scan(source))
+      arena = c.arena.Arena.fromTree(tu)
+      self.assertEqual(repr(arena.tree()), repr(tu))
+
+  def test_visit(self):
+    """visitors walk the view of an arena like the syntax tree"""
+    for source in [PROGRAM, KR_PROGRAM]:
+      tu = c.parser.parse(c.tokenstream.scan(source))
+      root = c.arena.Arena.fromTree(tu).root()
+      self.assertIsInstance(root, c.syntree.TranslationUnit)
+      self.assertEqual(root.accept(c.tacgen.TACGenerator()),
+        tu.accept(c.tacgen.TACGenerator()))
+
+  def test_copy(self):
+    """copies of an arena are equal to it"""
+    arena = c.arena.Arena.fromTree(c.parser.parse(c.tokenstream.scan(PROGRAM)))
+    copy = arena.copy()
+    self.assertEqual(copy, arena)
+    self.assertEqual(hash(copy), hash(arena))
+    copy.values.append(None)
+    self.assertNotEqual(copy, arena)
@@ -0,0 +1,92 @@
+"""
+Test cases for c.llgen and c.llparser
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from c.scanner import *
+import c.llgen
+import c.llparser
+import c.parser
+import c.tokenstream
+
+from tests.c.testparser import PROGRAM
+
+GRAMMAR = """
+list:
+  item* end-of-file   { $1 }
+
+item:
+  identifier    { $1.val }
+  '(' item+ ')'   { $2 }
+"""
+
+# The main test class
+
+class TestLLParser(unittest.TestCase):
+  """A test class for the c.llgen and c.llparser modules"""
+
+  def setUp(self):
+    self.dir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.dir)
+
+  def _load(self, text):
+    """Generate and load a parser module for a grammar in the test directory."""
+    grammarPath = os.path.join(self.dir, "grammar.txt")
+    with open(grammarPath, "wb") as file_:
+      file_.write(text)
+    return c.llparser.load(grammarPath, os.path.join(self.dir, "tab.py"))
+
+  def test_generate(self):
+    """generated parsers run the actions of the predicted alternatives"""
+    tab = self._load(GRAMMAR)
+    self.assertEqual(tab.parse(c.tokenstream.scan("a (b (c d)) e")),
+      ["a", ["b", ["c", "d"]], "e"])
+    self.assertRaises(tab.Reject, tab.parse, c.tokenstream.scan("a ()"))
+
+  def test_conflict(self):
+    """alternatives that start with the same token are an error"""
+    self.assertRaises(c.llgen.GrammarError, c.llgen.generate,
+      GRAMMAR + "  identifier '(' { $1 }\n")
+
+  def test_cache(self):
+    """generated parsers are only generated again when the grammar changes"""
+    tablesPath = os.path.join(self.dir, "tab.py")
+    self._load(GRAMMAR)
+    with open(tablesPath, "ab") as file_:
+      file_.write("CACHED = True\n")
+    self.assertTrue(self._load(GRAMMAR).CACHED)
+    self.assertFalse(hasattr(self._load(GRAMMAR + "\n"), "CACHED"))
+
+  def test_parse(self):
+    """parse returns the same syntax trees and errors as parser.parse"""
+    for source in [PROGRAM, PROGRAM + "int 2;\n", "int f(x)\nint y;\n{\n}\n",
+        "x;\n",
+        "int f()\n{\n  if (1) if (2) ; else return a, b = c ? d : e;\n}\n",
+        ""]:
+      results = []
+      for parse in [c.parser.parse, c.llparser.parse]:
+        try:
+          results.append(repr(parse(c.tokenstream.scan(source))))
+        except c.parser.CompileError, e:
+          results.append((type(e), e.pos, e.msg))
+      self.assertEqual(results[0], results[1])
+
+  def test_packaged(self):
+    """the bundled module is used without the grammar, and c.parser without
+    either"""
+    grammarPath, tables = c.llparser.GRAMMAR_PATH, c.llparser._tables
+    c.llparser.GRAMMAR_PATH = os.path.join(self.dir, "missing.txt")
+    try:
+      self.assertEqual(c.llparser._loadDefault().GRAMMAR_HASH,
+        c.llparser.load().GRAMMAR_HASH)
+      c.llparser._tables = False
+      self.assertEqual(repr(c.llparser.parse(c.tokenstream.scan(PROGRAM))),
+        repr(c.parser.parse(c.tokenstream.scan(PROGRAM))))
+    finally:
+      c.llparser.GRAMMAR_PATH, c.llparser._tables = grammarPath, tables
@@ -0,0 +1,109 @@
+"""
+Test cases for c.optimizer
+"""
+
+import sys
+import unittest
+
+import c.optimizer
+import c.parser
+import c.resolver
+import c.syntree
+import c.tacgen
+import c.tokenstream
+
+from tests.c.testparser import PROGRAM
+
+def _optimize(expr, decls="int x;\n"):
+  """Return the optimized syntax tree and the original one of a function that
+  returns an expression."""
+  source = "%sint f()\n{\n  return %s;\n}\n" % (decls, expr)
+  tu = c.resolver.resolve(c.parser.parse(c.tokenstream.scan(source)))
+  return c.optimizer.optimize(tu), tu
+
+def _returned(tu):
+  """Return the expression that the last function in a translation unit
+  returns."""
+  return tu.decls[-1].stmt.stmts[0].expr
+
+def _generate(tu):
+  return tu.accept(c.tacgen.TACGenerator())
+
+# The main test class
+
+class TestOptimizer(unittest.TestCase):
+  """A test class for the c.optimizer module"""
+
+  def _assertFolds(self, expr, val):
+    new, _ = _optimize(expr)
+    self.assertIsInstance(_returned(new), c.syntree.ConstExpr)
+    self.assertEqual(_returned(new).val, val)
+
+  def test_fold(self):
+    """constant expressions are folded like the processor computes them"""
+    self._assertFolds("2 + 3 * 4", 14)
+    self._assertFolds("1 - 2", 0xFFFF)
+    self._assertFolds("300 * 300", 300 * 300 & 0xFFFF)
+    self._assertFolds("-1", 0xFFFF)
+    self._assertFolds("7 / 2 == 3", 1)
+    self._assertFolds("!(1 < 2) || 5 >= 6", 0)
+    self._assertFolds("0 ? x : 4", 4)
+    self._assertFolds("0 && x", 0)
+
+  def test_unfolded(self):
+    """expressions that may behave differently when folded are kept"""
+    for expr in ["1 / 0", "-1 < 0", "40000 / 2", "0 && (x = 1)",
+        "1 ? 2 : x++", "0 * (x = 1)"]:
+      new, tu = _optimize(expr)
+      self.assertNotIsInstance(_returned(new), c.syntree.ConstExpr)
+
+  def test_identities(self):
+    """identities are simplified and multiplications by two become additions"""
+    for expr in ["x + 0", "0 + x", "x - 0", "x * 1", "1 * x", "x / 1"]:
+      new, _ = _optimize(expr)
+      self.assertIsInstance(_returned(new), c.syntree.VarExpr)
+    new, _ = _optimize("x * 2")
+    self.assertIsInstance(_returned(new), c.syntree.AddExpr)
+
+    # The sum holds the value of x before the assignment
+    new, _ = _optimize("(x + 0) + (x = 1)")
+    self.assertIsInstance(_returned(new).lexpr, c.syntree.AddExpr)
+
+  def test_unchanged(self):
+    """the original tree isn't modified"""
+    new, tu = _optimize("x * 1 + (2 + 3)")
+    self.assertIsInstance(_returned(tu), c.syntree.AddExpr)
+    self.assertIsInstance(_returned(tu).lexpr, c.syntree.MulExpr)
+    new, tu = _optimize("x")
+    self.assertIs(new, tu)
+
+  def test_errors(self):
+    """optimized trees generate the same errors"""
+    for expr in ["(x + 0) = 1", "&(1 + 2)", "(x * 1)++", "(x + 0)()"]:
+      errors = []
+      for tu in _optimize(expr):
+        try:
+          _generate(tu)
+        except c.parser.CompileError, e:
+          errors.append((e.pos, e.msg))
+      self.assertEqual(len(errors), 2)
+      self.assertEqual(errors[0], errors[1])
+
+  def test_generate(self):
+    """optimized trees generate less code"""
+    new, tu = _optimize("x * 1 + 120 * 2 - 0 * x")
+    self.assertLess(len(_generate(new)), len(_generate(tu)))
+    tu = c.resolver.resolve(c.parser.parse(c.tokenstream.scan(PROGRAM)))
+    self.assertLessEqual(len(_generate(c.optimizer.optimize(tu))),
+      len(_generate(tu)))
+
+  def test_deepExpr(self):
+    """long expressions are simplified without recursing"""
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(1000)
+    try:
+      new, _ = _optimize("x" + " + 0" * 3000)
+      self.assertIsInstance(_returned(new), c.syntree.VarExpr)
+      self._assertFolds("1" + " + 1" * 3000, 3001)
+    finally:
+      sys.setrecursionlimit(limit)
@@ -0,0 +1,185 @@
+"""
+Test cases for c.parser
+"""
+
+import sys
+import unittest
+
+from c.scanner import *
+import c.parser
+import c.tokenstream
+
+PROGRAM = """int x;
+
+int f(int a, int b)
+{
+  int c;
+  c = a ? b : (x = a + b);
+  while (c < 10)
+    c = c + f(c, 1);
+  return c;
+}
+"""
+
+# The main test class
+
+class TestParser(unittest.TestCase):
+  """A test class for the c.parser module"""
+
+  def test_memo(self):
+    """parse returns the same syntax tree with and without a memo table"""
+    ts = c.tokenstream.scan(PROGRAM)
+    memo = c.parser.Memo()
+    self.assertEqual(repr(c.parser.parse(ts, memo=memo)),
+      repr(c.parser.parse(ts)))
+
+    stats = memo.stats()
+    hits, misses, rate = stats["unaryExpr"]
+    self.assertTrue(hits > 0)
+    self.assertEqual(rate, float(hits) / (hits + misses))
+
+  def test_memoErrors(self):
+    """parse raises the same error with and without a memo table"""
+    ts = c.tokenstream.scan("int f()\n{\n  return 1 + ;\n}\n")
+    errors = []
+    for memo in [None, c.parser.Memo()]:
+      try:
+        c.parser.parse(ts, memo=memo)
+      except c.parser.ParseError, e:
+        errors.append((e.pos, e.msg))
+    self.assertEqual(len(errors), 2)
+    self.assertEqual(errors[0], errors[1])
+
+  def test_memoNested(self):
+    """parse with a memo table handles deeply nested expressions"""
+    expr = "(" * 30 + "1" + ")" * 30
+    ts = c.tokenstream.scan("int f()\n{\n  return %s;\n}\n" % expr)
+    c.parser.parse(ts, memo=c.parser.Memo())
+
+  def test_memoEviction(self):
+    """a memo table never holds more entries than its limit"""
+    memo = c.parser.Memo(1)
+    memo.reset(2)
+    for i in range(3):
+      memo.put("a", i, i)
+      memo.put("b", i, i)
+      self.assertTrue(memo.size <= 3)
+    self.assertEqual(memo.get("b", 2), 2)
+    self.assertEqual(memo.get("a", 0), None)
+
+  def test_binaryOps(self):
+    """binary operators are left-associative and bind by precedence"""
+    ts = c.tokenstream.scan("int f(int a)\n{\n  return a - a + a * a / a;\n}\n")
+    expr_ = c.parser.parse(ts).decls[0].stmt.stmts[0].expr
+    self.assertEqual(type(expr_).__name__, "AddExpr")
+    self.assertEqual(type(expr_.lexpr).__name__, "SubExpr")
+    self.assertEqual(type(expr_.rexpr).__name__, "DivExpr")
+    self.assertEqual(type(expr_.rexpr.lexpr).__name__, "MulExpr")
+
+  def test_binaryOpsLong(self):
+    """long chains of binary operators are parsed without recursing"""
+    ts = c.tokenstream.scan("int f(int a)\n{\n  return %s;\n}\n"
+      % " + ".join(["a"] * 5000))
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(1000)
+    try:
+      expr_ = c.parser.parse(ts).decls[0].stmt.stmts[0].expr
+    finally:
+      sys.setrecursionlimit(limit)
+    for _ in range(4999):
+      self.assertEqual(type(expr_).__name__, "AddExpr")
+      expr_ = expr_.lexpr
+
+  def test_kindToken(self):
+    """tokens of other kinds are rejected without being created"""
+    ts = c.tokenstream.scan("x")
+    created = []
+    token = ts.table.token
+    ts.table.token = lambda i: created.append(i) or token(i)
+    k, _ = c.parser.kindToken(IntToken)(ts, 0, None, None, None,
+      "eerr")
+    self.assertEqual(k, "eerr")
+    self.assertEqual(created, [])
+
+  def test_firstSet(self):
+    """alternatives are only tried on tokens in their FIRST sets"""
+    first = c.parser.firstSet(c.parser.typeSpec)
+    self.assertTrue((KeywordToken.kind, "int") in first)
+    self.assertFalse(IdentifierToken.kind in first)
+    self.assertEqual(c.parser.firstSet(c.parser.stmt), None)
+
+    ts = c.tokenstream.scan("int f()\n{\n  return 1;\n}\nint 2;\n")
+    try:
+      c.parser.parse(ts)
+    except c.parser.ParseError, e:
+      self.assertEqual(e.pos, Position(5, 5))
+      self.assertEqual(e.msg, "unexpected int constant")
+    else:
+      self.fail("expected a parse error")
+
+  def test_deepNesting(self):
+    """deeply nested and long programs are parsed without recursing"""
+    src = "int f()\n{\n  %s\n}\n" % ("{" * 500 + "}" * 500)
+    src += "int g()\n{\n  %s\n}\n" % ("1;\n" * 5000)
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(1000)
+    try:
+      tu = c.parser.parse(c.tokenstream.scan(src))
+    finally:
+      sys.setrecursionlimit(limit)
+    self.assertEqual(len(tu.decls), 2)
+    self.assertEqual(len(tu.decls[1].stmt.stmts), 5000)
+
+  def test_profiled(self):
+    """profiled parsers count invocations, tokens and outcomes per rule"""
+    profile = c.parser.Profile()
+    constant = c.parser.profiled(c.parser.constExpr, "constExpr", profile)
+    p = c.parser.many(c.parser.orElse(
+      c.parser.mbind(constant, lambda _: c.parser.semicolonToken),
+      c.parser.mbind(c.parser.identifierToken, lambda _: c.parser.commaToken)))
+    c.parser.runParser(p, c.tokenstream.scan("1; x, 2; y,"))
+    stats = profile.rules["constExpr"]
+    self.assertEqual(stats.calls, 5)
+    self.assertEqual(stats.tokens, 2)
+    self.assertEqual(stats.backtracks, 3)
+    self.assertEqual(stats.errors, 0)
+    self.assertEqual(c.parser.firstSet(constant),
+      c.parser.firstSet(c.parser.constExpr))
+
+  def test_lazy(self):
+    """parse reads a lazy token stream only as far as it needs to"""
+    ts = c.tokenstream.scanLazily(PROGRAM + "int y;\n" * 1000)
+    self.assertEqual(repr(c.parser.parse(ts, memo=c.parser.Memo())),
+      repr(c.parser.parse(c.tokenstream.scan(PROGRAM + "int y;\n" * 1000))))
+    self.assertTrue(ts.finished())
+
+    ts = c.tokenstream.scanLazily("int 2;\n" + PROGRAM * 100 + "@")
+    self.assertRaises(c.parser.ParseError, c.parser.parse, ts)
+    self.assertFalse(ts.finished())
+    self.assertTrue(ts.available() < 100)
+
+  def test_reparse(self):
+    """Reparser reuses unchanged declarations and returns the same syntax tree
+    as a full parse"""
+    reparser = c.parser.Reparser()
+    old = reparser.parse(c.tokenstream.scan(PROGRAM))
+    source = PROGRAM.replace("c = a ?", "c = 1 + a ?") + "int y;\n"
+    ts = c.tokenstream.scan(source)
+    new = reparser.parse(ts)
+    self.assertIs(new.decls[0], old.decls[0])
+    self.assertIsNot(new.decls[1], old.decls[1])
+    self.assertEqual(repr(new), repr(c.parser.parse(ts)))
+
+    source = "\n" + source
+    ts = c.tokenstream.scan(source)
+    new = reparser.parse(ts)
+    self.assertEqual(new.decls[2].pos, Position(12, 1))
+    self.assertEqual(repr(new), repr(c.parser.parse(ts)))
+
+    # An edit that moves a newline without changing the length of the source
+    # still moves the positions after it.
+    source = source.replace("{\n  int c", "{   int c")
+    ts = c.tokenstream.scan(source)
+    new = reparser.parse(ts)
+    self.assertEqual(new.decls[2].pos, Position(11, 1))
+    self.assertEqual(repr(new), repr(c.parser.parse(ts)))
@@ -0,0 +1,47 @@
+"""
+Test cases for c.prelude
+"""
+
+import unittest
+
+from c.scanner import *
+import c.parser
+import c.prelude
+import c.tokenstream
+
+HEADER = "extern int x;\n\nint f(int a)\n{\n  return a + x;\n}\n"
+
+# The main test class
+
+class TestPrelude(unittest.TestCase):
+  """A test class for the c.prelude module"""
+
+  def test_prelude(self):
+    """prelude only parses each distinct header once"""
+    prelude = c.prelude.prelude(HEADER)
+    self.assertIs(c.prelude.prelude("".join(list(HEADER))), prelude)
+    self.assertIsNot(c.prelude.prelude(HEADER + "\n"), prelude)
+    self.assertEqual(len(prelude.decls), 2)
+
+  def test_parse(self):
+    """parse puts the prelude's declarations before the program's"""
+    prelude = c.prelude.prelude(HEADER)
+    tu = c.parser.parse(c.tokenstream.scan("int g()\n{\n  return f(1);\n}\n"),
+      prelude)
+    self.assertEqual(tu.decls[:2], prelude.decls)
+    self.assertEqual(len(tu.decls), 3)
+
+    tu = c.parser.parse(c.tokenstream.scan(""), prelude)
+    self.assertEqual(tu.decls, prelude.decls)
+
+  def test_errorPosition(self):
+    """errors in a program parsed with a prelude are positioned in the
+    program"""
+    prelude = c.prelude.prelude(HEADER)
+    try:
+      c.parser.parse(c.tokenstream.scan("int g()\n{\n  return 1 +;\n}\n"),
+        prelude)
+    except c.parser.ParseError, e:
+      self.assertEqual(e.pos, Position(3, 13))
+    else:
+      self.fail("expected a parse error")
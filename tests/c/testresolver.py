@@ -0,0 +1,95 @@
+"""
+Test cases for c.resolver
+"""
+
+import sys
+import unittest
+
+from c.scanner import *
+import c.parser
+import c.resolver
+import c.syntree
+import c.tacgen
+import c.tokenstream
+from threeaddr.threeaddr import GlobalVar, ParamVar
+
+from tests.c.testparser import PROGRAM
+
+def _parse(source):
+  return c.parser.parse(c.tokenstream.scan(source))
+
+# The main test class
+
+class TestResolver(unittest.TestCase):
+  """A test class for the c.resolver module"""
+
+  def test_bindings(self):
+    """variable expressions are bound to their variables and scope depths"""
+    tu = c.resolver.resolve(_parse("int x;\nint f(a, b)\n{\n  int y;\n"
+      "  { int x; x = a + b + y; }\n  return x;\n}\n"))
+    bindings = [(node.id, node.binding, node.depth)
+      for node in c.syntree.walk(tu) if isinstance(node, c.syntree.VarExpr)]
+    self.assertEqual(bindings, [("x", 1, 3), ("a", ParamVar(1), 1),
+      ("b", ParamVar(0), 1), ("y", 0, 2), ("x", GlobalVar("x"), 0)])
+
+  def test_undeclared(self):
+    """all of the undeclared names are reported at once"""
+    source = "int f()\n{\n  x = 1;\n  { int y; }\n  return y + f;\n}\n"
+    try:
+      c.resolver.resolve(_parse(source))
+    except c.resolver.UndeclaredError, e:
+      self.assertEqual(e.names, [(Position(3, 3), "x"),
+        (Position(5, 10), "y")])
+      self.assertEqual(e.pos, Position(3, 3))
+    else:
+      self.fail("UndeclaredError not raised")
+
+  def test_undeclaredOrder(self):
+    """undeclared names are reported once each, in the order of their first
+    uses"""
+    source = ("int f()\n{\n  for (i = 0; i < 3; i++)\n    j = i;\n"
+      "  return k + i;\n}\n")
+    try:
+      c.resolver.resolve(_parse(source))
+    except c.resolver.UndeclaredError, e:
+      self.assertEqual(e.names, [(Position(3, 8), "i"),
+        (Position(4, 5), "j"), (Position(5, 10), "k")])
+      self.assertEqual(e.pos, Position(3, 8))
+    else:
+      self.fail("UndeclaredError not raised")
+
+  def test_generate(self):
+    """resolved syntax trees generate the same code as unresolved ones"""
+    for source in [PROGRAM,
+        "int x;\nint f(a)\n{\n  int y;\n  for (y = 0; y < a; y++)\n"
+          "  { int x; x = y; }\n  return x;\n}\nint g() { return f(x); }\n"]:
+      self.assertEqual(
+        c.resolver.resolve(_parse(source)).accept(c.tacgen.TACGenerator()),
+        _parse(source).accept(c.tacgen.TACGenerator()))
+
+  def test_deepNesting(self):
+    """deeply nested programs are resolved and generate code without
+    recursing"""
+    tu = _parse("int f()\n{\n  %s\n}\n" % ("{" * 8000 + "}" * 8000))
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(1000)
+    try:
+      code = c.resolver.resolve(tu).accept(c.tacgen.TACGenerator())
+    finally:
+      sys.setrecursionlimit(limit)
+    self.assertEqual(len(code), 3)
+
+  def test_deepPointers(self):
+    """declarations of deeply nested pointers are resolved and generate code
+    without recursing"""
+    pointers = "*" * 2000
+    for source in ["int %sp;\nint f()\n{\n  return 0;\n}\n" % pointers,
+        "int f()\n{\n  int %sp;\n  p = 0;\n  return 0;\n}\n" % pointers]:
+      tu = _parse(source)
+      limit = sys.getrecursionlimit()
+      sys.setrecursionlimit(1000)
+      try:
+        tu = c.resolver.resolve(tu)
+        tu.accept(c.tacgen.TACGenerator())
+      finally:
+        sys.setrecursionlimit(limit)
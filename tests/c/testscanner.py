@@ -2,12 +2,15 @@
 Test cases for c.scanner
 """
 
+import mmap
+import tempfile
 import unittest
 
 import tests.arbitrary as arbitrary
 from tests.arbitrary import forall
 
 from c.scanner import *
+import c.tablescanner
 
 # Type size limits
 
@@ -16,6 +19,12 @@ INT_BITS = 16
 MIN_INT = 0 # C uses unary '-' for negative numbers
 MAX_INT = 1 << (INT_BITS - 1) # 2**(MAX_BITS - 1) for negative ints
 
+# Pieces of C-like strings that exercise most scanner states
+FRAGMENTS = ["0", "0x", "09", "1", "1.5", "e", "e+", "f", "u", "l", "L", "x",
+  "a", "int", " ", "\n", ".", "..", "...", "'", "\"", "\\", "\\n", "/*", "*/",
+  "/", "*", "<", ">", "%", ":", "=", "!", "&", "|", "(", ")", "{", "}", "[",
+  "]", ";", "@"]
+
 # The main test class
 
 class TestScanner(unittest.TestCase):
@@ -87,3 +96,71 @@ class TestScanner(unittest.TestCase):
       gen = scan(s)
       tok = next(gen)
       self.assertEqual(type(tok), type_)
+
+  def _scanAll(self, s, scan_=scan, **kwargs):
+    """Return (the list of tokens and warnings, the error message or None)
+    yielded by scan, or the given scanning function."""
+    toks = []
+    try:
+      for tok in scan_(s, **kwargs):
+        toks.append((type(tok), tuple(tok)))
+    except ScanError, e:
+      return (toks, str(e))
+    return (toks, None)
+
+  @forall(s=arbitrary.strs())
+  def test_scanTablesStrs(self, s):
+    """scan yields the same tokens and errors with tables for any string"""
+    self.assertEqual(self._scanAll(s, tables=True), self._scanAll(s))
+
+  @forall(fragments=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=10))
+  def test_scanTablesFragments(self, fragments):
+    """scan yields the same tokens and errors with tables for C-like strings"""
+    s = "".join(fragments)
+    self.assertEqual(self._scanAll(s, tables=True), self._scanAll(s))
+
+  @forall(fragments=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=10))
+  def test_lineIndex(self, fragments):
+    """LineIndex finds the same positions as Position.next"""
+    s = "".join(fragments)
+    lines = LineIndex(s)
+    pos = Position(1, 1)
+    for off, c in enumerate(s):
+      self.assertEqual(lines.position(off), pos)
+      self.assertEqual(SourcePosition(lines, off), pos)
+      self.assertEqual(str(SourcePosition(lines, off)), str(pos))
+      pos = pos.next(c)
+
+  @forall(fragments=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=10),
+    chunkSize=arbitrary.ints(lower=1, upper=8))
+  def test_scanStream(self, fragments, chunkSize):
+    """scanStream yields the same tokens and errors as scan for C-like strings
+    split into chunks"""
+    s = "".join(fragments)
+    chunks = [s[i:i + chunkSize] for i in range(0, len(s), chunkSize)]
+    self.assertEqual(self._scanAll(chunks, c.tablescanner.scanStream),
+      self._scanAll(s))
+
+  def test_scanSources(self):
+    """scan accepts buffers, bytearrays, memoryviews, mmaps and files"""
+    s = "int main() {\n  return 'a' + 1.5;\n}\n"
+    expected = self._scanAll(s)
+    for source in [buffer(s), bytearray(s), memoryview(s)]:
+      for kwargs in [{}, {"tables": True}]:
+        self.assertEqual(self._scanAll(source, **kwargs), expected)
+
+    with tempfile.TemporaryFile() as file_:
+      file_.write(s)
+      file_.flush()
+      source = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+      self.assertEqual(self._scanAll(source, tables=True), expected)
+      file_.seek(0)
+      self.assertEqual(self._scanAll(file_, scanFile, chunkSize=4), expected)
+
+  def test_scanHexFloat(self):
+    """all of the scanners reject hexadecimal floating constants"""
+    for s in ["0xa...1", "0x1.5", "0x.5f"]:
+      expected = self._scanAll(s)
+      self.assertEqual(expected, ([], "line 1, column %d: hexadecimal "
+        "floating constants are not supported" % (s.index('.') + 1)))
+      self.assertEqual(self._scanAll(s, tables=True), expected)
@@ -0,0 +1,88 @@
+"""
+Test cases for c.syntree
+"""
+
+import sys
+import unittest
+
+import c.parser
+import c.syntree
+import c.tokenstream
+
+from tests.c.testparser import PROGRAM
+
+# The main test class
+
+class TestSyntree(unittest.TestCase):
+  """A test class for the c.syntree module"""
+
+  def test_types(self):
+    """types with the same fields are the same object"""
+    self.assertIs(c.syntree.IntType(), c.syntree.IntType())
+    self.assertIsNot(c.syntree.IntType(), c.syntree.LongType())
+    pointer = c.syntree.PointerType(c.syntree.IntType())
+    self.assertIs(c.syntree.PointerType(c.syntree.IntType()), pointer)
+    self.assertIs(c.syntree.FunType([pointer], c.syntree.IntType()),
+      c.syntree.FunType((pointer,), c.syntree.IntType()))
+    self.assertRaises(AttributeError, setattr, pointer, "inner", None)
+
+  def test_slots(self):
+    """syntax tree nodes don't have instance dictionaries"""
+    stack = [c.parser.parse(c.tokenstream.scan(PROGRAM))]
+    while stack:
+      node = stack.pop()
+      if isinstance(node, list):
+        stack.extend(node)
+      elif type(node).__module__ == c.syntree.__name__:
+        self.assertFalse(hasattr(node, "__dict__"), type(node).__name__)
+        stack.extend(getattr(node, name)
+          for name in c.syntree.fieldNames(type(node)) if hasattr(node, name))
+
+  def test_visitor(self):
+    """visitors fall back to base classes, then to genericVisit"""
+    class Visitor(c.syntree.NodeVisitor):
+      def __init__(self):
+        self.visited = []
+
+      def visitBinaryExpr(self, node):
+        self.visited.append(type(node).__name__)
+        yield self.genericVisit(node)
+
+      def visitVarExpr(self, node):
+        self.visited.append(node.id)
+
+    visitor = Visitor()
+    visitor.visit(c.parser.parse(c.tokenstream.scan(PROGRAM)))
+    self.assertEqual(visitor.visited, ["c", "a", "b", "x", "AddExpr", "a",
+      "b", "LessThanExpr", "c", "c", "AddExpr", "c", "f", "c", "c"])
+
+  def test_deepVisit(self):
+    """visit generators are run without recursion"""
+    class Visitor(c.syntree.NodeVisitor):
+      def visitNegExpr(self, node):
+        depth = yield self.visitChild(node.expr)
+        raise c.syntree.Return(depth + 1)
+
+      def visitConstExpr(self, node):
+        return 0
+
+    expr_ = c.syntree.ConstExpr(None, c.syntree.IntType(), 1)
+    for _ in range(5000):
+      expr_ = c.syntree.NegExpr(None, expr_)
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(1000)
+    try:
+      self.assertEqual(Visitor().visit(expr_), 5000)
+      self.assertEqual(expr_.accept(Visitor()), 5000)
+    finally:
+      sys.setrecursionlimit(limit)
+
+  def test_walk(self):
+    """walk yields every node in preorder"""
+    tu = c.parser.parse(c.tokenstream.scan(PROGRAM))
+    nodes = list(c.syntree.walk(tu))
+    self.assertIs(nodes[0], tu)
+    self.assertIs(nodes[1], tu.decls[0])
+    self.assertEqual([node.id for node in nodes
+      if isinstance(node, c.syntree.VarExpr)],
+      ["c", "a", "b", "x", "a", "b", "c", "c", "c", "f", "c", "c"])
@@ -0,0 +1,34 @@
+"""
+Test cases for c.tacgen
+"""
+
+import unittest
+
+import c.parser
+import c.syntree
+import c.tacgen
+import c.tokenstream
+import vm.tactrans
+
+def generate(source):
+  """Return the three-address code generated for a C program."""
+  return c.parser.parse(c.tokenstream.scan(source)).accept(
+    c.tacgen.TACGenerator())
+
+# The main test class
+
+class TestTACGenerator(unittest.TestCase):
+  """A test class for the c.tacgen module"""
+
+  def test_returnWithoutValue(self):
+    """a return statement without an expression returns 0, like falling off the
+    end of a function, and the code can be translated"""
+    code = generate("int f()\n{\n  return;\n}\n")
+    self.assertEqual(code, generate("int f()\n{\n}\n"))
+    vm.tactrans.translate(code)
+
+  def test_unhandledNode(self):
+    """nodes without code generation raise an error instead of generating
+    nothing"""
+    self.assertRaises(NotImplementedError, c.tacgen.TACGenerator().visit,
+      c.syntree.StringLiteralExpr("abc"))
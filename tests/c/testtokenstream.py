@@ -0,0 +1,157 @@
+"""
+Test cases for c.tokenstream
+"""
+
+import unittest
+
+import tests.arbitrary as arbitrary
+from tests.arbitrary import forall
+
+from c.scanner import *
+import c.parser
+import c.tokenstream
+
+from tests.c.testscanner import FRAGMENTS
+
+# The main test class
+
+class TestTokenStream(unittest.TestCase):
+  """A test class for the c.tokenstream module"""
+
+  def _scanAll(self, s, stream):
+    """Return the tokens and warnings scanned from a string, and the error
+    message if scanning failed. `stream` is True to scan with
+    c.tokenstream.scan, or a function to scan with instead."""
+    warnings = []
+    try:
+      if stream is True:
+        toks = list(c.tokenstream.scan(s, warnings))
+      elif stream:
+        toks = list(stream(s, warnings))
+      else:
+        toks = list(tokensAndWarnings(scan(s), warnings))
+    except ScanError, e:
+      return ([], [], str(e))
+    return ([(type(tok), tuple(tok)) for tok in toks],
+      [str(warning) for warning in warnings], None)
+
+  @forall(fragments=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=10))
+  def test_scanFragments(self, fragments):
+    """scan returns a stream of the same tokens and warnings as c.scanner.scan
+    for C-like strings"""
+    s = "".join(fragments)
+    self.assertEqual(self._scanAll(s, True), self._scanAll(s, False))
+
+  @forall(fragments=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=10))
+  def test_scanLazily(self, fragments):
+    """scanLazily returns a stream of the same tokens and warnings as scan"""
+    s = "".join(fragments)
+    self.assertEqual(self._scanAll(s, c.tokenstream.scanLazily),
+      self._scanAll(s, True))
+
+  def test_slice(self):
+    """slices of a token stream share its tokens and kinds"""
+    ts = c.tokenstream.scan("int main() {\n  return 0;\n}\n")
+    toks = list(ts)
+    self.assertEqual(len(ts), len(toks))
+    self.assertEqual(list(ts[3:]), toks[3:])
+    self.assertEqual(list(ts[3:][1:4]), toks[4:7])
+    self.assertEqual(ts[-1], toks[-1])
+    self.assertEqual(ts.rest().first(), toks[1])
+    self.assertEqual([ts.kind(i) for i in range(len(ts))],
+      [tok.kind for tok in toks])
+    self.assertEqual(ts[5], KeywordToken(Position(2, 3), "return"))
+    self.assertEqual(ts.span(5), (15, 21))
+
+  @forall(before=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=10),
+    removed=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=2),
+    inserted=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=2),
+    after=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=10))
+  def test_rescan(self, before, removed, inserted, after):
+    """rescan returns the same tokens and warnings as scan after an edit"""
+    before, removed, inserted, after = map("".join,
+      (before, removed, inserted, after))
+    try:
+      ts = c.tokenstream.scan(before + removed + after)
+    except ScanError:
+      return
+
+    s = before + inserted + after
+    rescan = lambda s, warnings: c.tokenstream.rescan(ts, len(before),
+      len(removed), inserted, s, warnings)
+    self.assertEqual(self._scanAll(s, rescan), self._scanAll(s, True))
+
+  @forall(before=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=10),
+    removed=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=2),
+    inserted=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=2),
+    after=arbitrary.lists(arbitrary.items(FRAGMENTS), maxLen=10))
+  def test_rescanChunks(self, before, removed, inserted, after):
+    """rescan returns the same tokens and spans as scan when the edit is in the
+    middle of the chunks of a stream, and again after a second edit"""
+    before, removed, inserted, after = map("".join,
+      (before, removed, inserted, after))
+    chunkTokens = c.tokenstream.CHUNK_TOKENS
+    c.tokenstream.CHUNK_TOKENS = 3
+    try:
+      try:
+        ts = c.tokenstream.scan(before + removed + after)
+      except ScanError:
+        return
+
+      for old, new in [(removed, inserted), (inserted, removed)]:
+        ts = c.tokenstream.rescan(ts, len(before), len(old), new,
+          before + new + after)
+        try:
+          expected = c.tokenstream.scan(before + new + after)
+        except ScanError:
+          self.assertRaises(ScanError, list, ts)
+          return
+        self.assertEqual(list(ts), list(expected))
+        self.assertEqual(map(ts.span, range(len(ts))),
+          map(expected.span, range(len(expected))))
+    finally:
+      c.tokenstream.CHUNK_TOKENS = chunkTokens
+
+  def test_rescanShares(self):
+    """rescan shares the chunks away from the edit with the old stream"""
+    chunkTokens = c.tokenstream.CHUNK_TOKENS
+    c.tokenstream.CHUNK_TOKENS = 4
+    try:
+      old = "int f(int a)\n{\n  return a + 1;\n}\n" * 5
+      new = old.replace("a + 1", "a + 12", 1)
+      ts = c.tokenstream.scan(old)
+      off, removed, inserted = c.tokenstream.findEdit(old, new)
+      rescanned = c.tokenstream.rescan(ts, off, removed, inserted, new)
+    finally:
+      c.tokenstream.CHUNK_TOKENS = chunkTokens
+
+    oldChunks = ts.table.chunks
+    newChunks = rescanned.table.chunks
+    self.assertEqual(len(newChunks), len(oldChunks))
+    self.assertTrue(newChunks[0] is oldChunks[0])
+    self.assertTrue(newChunks[-1] is oldChunks[-1])
+    self.assertEqual(rescanned.span(len(rescanned) - 1), (len(new), len(new)))
+    self.assertEqual(list(rescanned), list(c.tokenstream.scan(new)))
+
+  def test_rescanError(self):
+    """a scan error caused by an edit is only raised once the tokens before it
+    have been read, like it is for a lazily scanned stream"""
+    old = "int f()\n{\n  return 0;\n}\n"
+    new = old.replace("f()", "f(")
+    off, removed, inserted = c.tokenstream.findEdit(old, new)
+    errors = []
+    for ts in [c.tokenstream.scanLazily(new),
+        c.tokenstream.rescan(c.tokenstream.scan(old), off, removed, inserted,
+          new)]:
+      try:
+        c.parser.Reparser().parse(ts)
+      except c.parser.CompileError, e:
+        errors.append((type(e), str(e)))
+    self.assertEqual(errors, [(c.parser.ParseError,
+      "line 2, column 1: unexpected {")] * 2)
+
+  @forall(old=arbitrary.strs(maxLen=20), new=arbitrary.strs(maxLen=20))
+  def test_findEdit(self, old, new):
+    """findEdit returns an edit that turns one string into another"""
+    off, removed, inserted = c.tokenstream.findEdit(old, new)
+    self.assertEqual(old[:off] + inserted + old[off + removed:], new)
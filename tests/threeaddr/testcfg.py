@@ -0,0 +1,66 @@
+"""
+Test cases for threeaddr.cfg
+"""
+
+import unittest
+
+from threeaddr.cfg import *
+
+from tests.c.testparser import PROGRAM
+from tests.c.testtacgen import generate
+
+LOOPS = """int x;
+int f(int n)
+{
+  int i, j;
+  for (i = 0; i < n; i++)
+    while (j) {
+      if (x) continue;
+      j = j - 1;
+    }
+  if (n) return 1;
+  return 2;
+  x = 3;
+}
+"""
+
+# The main test class
+
+class TestCFG(unittest.TestCase):
+  """A test class for the threeaddr.cfg module"""
+
+  def test_code(self):
+    """programs give back the code they were built from"""
+    for source in [PROGRAM, LOOPS]:
+      code = generate(source)
+      self.assertEqual(Program.fromCode(code).code(), code)
+
+  def test_blocks(self):
+    """blocks end at jumps and start at labels"""
+    program = Program.fromCode([Label("x"), Word(0), Label("f"),
+      BeginFunc(1), Assign(LocalVar("@t1"), 1), IfZeroJump(LocalVar("@t1"),
+      "@l1"), Jump("@l2"), Label("@l1"), EndFunc(0), Label("@l2"),
+      EndFunc(1), Assign(LocalVar("@t1"), 2)])
+    self.assertEqual(program.items[:2], [Label("x"), Word(0)])
+    f, = program.functions()
+    self.assertEqual((f.id, f.nwords), ("f", 1))
+    self.assertEqual([len(block.code) for block in f.blocks], [2, 1, 2, 2, 1])
+    self.assertEqual([[succ.index for succ in block.succs]
+      for block in f.blocks], [[2, 1], [3], [], [], []])
+    self.assertEqual([[pred.index for pred in block.preds]
+      for block in f.blocks], [[], [0], [0], [1], []])
+    self.assertEqual([block.idom and block.idom.index for block in f.blocks],
+      [None, 0, 0, 1, None])
+
+  def test_loops(self):
+    """loops are found with their nesting"""
+    f, = Program.fromCode(generate(LOOPS)).functions()
+    outer, inner = f.loops
+    self.assertIs(inner.parent, outer)
+    self.assertIsNone(outer.parent)
+    self.assertTrue(inner.blocks < outer.blocks)
+    self.assertTrue(f.dominates(outer.header, inner.header))
+    self.assertEqual(f.entry.loopDepth, 0)
+    self.assertEqual(inner.header.loopDepth, 2)
+    self.assertEqual(max(block.loopDepth for block in f.blocks), 2)
+    self.assertIsNone(f.blocks[-1].idom)
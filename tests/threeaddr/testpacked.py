@@ -0,0 +1,39 @@
+"""
+Test cases for threeaddr.packed
+"""
+
+import unittest
+
+from threeaddr.packed import *
+import vm.tactrans
+
+from tests.c.testparser import PROGRAM
+from tests.c.testtacgen import generate
+
+# The main test class
+
+class TestPacked(unittest.TestCase):
+  """A test class for the threeaddr.packed module"""
+
+  def test_iter(self):
+    """packed code yields the instructions it was built from"""
+    code = generate(PROGRAM)
+    packed = PackedCode.fromCode(code)
+    self.assertEqual(len(packed), len(code))
+    self.assertEqual(repr(list(packed)), repr(code))
+    self.assertEqual(repr(packed[-1]), repr(code[-1]))
+    self.assertEqual(vm.tactrans.translate(packed),
+      vm.tactrans.translate(code))
+
+  def test_opcodes(self):
+    """instructions are stored as opcodes and shared operands"""
+    code = [Label("f"), BeginFunc(1), Assign(LocalVar("@t1"), 1),
+      Add(LocalVar("@t1"), LocalVar("@t1"), 1), Assign(GlobalVar("@t1"), 1),
+      EndFunc(LocalVar("@t1"))]
+    packed = PackedCode.fromCode(code)
+    self.assertEqual(list(packed.opcodes), [OP_LABEL, OP_BEGIN_FUNC,
+      OP_ASSIGN, OP_ADD, OP_ASSIGN, OP_END_FUNC])
+    self.assertEqual(packed.operands, ["f", 1, LocalVar("@t1"),
+      GlobalVar("@t1")])
+    self.assertIsInstance(packed[4].dst, GlobalVar)
+    self.assertEqual(packed.fields(3), (LocalVar("@t1"), LocalVar("@t1"), 1))